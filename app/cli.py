@@ -0,0 +1,282 @@
+import argparse
+import glob
+import os
+import sys
+
+from app import __version__
+
+# Heavy modules (pandas, xlsxwriter and the converters) are imported inside the
+# command handlers so that `--help` and `--version` return immediately.
+# Nothing in this module may import Qt.
+
+# Mirrors app.core.output_sinks.OUTPUT_FORMATS without importing pandas
+OUTPUT_FORMATS = ["xlsx", "xlsx-split", "csv", "parquet", "feather"]
+RETURN_TYPES = ["auto", "gstr1", "gstr2"]
+
+
+def expand_inputs(inputs):
+    """
+    Expands files, glob patterns and directories into a flat list of JSON files.
+    Directories contribute the files directly inside them, like `process_drop`,
+    and ZIP archives one entry per JSON file inside them.
+    """
+    from app.core.common_processors import process_drop
+    from app.core.json_sources import is_json_source
+
+    paths = []
+    for item in inputs:
+        matches = sorted(glob.glob(item)) if glob.has_magic(item) else [item]
+        if not matches:
+            print(f"Warning: No files match '{item}'", file=sys.stderr)
+        paths.extend(matches)
+
+    files = []
+    seen = set()
+    for path in process_drop(paths):
+        if is_json_source(path) and path not in seen:
+            seen.add(path)
+            files.append(path)
+    return files
+
+
+def _print_result(result, quiet, profile=False):
+    if result.success:
+        if not quiet:
+            print(f"OK      {result.json_path} -> {result.output_path} ({result.seconds:.2f}s)")
+        if profile and result.report is not None:
+            print(result.report.format())
+    else:
+        print(f"FAILED  {result.json_path}: {result.message}", file=sys.stderr)
+
+
+def run_convert(args):
+    from app.core.batch_converter import convert_batch
+
+    files = expand_inputs(args.inputs)
+    if not files:
+        print("Error: No JSON files found in the given inputs", file=sys.stderr)
+        return 2
+
+    cache = None
+    if args.cache or args.cache_dir:
+        from app.core.conversion_cache import ConversionCache
+        cache = ConversionCache(args.cache_dir, max_bytes=args.cache_size * 1024 * 1024)
+
+    results = convert_batch(
+        files,
+        output_dir=args.output_dir,
+        return_type=args.type,
+        max_workers=args.jobs,
+        stream=args.stream,
+        output_format=args.format,
+        cache=cache,
+        section_workers=args.section_workers,
+        profile=args.profile,
+        trace_memory=args.trace_memory,
+        profile_log=args.profile_log,
+        summaries=args.summaries,
+        validate=args.validate,
+        amendments=args.amendments,
+        progress_callback=lambda result: _print_result(result, args.quiet, args.profile or args.trace_memory),
+    )
+
+    failed = sum(1 for result in results if not result.success)
+    if not args.quiet:
+        print(f"Converted {len(results) - failed} of {len(results)} file(s)")
+        if cache is not None:
+            stats = cache.stats()
+            print(f"Cache: {stats.hits} hit(s), {stats.misses} miss(es), {stats.evictions} eviction(s), "
+                  f"{stats.entries} entries using {stats.total_bytes / (1024 * 1024):.1f} MB")
+    return 1 if failed else 0
+
+
+def run_consolidate(args):
+    from app.core.consolidator import consolidate_returns
+
+    files = expand_inputs(args.inputs)
+    if not files:
+        print("Error: No JSON files found in the given inputs", file=sys.stderr)
+        return 2
+
+    def report(result):
+        if not result.success:
+            print(f"FAILED  {result.json_path}: {result.message}", file=sys.stderr)
+        elif not args.quiet:
+            print(f"OK      {result.json_path} ({result.gstin} {result.fp}): {result.rows} rows "
+                  f"({result.seconds:.2f}s)")
+
+    try:
+        results = consolidate_returns(
+            files,
+            args.output,
+            return_type=args.type,
+            output_format=args.format,
+            max_workers=args.jobs,
+            progress_callback=report,
+            sort_by_period=not args.keep_order,
+        )
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    failed = sum(1 for result in results if not result.success)
+    if not args.quiet:
+        print(f"Consolidated {len(results) - failed} of {len(results)} file(s) into {args.output}")
+    return 1 if failed else 0
+
+
+def run_reconcile(args):
+    from app.core.reconciliation import reconcile_gstr2
+
+    success, message = reconcile_gstr2(args.gstr2, args.register, args.output, tolerance=args.tolerance,
+                                       output_format=args.format, sheet_name=args.sheet or 0)
+    if not success:
+        print(f"Error: {message}", file=sys.stderr)
+        return 1
+    if not args.quiet:
+        print(message)
+    return 0
+
+
+def run_watch(args):
+    from app.core.hot_folder import HotFolderWatcher
+
+    try:
+        watcher = HotFolderWatcher(
+            args.folder,
+            output_dir=args.output_dir,
+            return_type=args.type,
+            output_format=args.format,
+            max_workers=args.jobs,
+            settle_seconds=args.settle,
+            state_path=args.state,
+            use_inotify=not args.poll,
+            progress_callback=lambda result: _print_result(result, args.quiet),
+            summaries=args.summaries,
+            validate=args.validate,
+            amendments=args.amendments,
+        )
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    if not args.quiet:
+        print(f"Watching {watcher.folder} (Ctrl+C to stop)")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        if not args.quiet:
+            print("Stopped watching")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="turbo-gst",
+        description="Convert GSTR-1 and GSTR-2A/B JSON returns without the desktop app.",
+    )
+    parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    convert = subparsers.add_parser("convert", help="Convert return files, globs or folders")
+    convert.add_argument("inputs", nargs="+", help="JSON files, glob patterns or directories")
+    convert.add_argument("-o", "--output-dir", help="Directory for the output files (default: next to each input)")
+    convert.add_argument("-t", "--type", choices=RETURN_TYPES, default="auto",
+                         help="Return type; 'auto' detects it per file (default: auto)")
+    convert.add_argument("-f", "--format", choices=OUTPUT_FORMATS, default="xlsx",
+                         help="Output format; xlsx-split, csv, parquet and feather write a folder per return (default: xlsx)")
+    convert.add_argument("-j", "--jobs", type=int, default=None,
+                         help="Number of worker processes (default: one per CPU; 1 converts in-process)")
+    convert.add_argument("--section-workers", type=int, default=None, metavar="N",
+                         help="Process the sections of each file on N processes; best combined with -j 1")
+    convert.add_argument("--stream", action="store_true", help="Read returns one section at a time to cap memory")
+    convert.add_argument("--summaries", action="store_true",
+                         help="Add rate, POS, counterparty and month summaries and a totals check to each output")
+    convert.add_argument("--validate", action="store_true",
+                         help="Check invoice values, tax splits, duplicate numbers and HSN totals; "
+                              "list failures in an Exceptions sheet")
+    convert.add_argument("--amendments", action="store_true",
+                         help="Add net B2B and CDN sheets with amended documents replaced by their amendments")
+    convert.add_argument("--cache", action="store_true",
+                         help="Reuse outputs of identical earlier conversions from the per-user cache")
+    convert.add_argument("--cache-dir", help="Use this cache directory (implies --cache)")
+    convert.add_argument("--cache-size", type=int, default=2048, metavar="MB",
+                         help="Cache size cap; least recently used outputs are evicted (default: 2048)")
+    convert.add_argument("--profile", action="store_true",
+                         help="Print the time and rows of every stage and section of each conversion")
+    convert.add_argument("--trace-memory", action="store_true",
+                         help="Also measure the peak memory of every stage (slower; implies --profile)")
+    convert.add_argument("--profile-log", metavar="FILE",
+                         help="Append per-stage timings of every conversion to FILE as JSON lines")
+    convert.add_argument("-q", "--quiet", action="store_true", help="Only report failures")
+    convert.set_defaults(handler=run_convert)
+
+    consolidate = subparsers.add_parser(
+        "consolidate", help="Merge many returns (e.g. a year of monthly files) into one output")
+    consolidate.add_argument("inputs", nargs="+", help="JSON files, glob patterns or directories")
+    consolidate.add_argument("-o", "--output", required=True,
+                             help="Output workbook, or directory for xlsx-split, csv, parquet and feather")
+    consolidate.add_argument("-t", "--type", choices=RETURN_TYPES, default="auto",
+                             help="Return type; 'auto' detects it from the first file (default: auto)")
+    consolidate.add_argument("-f", "--format", choices=OUTPUT_FORMATS, default="xlsx",
+                             help="Output format (default: xlsx)")
+    consolidate.add_argument("-j", "--jobs", type=int, default=None,
+                             help="Number of worker processes (default: one per CPU; 1 works in-process)")
+    consolidate.add_argument("--keep-order", action="store_true",
+                             help="Append returns in the order given instead of by return period")
+    consolidate.add_argument("-q", "--quiet", action="store_true", help="Only report failures")
+    consolidate.set_defaults(handler=run_consolidate)
+
+    reconcile = subparsers.add_parser("reconcile", help="Match a GSTR-2A/2B return against a purchase register")
+    reconcile.add_argument("gstr2", help="GSTR-2A/2B JSON file")
+    reconcile.add_argument("register", help="Purchase register (.csv, .xlsx or .xls)")
+    reconcile.add_argument("-o", "--output", required=True,
+                           help="Reconciliation workbook, or directory for xlsx-split, csv, parquet and feather")
+    reconcile.add_argument("-f", "--format", choices=OUTPUT_FORMATS, default="xlsx",
+                           help="Output format (default: xlsx)")
+    reconcile.add_argument("--sheet", help="Sheet of an Excel register (default: the first)")
+    reconcile.add_argument("--tolerance", type=float, default=1.0, metavar="RUPEES",
+                           help="Largest taxable value or tax difference still counted as matched (default: 1.0)")
+    reconcile.add_argument("-q", "--quiet", action="store_true", help="Only report failures")
+    reconcile.set_defaults(handler=run_reconcile)
+
+    watch = subparsers.add_parser("watch", help="Convert returns as they are dropped into a folder")
+    watch.add_argument("folder", help="Folder to watch; only the files directly inside it are converted")
+    watch.add_argument("-o", "--output-dir", help="Directory for the output files (default: the watched folder)")
+    watch.add_argument("-t", "--type", choices=RETURN_TYPES, default="auto",
+                       help="Return type; 'auto' detects it per file (default: auto)")
+    watch.add_argument("-f", "--format", choices=OUTPUT_FORMATS, default="xlsx",
+                       help="Output format (default: xlsx)")
+    watch.add_argument("-j", "--jobs", type=int, default=None,
+                       help="Number of worker processes (default: one per CPU)")
+    watch.add_argument("--settle", type=float, default=1.0, metavar="SECONDS",
+                       help="Convert a file once it has not changed for this long (default: 1.0)")
+    watch.add_argument("--state", metavar="FILE",
+                       help="File recording what was converted (default: .turbo_gst_watch.json in the output dir)")
+    watch.add_argument("--poll", action="store_true",
+                       help="Poll the folder instead of using inotify, e.g. for network shares")
+    watch.add_argument("--summaries", action="store_true",
+                       help="Add rate, POS, counterparty and month summaries and a totals check to each output")
+    watch.add_argument("--validate", action="store_true",
+                       help="Check each return and list failures in an Exceptions sheet")
+    watch.add_argument("--amendments", action="store_true",
+                       help="Add net B2B and CDN sheets with amended documents replaced by their amendments")
+    watch.add_argument("-q", "--quiet", action="store_true", help="Only report failures")
+    watch.set_defaults(handler=run_watch)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if getattr(args, "jobs", None) is not None and args.jobs < 1:
+        print("Error: --jobs must be at least 1", file=sys.stderr)
+        return 2
+    if getattr(args, "section_workers", None) is not None and args.section_workers < 1:
+        print("Error: --section-workers must be at least 1", file=sys.stderr)
+        return 2
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
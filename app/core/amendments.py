@@ -0,0 +1,189 @@
+import numpy as np
+import pandas as pd
+
+from app.core.common_processors import GST_DATE_FORMAT, compact_dtypes, parse_dates
+
+# --- Constants ---
+# Roles an "amends" config maps to columns; the original section uses the same
+# columns for counterparty, number and date
+AMENDMENT_ROLES = ("counterparty", "number", "date", "original_number", "original_date")
+# Amendments of amendments are followed back at most this many steps
+MAX_CHAIN_LENGTH = 32
+SOURCE_COLUMN = "Source"
+TRAIL_COLUMN = "Amendment Trail"
+NET_KEY_SUFFIX = "_net"
+NOT_IN_RETURN = " (original not in this return)"
+
+_KEY = ["_counterparty", "_number", "_date"]
+_ORIGINAL = ["_original_number", "_original_date"]
+
+
+def validate_amendment_config(key, config):
+    """
+    Returns the problem with a section's "amends" config, or None if it is valid.
+    """
+    if not isinstance(config, dict):
+        return f"Section '{key}' has an amends that is not an object"
+    if not isinstance(config.get("section"), str) or not config["section"]:
+        return f"Section '{key}' amends no section"
+    if not isinstance(config.get("sheet_name"), str) or not config["sheet_name"]:
+        return f"Section '{key}' has no sheet_name for the net view of its amendments"
+    columns = config.get("columns")
+    if not isinstance(columns, dict) or set(columns) != set(AMENDMENT_ROLES):
+        return f"Section '{key}' must map exactly the amendment roles {list(AMENDMENT_ROLES)}"
+    return None
+
+
+def _keys(df, columns, number_role, date_role):
+    """Document keys (counterparty, number, date) of every row, numbers as text."""
+    dates = df[columns[date_role]]
+    return pd.DataFrame({
+        "_counterparty": df[columns["counterparty"]].astype(str),
+        "_number": df[columns[number_role]].astype(str),
+        # Already parsed when the section declares date_formats
+        "_date": parse_dates(dates, GST_DATE_FORMAT),
+    }, index=df.index)
+
+
+def _isin(keys, others):
+    """Boolean array: which rows of `keys` appear among the rows of `others` (same columns)."""
+    hits = keys.merge(others.drop_duplicates().assign(_hit=True), on=list(keys.columns), how="left")
+    return hits["_hit"].notna().to_numpy()
+
+
+def _labels(numbers, dates):
+    """'INV-1 (01-03-2024)' labels of documents for the trail."""
+    # Formatted once per distinct date; a return only spans a few dozen
+    codes, uniques = pd.factorize(dates)
+    texts = np.append(pd.DatetimeIndex(uniques).strftime(GST_DATE_FORMAT).to_numpy(dtype=object), "no date")
+    return numbers.astype(str) + " (" + pd.Series(texts[codes], index=dates.index) + ")"
+
+
+def resolve_amendments(originals, amendments, columns, sources=("Original", "Amendment")):
+    """
+    Applies the amendments of a return to its original documents and
+    returns the net rows: originals nobody amended, followed by the latest
+    amendment of every amended document.
+
+    Documents are keyed by (counterparty, number, date). Amendments name
+    the document they replace by its original number and date; when that is
+    itself an amendment, the chain is followed back to the document first
+    filed. Every step is a hash merge on the document keys, so the work
+    grows linearly with the number of rows. When a document was amended
+    more than once, the amendment listed last wins.
+
+    Args:
+        originals (pd.DataFrame): Rows of the original section, or None.
+        amendments (pd.DataFrame): Rows of the amendment section.
+        columns (dict): AMENDMENT_ROLES -> columns, see `validate_amendment_config`.
+        sources (tuple, optional): Values of the SOURCE_COLUMN for original and amendment rows.
+
+    Returns:
+        pd.DataFrame: The net rows in the columns of `originals` (else of the
+            amendments, without the original number and date), plus
+            SOURCE_COLUMN and TRAIL_COLUMN. The trail lists the documents an
+            amendment replaced, e.g. "INV-1 (01-03-2024) -> INV-1A (05-03-2024)".
+    """
+    replaced = _keys(amendments, columns, "original_number", "original_date")
+    rows = _keys(amendments, columns, "number", "date").assign(
+        _original_number=replaced["_number"], _original_date=replaced["_date"]).reset_index(drop=True)
+    # One entry per amending document, where its last row is
+    documents = rows.drop_duplicates(keep="last").reset_index(drop=True)
+    trail = _labels(documents["_original_number"], documents["_original_date"]) + " -> " + _labels(
+        documents["_number"], documents["_date"])
+
+    # Walk every amendment back to the document first filed. Amendments that keep
+    # the number and date replace their document without extending a chain.
+    replaced = documents[["_counterparty"] + _ORIGINAL].set_axis(_KEY, axis=1)
+    in_place = ((documents["_number"] == documents["_original_number"])
+                & (documents["_date"] == documents["_original_date"])).to_numpy()
+    lookup = documents[~in_place].drop_duplicates(_KEY, keep="last")[_KEY + _ORIGINAL].copy()
+    lookup["_label"] = _labels(lookup["_original_number"], lookup["_original_date"])
+    root = replaced.copy()
+    for _ in range(MAX_CHAIN_LENGTH):
+        step = root.merge(lookup, on=_KEY, how="left", indicator=True)
+        found = (step["_merge"] == "both").to_numpy()
+        if not found.any():
+            break
+        trail[found] = step["_label"][found] + " -> " + trail[found]
+        root.loc[found, "_number"] = step.loc[found, "_original_number"]
+        root.loc[found, "_date"] = step.loc[found, "_original_date"]
+
+    # Only amendments that were not amended again survive, the last one per first document
+    latest = ~_isin(documents[_KEY], replaced[~in_place])
+    kept = documents.assign(_trail=trail, _root_number=root["_number"], _root_date=root["_date"])[latest]
+    kept = kept.drop_duplicates(["_counterparty", "_root_number", "_root_date"], keep="last")
+
+    if originals is not None and not originals.empty:
+        original_keys = _keys(originals, columns, "number", "date")
+        unchanged = originals[~_isin(original_keys, root)]
+        known = _isin(kept[["_counterparty", "_root_number", "_root_date"]].set_axis(_KEY, axis=1), original_keys)
+        output_columns = list(originals.columns)
+    else:
+        unchanged = None
+        known = False
+        output_columns = [column for column in amendments.columns
+                          if column not in (columns["original_number"], columns["original_date"])]
+    kept["_trail"] = kept["_trail"].where(known, kept["_trail"] + NOT_IN_RETURN)
+
+    # Back from documents to their item rows, in amendment order
+    hits = rows.assign(_position=np.arange(len(rows))).merge(
+        kept[_KEY + _ORIGINAL + ["_trail"]], on=_KEY + _ORIGINAL, how="inner")
+    amended = amendments.iloc[hits["_position"].to_numpy()].reindex(columns=output_columns)
+    amended[SOURCE_COLUMN] = sources[1]
+    amended[TRAIL_COLUMN] = hits["_trail"].to_numpy()
+
+    frames = [amended]
+    if unchanged is not None:
+        unchanged = unchanged.assign(**{SOURCE_COLUMN: sources[0], TRAIL_COLUMN: ""})
+        frames.insert(0, unchanged)
+    return pd.concat(frames, ignore_index=True)
+
+
+class AmendmentResolver:
+    """
+    Builds the net view of sections that are amended by others, e.g. GSTR-2
+    b2b by b2ba: the original documents with every amended one replaced by
+    its latest amendment (see `resolve_amendments`).
+
+    The amendment section's config says which section it amends, in an
+    "amends" entry with the sheet name of the net view and its column roles.
+    Both sections are kept until the return has been read, since they may
+    come in either order; other sections are not kept.
+    """
+
+    # Profiler stage of the per-section work
+    stage_name = "amendments"
+
+    def __init__(self):
+        self._originals = {}
+        self._amendments = {}
+
+    def add(self, section, df, basic_info=None):
+        """Keeps the frame of an amended or amending section (a SectionPlan and its frame)."""
+        if df.empty:
+            return
+        if section.amended_by:
+            self._originals[section.key] = (section, df)
+        if section.amends:
+            self._amendments[section.amends["section"]] = (section, df)
+
+    def sections(self, basic_info=None):
+        """
+        Returns a net view as (key, sheet name, DataFrame) for every amended
+        section that had amendments, keyed "<section>_net".
+        """
+        result = []
+        for key, (amending, amendments) in self._amendments.items():
+            config = amending.amends
+            original, originals = self._originals.get(key, (None, None))
+            missing = [column for column in config["columns"].values() if column not in amendments.columns]
+            if missing:
+                print(f"Warning: Section '{amending.key}' has no columns {missing}; its amendments are not resolved")
+                continue
+            net = resolve_amendments(originals, amendments, config["columns"],
+                                     sources=(original.sheet_name if original else key, amending.sheet_name))
+            if original is not None and original.dtypes:
+                net = compact_dtypes(net, original.dtypes)
+            result.append((key + NET_KEY_SUFFIX, config["sheet_name"], net))
+        return result
@@ -0,0 +1,279 @@
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import NamedTuple
+
+from app.core.common_processors import process_drop
+from app.core.json_sources import is_json_source, source_location
+from app.core.gstr1_converter import convert_gstr1_to_excel
+from app.core.gstr2_converter import convert_gstr2_to_excel
+from app.core.output_sinks import OUTPUT_FORMATS, output_extension
+from app.core.return_type import detect_return_type
+from app.utils.logger import Profiler
+
+# --- Converter Mapping ---
+# Maps return types to their conversion functions
+CONVERTER_MAP = {
+    "gstr1": convert_gstr1_to_excel,
+    "gstr2": convert_gstr2_to_excel,
+}
+
+OUTPUT_EXTENSION = ".xlsx"
+CANCEL_POLL_SECONDS = 0.2
+
+
+class BatchResult(NamedTuple):
+    """Outcome of converting a single file in a batch."""
+    json_path: str
+    output_path: str
+    success: bool
+    message: str
+    seconds: float
+    cached: bool = False
+    # ConversionReport of the run when profiling was requested
+    report: object = None
+
+
+def _convert_one(return_type, json_path, output_path, stream, output_format="xlsx", section_workers=None,
+                 profile=False, trace_memory=False, profile_log=None, summaries=False, validate=False,
+                 amendments=False):
+    """
+    Worker entry point. Runs one conversion and never raises, so a bad file
+    only affects its own result.
+    """
+    start = time.perf_counter()
+    report = None
+    try:
+        if return_type == "auto":
+            return_type = detect_return_type(json_path)
+        if return_type is None:
+            return BatchResult(json_path, output_path, False,
+                               f"Could not detect the return type of {json_path}", time.perf_counter() - start)
+        profiler = None
+        if profile or trace_memory or profile_log:
+            profiler = Profiler(trace_memory, jsonl_path=profile_log,
+                                context={"json_path": json_path, "return_type": return_type})
+        result = CONVERTER_MAP[return_type](json_path, output_path, stream=stream,
+                                           output_format=output_format,
+                                           section_workers=section_workers, profiler=profiler,
+                                           summaries=summaries, validate=validate,
+                                           amendments=amendments)
+        success, message = result
+        report = getattr(result, "report", None)
+    except Exception as e:
+        success, message = False, f"Unexpected error converting {json_path}: {e}"
+    return BatchResult(json_path, output_path, success, message, time.perf_counter() - start, report=report)
+
+
+def build_output_paths(files, output_dir=None, extension=OUTPUT_EXTENSION):
+    """
+    Maps each input file to an output path. Files are written next to their
+    input unless `output_dir` is given; clashing names get a numeric suffix.
+    """
+    output_paths = []
+    taken = set()
+    for json_path in files:
+        # Outputs of archive members go next to the archive
+        directory, stem = source_location(json_path)
+        directory = output_dir or directory
+        candidate = os.path.join(directory, stem + extension)
+        counter = 1
+        while os.path.normcase(candidate) in taken:
+            counter += 1
+            candidate = os.path.join(directory, f"{stem} ({counter}){extension}")
+        taken.add(os.path.normcase(candidate))
+        output_paths.append(candidate)
+    return output_paths
+
+
+def convert_batch(files, output_dir=None, return_type="gstr1", max_workers=None,
+                  max_in_flight=None, stream=False, progress_callback=None,
+                  should_cancel=None, mp_context=None, output_format="xlsx", cache=None,
+                  section_workers=None, profile=False, trace_memory=False, profile_log=None, summaries=False,
+                  validate=False, amendments=False):
+    """
+    Converts many return files in parallel on a process pool.
+
+    Args:
+        files (list): Input JSON paths, typically the result of `process_drop`.
+        output_dir (str, optional): Directory for the outputs. Defaults to None (next to each input).
+        return_type (str, optional): Key into CONVERTER_MAP, or "auto" to detect it per file.
+            Defaults to "gstr1".
+        max_workers (int, optional): Pool size. Defaults to None (one per CPU). 1 runs in-process.
+        max_in_flight (int, optional): Upper bound on submitted but unfinished files, which
+            caps memory. Defaults to None (twice the pool size).
+        stream (bool, optional): Use the streaming ingest mode of the converters.
+        progress_callback (callable, optional): Called with each BatchResult as it completes.
+        should_cancel (callable, optional): Polled between files; once it returns True no new
+            files are started and the remaining ones are reported as cancelled.
+        mp_context (optional): multiprocessing context for the pool, e.g. a "spawn"
+            context when called from a GUI process.
+        output_format (str, optional): One of OUTPUT_FORMATS. "xlsx" writes a workbook per file,
+            the columnar formats a directory per file. Defaults to "xlsx".
+        cache (ConversionCache, optional): Files whose bytes, config and options match an
+            earlier conversion are restored from it instead of being converted, and fresh
+            outputs are added to it. Defaults to None (no caching).
+        section_workers (int, optional): Build the sections of each file on this many
+            processes (see `convert_gstr1_to_excel`). Mostly useful with max_workers=1 for a
+            few very large returns. Defaults to None (sections one after another).
+        profile (bool, optional): Time every stage of each conversion; the ConversionReport
+            is attached to its BatchResult as `report`. Defaults to False.
+        trace_memory (bool, optional): Also record tracemalloc peaks per stage (implies profile).
+        profile_log (str, optional): Append the stage timings of every file as JSON lines to
+            this path (implies profile). Safe to share between worker processes.
+        summaries (bool, optional): Add the summary and totals check sheets to every output
+            (see `convert_gstr1_to_excel`). Defaults to False.
+        validate (bool, optional): Check every output's sections and list what fails in an
+            "Exceptions" sheet. Defaults to False.
+        amendments (bool, optional): Add the net sheets of amended sections (see
+            `convert_gstr2_to_excel`). Defaults to False.
+
+    Returns:
+        list: One BatchResult per input file, in input order.
+    """
+    if return_type != "auto" and return_type not in CONVERTER_MAP:
+        raise ValueError(f"Unknown return type '{return_type}'")
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format '{output_format}'")
+
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    jobs = list(zip(files, build_output_paths(files, output_dir, output_extension(output_format))))
+    results = [None] * len(jobs)
+    # Cache keys of jobs that missed; their outputs are stored once they succeed
+    cache_keys = {}
+
+    def record(index, result):
+        key = cache_keys.pop(index, None)
+        if key is not None and result.success and not result.cached:
+            try:
+                cache.store(key, result.output_path)
+            except (OSError, ValueError) as e:
+                print(f"Warning: Could not cache {result.output_path}. Error: {e}")
+        results[index] = result
+        if progress_callback:
+            progress_callback(result)
+
+    def resolve(index):
+        """
+        Returns the return type to convert job `index` as, or None once the
+        job has been answered from the cache.
+        """
+        json_path, output_path = jobs[index]
+        if cache is None:
+            return return_type
+        start = time.perf_counter()
+        job_type = return_type
+        try:
+            if job_type == "auto":
+                # Detected here once, since the key depends on the config in use
+                job_type = detect_return_type(json_path)
+                if job_type is None:
+                    return "auto"
+            key = cache.make_key(json_path, job_type, output_format, stream, summaries, validate,
+                                     amendments)
+        except OSError:
+            # Unreadable inputs are converted normally, which reports the error
+            return job_type
+        if cache.restore(key, output_path):
+            record(index, BatchResult(json_path, output_path, True,
+                                      f"Restored {output_path} from the conversion cache",
+                                      time.perf_counter() - start, cached=True))
+            return None
+        cache_keys[index] = key
+        return job_type
+
+    def cancelled():
+        return should_cancel is not None and should_cancel()
+
+    def record_cancelled(index):
+        json_path, output_path = jobs[index]
+        record(index, BatchResult(json_path, output_path, False, f"Conversion of {json_path} was cancelled", 0.0))
+
+    if not jobs:
+        return results
+
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1:
+        for index, (json_path, output_path) in enumerate(jobs):
+            if cancelled():
+                record_cancelled(index)
+                continue
+            job_type = resolve(index)
+            if job_type is not None:
+                record(index, _convert_one(job_type, json_path, output_path, stream, output_format,
+                                          section_workers, profile, trace_memory, profile_log, summaries,
+                                          validate, amendments))
+        return results
+
+    max_workers = min(max_workers, len(jobs))
+    max_in_flight = max(max_in_flight or 2 * max_workers, 1)
+    pending = iter(enumerate(jobs))
+    in_flight = {}
+    executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context)
+    try:
+        while True:
+            if cancelled():
+                # Drop queued work; files already running are allowed to finish
+                for index, _ in pending:
+                    record_cancelled(index)
+                for future in list(in_flight):
+                    if future.cancel():
+                        record_cancelled(in_flight.pop(future))
+
+            # Keep the pool fed without queueing the whole batch at once
+            while len(in_flight) < max_in_flight:
+                next_job = next(pending, None)
+                if next_job is None:
+                    break
+                index, (json_path, output_path) = next_job
+                job_type = resolve(index)
+                if job_type is None:
+                    continue
+                future = executor.submit(_convert_one, job_type, json_path, output_path, stream, output_format,
+                                         section_workers, profile, trace_memory, profile_log, summaries,
+                                         validate, amendments)
+                in_flight[future] = index
+            if not in_flight:
+                break
+
+            # Time out periodically so cancellation is noticed while files are running
+            done, _ = wait(in_flight, timeout=CANCEL_POLL_SECONDS, return_when=FIRST_COMPLETED)
+            broken = False
+            for future in done:
+                index = in_flight.pop(future)
+                json_path, output_path = jobs[index]
+                try:
+                    record(index, future.result())
+                except BrokenProcessPool as e:
+                    broken = True
+                    record(index, BatchResult(json_path, output_path, False,
+                                              f"Worker process crashed while converting {json_path}: {e}", 0.0))
+                except Exception as e:
+                    record(index, BatchResult(json_path, output_path, False,
+                                              f"Unexpected error converting {json_path}: {e}", 0.0))
+
+            if broken:
+                # A crashed worker poisons the pool; fail what it held and start a fresh one
+                for future, index in in_flight.items():
+                    json_path, output_path = jobs[index]
+                    record(index, BatchResult(json_path, output_path, False,
+                                              f"Worker process crashed while converting {json_path}", 0.0))
+                in_flight.clear()
+                executor.shutdown(wait=False, cancel_futures=True)
+                executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    return results
+
+
+def convert_drop(items, **kwargs):
+    """
+    Expands dropped files and folders with `process_drop` and converts every
+    JSON file found. Keyword arguments are passed on to `convert_batch`.
+    """
+    files = [path for path in process_drop(items) if is_json_source(path)]
+    return convert_batch(files, **kwargs)
@@ -1,6 +1,10 @@
 import pandas as pd
+import numpy as np
 import json
 import os
+import zipfile
+from app.core.excel_writer import StreamingExcelWriter
+from app.core.json_sources import is_json_source, list_json_sources, open_json_source, split_archive_path
 
 # --- Generic Processors ---
 def json_normalize_with_meta(json_data: dict, record_path: list, meta: list) -> pd.DataFrame:
@@ -9,6 +13,107 @@ def json_normalize_with_meta(json_data: dict, record_path: list, meta: list) ->
     """
     return pd.json_normalize(json_data, record_path=record_path, meta=meta)
 
+_MISSING = object()
+
+def build_record_path_columns(meta: list, rename_dict: dict, new_order: list) -> list:
+    """
+    Resolves which fields `normalize_record_path` has to extract.
+
+    Works out, for every column of `new_order`, the meta or record field
+    that `rename_dict` renames into it (or the field of the same name).
+    Columns whose field is renamed to something else are left out.
+
+    Returns:
+        list: (column name, meta level or None for record fields, key path) tuples.
+    """
+    meta_fields = {}
+    for field in meta:
+        path = [field] if isinstance(field, str) else list(field)
+        meta_fields[".".join(path)] = (len(path) - 1, (path[-1],))
+
+    source_by_column = {}
+    for source, column in rename_dict.items():
+        source_by_column.setdefault(column, source)
+
+    columns = []
+    for column in new_order:
+        source = source_by_column.get(column)
+        if source is None:
+            if column in rename_dict:
+                # The field of that name is renamed to something else
+                continue
+            source = column
+        if source in meta_fields:
+            level, key_path = meta_fields[source]
+            columns.append((column, level, key_path))
+        else:
+            columns.append((column, None, tuple(source.split("."))))
+    return columns
+
+def _pull_column(objects, key_path):
+    """Extracts a (possibly nested) field from each object, using _MISSING where absent."""
+    values = objects
+    for key in key_path:
+        values = [value.get(key, _MISSING) if isinstance(value, dict) else _MISSING for value in values]
+    return values
+
+def normalize_record_path(json_data, record_path: list, columns: list) -> pd.DataFrame:
+    """
+    Normalizes a section along `record_path`, one row per record with the
+    requested meta fields of its ancestors, for sections whose config
+    renames and orders its columns.
+
+    Walks `record_path` once, keeping only parent indices, and extracts just
+    the columns resolved by `build_record_path_columns`, already named and in
+    order. A missing meta field comes out as NaN and a missing record list
+    as no rows. A record field missing from every record is left out, like
+    a column `safe_reorder` does not find.
+
+    Args:
+        json_data (list | dict): The section data (e.g., data['b2b']).
+        record_path (list): Keys leading from the section to the records (e.g., ['inv', 'itms']).
+        columns (list): Output of `build_record_path_columns`.
+
+    Returns:
+        pd.DataFrame: One row per record, with the requested columns.
+    """
+    levels = [json_data if isinstance(json_data, list) else [json_data]]
+    # parents[i][j] is the index, in levels[i], of the parent of levels[i + 1][j]
+    parents = []
+    for key in record_path:
+        children = []
+        counts = []
+        for obj in levels[-1]:
+            records = obj.get(key) or []
+            children.extend(records)
+            counts.append(len(records))
+        parents.append(np.repeat(np.arange(len(counts)), counts))
+        levels.append(children)
+
+    records = levels[-1]
+    ancestors = {len(record_path): None}
+    index = np.arange(len(records))
+    for level in range(len(record_path) - 1, -1, -1):
+        index = parents[level][index]
+        ancestors[level] = index
+
+    data = {}
+    for column, level, key_path in columns:
+        if level is not None:
+            # Like json_normalize, meta fields are present whenever there are record lists
+            if not levels[-2]:
+                continue
+            values = _pull_column(levels[level], key_path)
+            values = np.fromiter((np.nan if value is _MISSING else value for value in values),
+                                 dtype=object, count=len(values))
+            data[column] = values if ancestors[level] is None else values[ancestors[level]]
+        else:
+            values = _pull_column(records, key_path)
+            if any(value is not _MISSING for value in values):
+                data[column] = [np.nan if value is _MISSING else value for value in values]
+
+    return pd.DataFrame(data, index=pd.RangeIndex(len(records)), columns=list(data))
+
 def safe_reorder(df: pd.DataFrame, rename_dict: dict, new_order: list) -> pd.DataFrame:
     """
     Safely reorders the columns of a DataFrame after renaming them.
@@ -56,9 +161,41 @@ def split_nested_and_non_nested_keys(json_data: dict) -> tuple:
             non_nested_keys.append(key)
     return nested_keys, non_nested_keys
 
+# --- Dates ---
+# Dates in GST returns are always written dd-mm-yyyy
+GST_DATE_FORMAT = "%d-%m-%Y"
+
+def parse_dates(series: pd.Series, date_format: str = None, errors: str = 'coerce') -> pd.Series:
+    """
+    Parses a column of date strings into datetime64 values.
+
+    A return holds a few dozen distinct dates spread over all of its rows, so
+    every distinct value is parsed once and the results are mapped back onto
+    the rows by their factorized codes. Columns that already hold datetimes
+    are returned as they are.
+
+    Args:
+        series (pd.Series): The date strings; categoricals are parsed per category.
+        date_format (str, optional): strptime format of the dates. Defaults to None (let pandas infer).
+        errors (str, optional): How to handle errors. 'coerce' will set invalid parsing as NaT. Defaults to 'coerce'.
+
+    Returns:
+        pd.Series: The parsed dates, with the index and name of `series`.
+    """
+    if series.dtype.kind == 'M':
+        return series
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+    else:
+        codes, uniques = pd.factorize(series)
+    parsed = pd.to_datetime(pd.Index(uniques, dtype=object), format=date_format, errors=errors).to_numpy()
+    # Code -1 (missing) picks the trailing NaT
+    parsed = np.append(parsed, np.array(['NaT'], dtype=parsed.dtype))
+    return pd.Series(parsed[codes], index=series.index, name=series.name)
+
 def convert_column_to_date(df: pd.DataFrame, column_name : str = "Date", date_format: str = None, errors: str = 'coerce') -> pd.DataFrame:
     """
-    Converts a DataFrame column to datetime dtype.
+    Converts a DataFrame column to datetime dtype with `parse_dates`.
 
     Args:
         df (pd.DataFrame): The DataFrame containing the column.
@@ -70,42 +207,123 @@ def convert_column_to_date(df: pd.DataFrame, column_name : str = "Date", date_fo
         pd.DataFrame: The DataFrame with the column converted to datetime.
     """
     if column_name in df.columns:
-        df[column_name] = pd.to_datetime(df[column_name], format=date_format, errors=errors)
+        df[column_name] = parse_dates(df[column_name], date_format, errors)
+    return df
+
+def convert_date_columns(df: pd.DataFrame, date_formats: dict) -> pd.DataFrame:
+    """
+    Converts every column named in `date_formats` (column -> strptime format,
+    e.g. {"date": GST_DATE_FORMAT}) to datetime dtype. Columns missing from
+    the frame are ignored.
+    """
+    for column_name, date_format in date_formats.items():
+        df = convert_column_to_date(df, column_name, date_format)
+    return df
+
+# --- Dtype Compaction ---
+# A column becomes categorical only if it has at most this many unique values per row
+CATEGORY_MAX_RATIO = 0.5
+
+def _to_category(series: pd.Series) -> pd.Series:
+    """Low-cardinality codes (GSTINs, places of supply, rates, flags) as categoricals."""
+    if series.dtype.kind == 'M' or isinstance(series.dtype, pd.CategoricalDtype) or not len(series):
+        return series
+    if series.nunique(dropna=True) > len(series) * CATEGORY_MAX_RATIO:
+        return series
+    return series.astype('category')
+
+def _to_smallest_integer(series: pd.Series) -> pd.Series:
+    """
+    Count columns (e.g. item numbers): integers are stored in the narrowest
+    type that holds them. Amounts are not declared; they stay float64, since
+    any narrower float would change amounts with paise.
+    """
+    if series.dtype.kind in 'iu':
+        return pd.to_numeric(series, downcast='integer')
+    return series
+
+def _to_date(series: pd.Series) -> pd.Series:
+    """
+    Date strings as fixed-width datetime64 values, like `convert_column_to_date`.
+    Sections should rather declare their formats in "date_formats".
+    """
+    return parse_dates(series)
+
+# Maps the dtype names allowed in a section's "dtypes" config to their converters
+DTYPE_COMPACTORS = {
+    "category": _to_category,
+    "int": _to_smallest_integer,
+    "date": _to_date,
+}
+
+def compact_dtypes(df: pd.DataFrame, dtypes: dict) -> pd.DataFrame:
+    """
+    Converts the columns named in `dtypes` to compact dtypes without changing
+    the values they hold. Columns missing from the frame are ignored.
+
+    Args:
+        df (pd.DataFrame): The section DataFrame.
+        dtypes (dict): Column name -> one of DTYPE_COMPACTORS (e.g. {"GSTIN": "category"}).
+
+    Returns:
+        pd.DataFrame: The DataFrame with the columns converted.
+    """
+    for column, dtype in dtypes.items():
+        if column in df.columns:
+            df[column] = DTYPE_COMPACTORS[dtype](df[column])
     return df
 
 # json loader function from json path
 def load_json_from_path(json_path: str) -> dict:
     """
-    Loads a JSON file from the given path.
+    Loads a JSON file from the given path. Gzipped files and members of ZIP
+    archives (see `process_drop`) are decompressed while they are parsed.
     """
 
-    if not json_path.lower().endswith('.json'):
+    if not is_json_source(json_path):
         print(f"Error in load_json_from_path: The file '{json_path}' is not a JSON file.")
         return None
     try:
-        with open(json_path, 'r') as file:
+        with open_json_source(json_path) as file:
             return json.load(file)
     except Exception as e:
         print(f"Error in load_json_from_path: {e}")
         return None
 
-def process_drop(items: list) -> list:
+def _expand_archive(path: str, final_files: list, expand_archives: bool):
+    if not expand_archives:
+        final_files.append(path)
+        return
+    try:
+        final_files.extend(list_json_sources(path))
+    except (OSError, zipfile.BadZipFile) as e:
+        print(f"Skipping unreadable archive {path}: {e}")
+
+def process_drop(items: list, expand_archives: bool = True) -> list:
     """
     items: list of dropped paths (files or directories)
+
+    ZIP archives are expanded into one path per JSON file inside them (see
+    `app.core.json_sources.member_path`), so that every return in an archive
+    becomes a job of its own; nothing is extracted. Pass expand_archives=False
+    to get the archives themselves.
     """
     final_files = []
 
     for path in items:
         if os.path.isfile(path):
             # Single file
-            final_files.append(path)
+            _expand_archive(path, final_files, expand_archives)
 
         elif os.path.isdir(path):
             # Only files directly inside the folder
             for f in os.listdir(path):
                 full_path = os.path.join(path, f)
                 if os.path.isfile(full_path):
-                    final_files.append(full_path)
+                    _expand_archive(full_path, final_files, expand_archives)
+        elif split_archive_path(path)[1] is not None:
+            # A file inside an archive, named directly
+            final_files.append(path)
         else:
             print(f"Skipping unknown path: {path}")
 
@@ -116,12 +334,19 @@ def write_df_to_excel(df, excel_path, sheet_name='Sheet1', index=False, headers
 
     Args:
         df (pd.DataFrame): The DataFrame to write.
-        excel_path (str): The path to the Excel file to create.
+        excel_path (str | StreamingExcelWriter): The path to the Excel file to create, or an
+            open writer so that several sheets end up in the same workbook.
         sheet_name (str, optional): The name of the sheet. Defaults to 'Sheet1'.
         index (bool, optional): Whether to write row indices. Defaults to False.
+        headers (bool, optional): Whether to write the column names. Defaults to True.
     """
-    with pd.ExcelWriter(excel_path, engine='xlsxwriter') as writer:
-        df.to_excel(writer, sheet_name=sheet_name, index=index, headers=headers, startrow=startrow, startcol=startcol)
+    if index:
+        df = df.reset_index()
+    if isinstance(excel_path, StreamingExcelWriter):
+        excel_path.write_dataframe(sheet_name, df, header=headers, startrow=startrow, startcol=startcol)
+        return
+    with StreamingExcelWriter(excel_path) as writer:
+        writer.write_dataframe(sheet_name, df, header=headers, startrow=startrow, startcol=startcol)
 
 def process_basic_info(data, excel_path):
     _ , non_nested_keys  = split_nested_and_non_nested_keys(data)
@@ -151,73 +376,88 @@ def process_section(data, section_config: dict, excel_path):
         sheet_name=section_config.get("sheet_name", "Sheet1")
     )
     
-# Deprecated functions below
-def process_invoice_items(items_list):
+# --- Flattening ---
+# Item columns of the flattener, with their itm_det source keys
+ITEM_COLUMNS = ('taxable_value', 'rate', 'igst', 'cgst', 'sgst', 'cess')
+ITEM_DETAIL_KEYS = ('txval', 'rt', 'iamt', 'camt', 'samt', 'csamt')
+
+# Stands in for the item of a record that has none, so that its item fields come out missing
+_NO_ITEM = {'num': np.nan, 'itm_det': dict.fromkeys(ITEM_DETAIL_KEYS, np.nan)}
+
+def flattened_columns(record_fields=None):
     """
-    A common utility to process the 'itms' list found in many GSTR sections.
-    It unnests the 'itm_det' dictionary.
-    
-    Args:
-        items_list (list): The list of item objects (e.g., invoice['itms']).
-        
-    Returns:
-        list: A list of dictionaries, where each dictionary is a flattened item.
-    """
-    processed_items = []
-    for item in items_list:
-        item_details = item.get('itm_det', {})
-        processed_item = {
-            'item_number': item.get('num'),
-            'taxable_value': item_details.get('txval', 0),
-            'rate': item_details.get('rt', 0),
-            'igst': item_details.get('iamt', 0),
-            'cgst': item_details.get('camt', 0),
-            'sgst': item_details.get('samt', 0),
-            'cess': item_details.get('csamt', 0)
-        }
-        processed_items.append(processed_item)
-    return processed_items
-
-def flatten_and_normalize_data(section_data, record_key, item_key='inv'):
+    Every column `flatten_and_normalize_columnar` can return for these
+    arguments, in order. A section leaves out the item columns when none of
+    its records has items.
+    """
+    return ['recipient_gstin', 'invoice_or_note_number', 'date', 'total_value',
+            *(record_fields or {}).values(), 'item_number', *ITEM_COLUMNS]
+
+def flatten_and_normalize_columnar(section_data, record_key, item_key='inv', record_fields=None):
     """
     A generic function to flatten nested invoice-like structures.
     Handles structures like b2b, cdnr, etc. where there's a list of
-    parties, and each party has a list of records (invoices/notes).
-    
+    parties, and each party has a list of records (invoices/notes). Every
+    item of a record becomes a row; a record without items gets one row
+    with the record's details only.
+
+    Parent record fields are collected once per record and repeated by each
+    record's item count, and every item column is built in a single pass over
+    the items, so no per-row dicts are copied.
+
     Args:
         section_data (list): The list of data for a whole section (e.g., data['b2b']).
         record_key (str): The key for the recipient's identifier (e.g., 'ctin').
         item_key (str): The key for the list of items (e.g., 'inv' for invoices, 'nt' for notes).
+        record_fields (dict, optional): Further record keys to keep, mapped to their column
+            names (e.g., {'ntty': 'note_type'}). They follow 'total_value'.
 
     Returns:
         pandas.DataFrame: A flattened and processed DataFrame for the section.
     """
-    all_records = []
+    record_fields = record_fields or {}
+    parties, numbers, dates, values, repeats = [], [], [], [], []
+    extras = {column: [] for column in record_fields.values()}
+    all_items = []
+    has_items = False
+
     for party in section_data:
         party_identifier = party.get(record_key)
         for record in party.get(item_key, []):
-            # Base details from the record
-            record_details = {
-                'recipient_gstin': party_identifier,
-                'invoice_or_note_number': record.get('inum') or record.get('nt_num'),
-                'date': record.get('idt') or record.get('nt_dt'),
-                'total_value': record.get('val'),
-            }
-            
-            # Process the nested items list
-            items = process_invoice_items(record.get('itms', []))
-            
-            # If there are multiple items, create a row for each.
-            # If there are no items, create one row with the main details.
+            parties.append(party_identifier)
+            numbers.append(record.get('inum') or record.get('nt_num'))
+            dates.append(record.get('idt') or record.get('nt_dt'))
+            values.append(record.get('val'))
+            for field, column in record_fields.items():
+                extras[column].append(record.get(field))
+
+            items = record.get('itms', [])
             if items:
-                for item in items:
-                    full_record = record_details.copy()
-                    full_record.update(item)
-                    all_records.append(full_record)
+                has_items = True
+                repeats.append(len(items))
+                all_items.extend(items)
             else:
-                all_records.append(record_details)
+                # A record without items still gets one row
+                repeats.append(1)
+                all_items.append(_NO_ITEM)
+
+    if not repeats:
+        return pd.DataFrame()
+
+    repeats = np.asarray(repeats)
+    columns = {}
+    for name, record_values in (('recipient_gstin', parties), ('invoice_or_note_number', numbers),
+                                ('date', dates), ('total_value', values), *extras.items()):
+        # Repeat as objects, then let the DataFrame constructor infer dtypes like it does for dicts
+        columns[name] = np.repeat(np.array(record_values, dtype=object), repeats).tolist()
+
+    if has_items:
+        columns['item_number'] = [item.get('num') for item in all_items]
+        item_details = [item.get('itm_det', {}) for item in all_items]
+        for name, detail_key in zip(ITEM_COLUMNS, ITEM_DETAIL_KEYS):
+            columns[name] = [details.get(detail_key, 0) for details in item_details]
 
-    return pd.DataFrame(all_records)
+    return pd.DataFrame(columns)
 
 def simple_dataframe_processor(data):
     """
@@ -0,0 +1,288 @@
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import NamedTuple
+
+import pandas as pd
+
+from app.core import gstr1_converter, gstr2_converter
+from app.core.conversion_plan import get_conversion_plan
+from app.core.json_stream import iter_json_sections
+from app.core.output_sinks import OUTPUT_FORMATS, open_output_sink
+from app.core.return_type import CONFIG_PATHS, detect_return_type, detect_return_type_from_keys
+
+# --- Constants ---
+# Basic info keys every consolidated row is tagged with, and the columns they go in.
+# Sections can have gstin or fp columns of their own (e.g. GSTR-2 tcs), so the names differ.
+TAG_KEYS = ("gstin", "fp")
+TAG_COLUMNS = ("Return GSTIN", "Return Period")
+RETURNS_SECTION = ("returns", "Returns")
+
+# --- Processor Mapping ---
+# Maps return types to the PROCESSOR_MAP their config is compiled with
+PROCESSOR_MAPS = {
+    "gstr1": gstr1_converter.PROCESSOR_MAP,
+    "gstr2": gstr2_converter.PROCESSOR_MAP,
+}
+
+
+class ConsolidatedFile(NamedTuple):
+    """Outcome of one return of a consolidation."""
+    json_path: str
+    gstin: str
+    fp: str
+    success: bool
+    message: str
+    rows: int
+    seconds: float
+
+
+def _build_return(return_type, json_path):
+    """
+    Worker entry point: builds every section of one return, tagged with its
+    gstin and fp. Each section is parsed and built as soon as it is read, so
+    only the raw text of one section and the finished (compacted) frames of
+    the file are held. Never raises.
+
+    Returns:
+        tuple: (tags dict, [(key, sheet name, DataFrame)] in config order, error message or None)
+    """
+    tags = dict.fromkeys(TAG_KEYS)
+    frames = []
+    try:
+        plan = get_conversion_plan(CONFIG_PATHS[return_type], PROCESSOR_MAPS[return_type])
+        # Every member is scanned, but only the wanted ones are parsed
+        top_level_keys = []
+        built = {}
+        for key, raw_text in iter_json_sections(json_path, raw=True):
+            top_level_keys.append(key)
+            if key in TAG_KEYS:
+                tags[key] = json.loads(raw_text)
+            elif key in plan.sections:
+                section_data = json.loads(raw_text)
+                del raw_text
+                if not section_data:
+                    continue
+                try:
+                    section_df = plan.sections[key].build_df(section_data)
+                except Exception as e:
+                    print(f"Warning: Could not process section '{key}' of {json_path}. Error: {e}")
+                    continue
+                del section_data
+                if not section_df.empty:
+                    built[key] = section_df
+        detected = detect_return_type_from_keys(top_level_keys, json_path, default=None)
+        if detected is not None and detected != return_type:
+            return tags, [], f"{json_path} is a {detected.upper()} return, not {return_type.upper()}"
+
+        for key, section in plan.sections.items():
+            if key in built:
+                section_df = built.pop(key)
+                # Constant per file, so stored as categoricals
+                for position, (tag, column) in enumerate(zip(TAG_KEYS, TAG_COLUMNS)):
+                    section_df.insert(position, column, pd.Categorical([tags[tag]] * len(section_df)))
+                frames.append((key, section.sheet_name, section_df))
+    except Exception as e:
+        return tags, [], f"Error reading {json_path}: {e}"
+    return tags, frames, None
+
+
+def _period_key(json_path):
+    """
+    Sort key of a return by its fp (MMYYYY). Reading stops at the first tag
+    found, which the portal writes right at the start of the file.
+    Unreadable files and odd periods sort last.
+    """
+    try:
+        for _, fp in iter_json_sections(json_path, keys={"fp"}):
+            fp = str(fp)
+            if len(fp) == 6 and fp.isdigit():
+                return (0, fp[2:], fp[:2])
+            break
+    except (OSError, ValueError):
+        pass
+    return (1, "", "")
+
+
+class _SectionAligner:
+    """
+    Keeps all rows of a section in the same columns, since the sinks append
+    without headers.
+
+    Sections whose config fixes their columns (SectionPlan.columns) are
+    written in all of them from the first return on; columns a return lacks
+    are left empty. The columns of the other sections depend on the data, so
+    their frames (small summaries such as hsn or doc_issue) are held until
+    every return has been read, then written once in the union of their
+    columns. No column of any return is dropped.
+    """
+
+    def __init__(self, plan):
+        self.plan = plan
+        self.columns = {}
+        self.held = {}
+
+    def align(self, key, df):
+        """Returns `df` in the columns of its section, or None if it is held for `held_sections`."""
+        columns = self.columns.get(key)
+        if columns is None:
+            declared = self.plan.sections[key].columns
+            if declared is None:
+                self.held.setdefault(key, []).append(df)
+                return None
+            columns = list(TAG_COLUMNS) + [column for column in declared if column not in TAG_COLUMNS]
+            self.columns[key] = columns
+        if list(df.columns) == columns:
+            return df
+        return df.reindex(columns=columns)
+
+    def held_sections(self):
+        """Yields (key, DataFrame) for every held section, its frames concatenated."""
+        for key, frames in self.held.items():
+            yield key, pd.concat(frames, ignore_index=True)
+
+
+def consolidate_returns(files, output_path, return_type="auto", output_format="xlsx", max_workers=None,
+                        max_in_flight=None, progress_callback=None, mp_context=None, sort_by_period=True):
+    """
+    Merges many returns (e.g. twelve monthly GSTR-1 files) into one output
+    with a sheet, or file, per section.
+
+    Every row is tagged with the `gstin` and `fp` of its return, in leading
+    "Return GSTIN" and "Return Period" columns (TAG_COLUMNS). Returns are
+    built in parallel on a process pool, but are appended to the output
+    strictly in order (by period, or as given), one at a time, so memory is
+    bounded by the returns in flight rather than by the whole year. Only
+    summary sections whose columns depend on the data are collected and
+    written at the end (see _SectionAligner). A "Returns" section lists
+    every input with its outcome.
+
+    Args:
+        files (list): Input JSON paths.
+        output_path (str): The workbook, or for csv/parquet/feather the directory, to write.
+        return_type (str, optional): "gstr1", "gstr2" or "auto" to detect it from the first
+            file. Files of another type are reported and left out. Defaults to "auto".
+        output_format (str, optional): One of OUTPUT_FORMATS. Defaults to "xlsx".
+        max_workers (int, optional): Pool size. Defaults to None (one per CPU). 1 runs in-process.
+        max_in_flight (int, optional): Upper bound on returns being built or waiting to be
+            written. Defaults to None (twice the pool size).
+        progress_callback (callable, optional): Called with each ConsolidatedFile once its
+            rows are written.
+        mp_context (optional): multiprocessing context for the pool.
+        sort_by_period (bool, optional): Append returns in order of their fp, oldest first.
+            False keeps the order of `files`. Defaults to True.
+
+    Returns:
+        list: One ConsolidatedFile per input file, in the order they were appended.
+
+    Raises:
+        ValueError: On an unknown return type or output format, if the type cannot be detected,
+            or if its processor config is malformed.
+        OSError: If the output cannot be written.
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format '{output_format}'")
+    files = list(files)
+    if not files:
+        return []
+    if sort_by_period:
+        # Stable, so returns of the same period keep their given order
+        files.sort(key=_period_key)
+    if return_type == "auto":
+        return_type = detect_return_type(files[0], default=None)
+        if return_type is None:
+            raise ValueError(f"Could not detect the return type of {files[0]}")
+    if return_type not in PROCESSOR_MAPS:
+        raise ValueError(f"Unknown return type '{return_type}'")
+
+    results = [None] * len(files)
+    aligner = _SectionAligner(get_conversion_plan(CONFIG_PATHS[return_type], PROCESSOR_MAPS[return_type]))
+
+    with open_output_sink(output_format, output_path) as sink:
+        # Keeps the returns listing first, although it is only written at the end
+        sink.reserve_section(*RETURNS_SECTION)
+
+        def write(index, built, seconds):
+            json_path = files[index]
+            tags, frames, error = built
+            rows = 0
+            if error is None:
+                # A return that cannot be written is reported; the others still are
+                try:
+                    for key, sheet_name, section_df in frames:
+                        aligned = aligner.align(key, section_df)
+                        if aligned is None:
+                            # Keeps the section where it first appeared
+                            sink.reserve_section(key, sheet_name)
+                        else:
+                            sink.write_section(key, sheet_name, aligned)
+                        rows += len(section_df)
+                except Exception as e:
+                    error = f"Error writing {json_path} after {rows} rows: {e}"
+            if error is None:
+                message = f"Added {rows} rows from {json_path}"
+            else:
+                message = error
+            result = ConsolidatedFile(json_path, tags["gstin"], tags["fp"], error is None, message, rows, seconds)
+            results[index] = result
+            if progress_callback:
+                progress_callback(result)
+
+        max_workers = max_workers or os.cpu_count() or 1
+        if max_workers == 1:
+            for index, json_path in enumerate(files):
+                start = time.perf_counter()
+                built = _build_return(return_type, json_path)
+                write(index, built, time.perf_counter() - start)
+        else:
+            _build_in_parallel(files, return_type, write, min(max_workers, len(files)), max_in_flight, mp_context)
+
+        for key, section_df in aligner.held_sections():
+            try:
+                sink.write_section(key, aligner.plan.sections[key].sheet_name, section_df)
+            except Exception as e:
+                print(f"Warning: Could not write section '{key}'. Error: {e}")
+        sink.write_section(*RETURNS_SECTION, pd.DataFrame(
+            [(result.json_path, result.gstin, result.fp, "OK" if result.success else "FAILED", result.rows,
+              result.message) for result in results],
+            columns=["File", "gstin", "fp", "Status", "Rows", "Message"]))
+    return results
+
+
+def _build_in_parallel(files, return_type, write, max_workers, max_in_flight, mp_context):
+    """
+    Builds returns on a process pool and hands them to `write` in input
+    order. Returns finished ahead of their turn wait in memory, so at most
+    `max_in_flight` returns are held at once.
+    """
+    max_in_flight = max(max_in_flight or 2 * max_workers, 1)
+    pending = iter(enumerate(files))
+    in_flight = {}
+    finished = {}
+    next_index = 0
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context) as executor:
+        while True:
+            while len(in_flight) + len(finished) < max_in_flight:
+                next_job = next(pending, None)
+                if next_job is None:
+                    break
+                index, json_path = next_job
+                in_flight[executor.submit(_build_return, return_type, json_path)] = (index, time.perf_counter())
+            if not in_flight and not finished:
+                break
+
+            if in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, start = in_flight.pop(future)
+                    try:
+                        built = future.result()
+                    except Exception as e:
+                        built = (dict.fromkeys(TAG_KEYS), [], f"Worker failed on {files[index]}: {e}")
+                    finished[index] = (built, time.perf_counter() - start)
+
+            while next_index in finished:
+                built, seconds = finished.pop(next_index)
+                write(next_index, built, seconds)
+                next_index += 1
@@ -0,0 +1,303 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from typing import NamedTuple
+
+from app import __version__
+from app.core.json_sources import open_json_source
+from app.core.output_sinks import MANIFEST_NAME
+from app.core.return_type import CONFIG_PATHS
+
+# --- Constants ---
+# Bump when the layout of cached outputs changes without a version change
+CACHE_FORMAT_VERSION = 1
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+CACHE_DIR_ENV = "TURBO_GST_CACHE_DIR"
+INDEX_NAME = "index.json"
+ENTRIES_DIR = "entries"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def default_cache_dir():
+    """
+    Returns the per-user cache directory, overridable with TURBO_GST_CACHE_DIR.
+    """
+    if os.environ.get(CACHE_DIR_ENV):
+        return os.environ[CACHE_DIR_ENV]
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "turbo-gst", "conversions")
+
+
+def _hash_file(hasher, path):
+    # Archive members are hashed decompressed, like the file they were extracted from
+    with open_json_source(path, binary=True) as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            hasher.update(chunk)
+
+
+def _output_files(output_dir):
+    """
+    Files that make up a directory output: the manifest and the section files
+    it lists, including the workbooks a section was split over. Other files in
+    the folder (e.g. from another format) are ignored.
+    """
+    with open(os.path.join(output_dir, MANIFEST_NAME), 'r') as f:
+        manifest = json.load(f)
+    files = [MANIFEST_NAME]
+    for section in manifest.get("sections", []):
+        files.extend(shard["file"] for shard in section.get("shards", []) if shard.get("file"))
+        if section.get("file"):
+            files.append(section["file"])
+    return files
+
+
+def _path_size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in _output_files(path))
+    return os.path.getsize(path)
+
+
+def _remove_path(path):
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path, ignore_errors=True)
+    elif os.path.lexists(path):
+        os.remove(path)
+
+
+class CacheStats(NamedTuple):
+    """Counters of one ConversionCache since it was opened."""
+    hits: int
+    misses: int
+    stores: int
+    evictions: int
+    entries: int
+    total_bytes: int
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ConversionCache:
+    """
+    On-disk cache of converted outputs, keyed by the input JSON bytes, the
+    processor config of the return type, the converter version and the
+    conversion options.
+
+    Outputs (a workbook or a directory of section files) are kept under
+    `entries/<key>` with an index recording their sizes and last use. When the
+    total size passes `max_bytes` the least recently used entries are evicted.
+
+    Args:
+        cache_dir (str, optional): Where the cache lives. Defaults to None (`default_cache_dir()`).
+        max_bytes (int, optional): Size cap for all entries together. Defaults to 2 GiB.
+        link (bool, optional): Restore outputs as hard links instead of copies where the
+            filesystem allows it. Faster, but editing a restored file in place also changes
+            the cached copy. Defaults to False.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES, link=False):
+        self.cache_dir = os.path.abspath(cache_dir or default_cache_dir())
+        self.max_bytes = max_bytes
+        self.link = link
+        self._entries_dir = os.path.join(self.cache_dir, ENTRIES_DIR)
+        self._index_path = os.path.join(self.cache_dir, INDEX_NAME)
+        self._lock = threading.Lock()
+        self._config_digests = {}
+        self._hits = self._misses = self._stores = self._evictions = 0
+        os.makedirs(self._entries_dir, exist_ok=True)
+        self._index = self._load_index()
+
+    # --- Index ---
+
+    def _load_index(self):
+        try:
+            with open(self._index_path, 'r') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(index, dict) or index.get("format") != CACHE_FORMAT_VERSION:
+            return {}
+        entries = index.get("entries")
+        if not isinstance(entries, dict):
+            return {}
+        return {key: entry for key, entry in entries.items()
+                if isinstance(entry, dict) and "size" in entry and "last_used" in entry}
+
+    def _save_index(self):
+        # Written to a temporary file first so a crash never leaves a torn index
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=".index-")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({"format": CACHE_FORMAT_VERSION, "entries": self._index}, f)
+            os.replace(temp_path, self._index_path)
+        except OSError:
+            _remove_path(temp_path)
+            raise
+
+    def _entry_path(self, key):
+        return os.path.join(self._entries_dir, key)
+
+    # --- Keys ---
+
+    def _config_digest(self, return_type):
+        config_path = CONFIG_PATHS[return_type]
+        stat = os.stat(config_path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = self._config_digests.get(return_type)
+        if cached is None or cached[0] != signature:
+            hasher = hashlib.sha256()
+            _hash_file(hasher, config_path)
+            cached = (signature, hasher.hexdigest())
+            self._config_digests[return_type] = cached
+        return cached[1]
+
+    def make_key(self, json_path, return_type, output_format="xlsx", stream=False, summaries=False, validate=False,
+                 amendments=False):
+        """
+        Returns the cache key for converting `json_path` as `return_type`.
+
+        Raises:
+            OSError: If the input or the processor config cannot be read.
+        """
+        hasher = hashlib.sha256()
+        header = [CACHE_FORMAT_VERSION, __version__, return_type, self._config_digest(return_type),
+                  output_format, bool(stream), bool(summaries), bool(validate), bool(amendments)]
+        hasher.update(json.dumps(header).encode('utf-8'))
+        _hash_file(hasher, json_path)
+        return hasher.hexdigest()
+
+    # --- Lookup and storage ---
+
+    def restore(self, key, output_path):
+        """
+        Copies (or links) the cached output for `key` to `output_path`.
+
+        Returns:
+            bool: True on a hit, False if the key is not cached.
+        """
+        with self._lock:
+            entry = self._index.get(key)
+            source = self._entry_path(key)
+            if entry is None or not os.path.lexists(source):
+                self._misses += 1
+                if entry is not None:
+                    # Removed from disk behind our back
+                    del self._index[key]
+                    self._save_index()
+                return False
+
+            try:
+                self._copy(source, output_path)
+            except OSError as e:
+                print(f"Warning: Could not restore cached output to {output_path}. Error: {e}")
+                self._misses += 1
+                return False
+
+            entry["last_used"] = time.time()
+            self._hits += 1
+            self._save_index()
+            return True
+
+    def store(self, key, output_path):
+        """
+        Adds a freshly converted output to the cache and evicts least recently
+        used entries until the cache fits `max_bytes` again. Outputs larger
+        than the whole cache are not stored.
+
+        Returns:
+            bool: True if the output was stored.
+        """
+        size = _path_size(output_path)
+        if size > self.max_bytes:
+            return False
+
+        # Copied under a temporary name and renamed, so readers never see half an entry
+        temp_path = tempfile.mkdtemp(dir=self.cache_dir, prefix=".store-")
+        staged = os.path.join(temp_path, "output")
+        try:
+            if os.path.isdir(output_path):
+                os.makedirs(staged)
+                for name in _output_files(output_path):
+                    shutil.copy2(os.path.join(output_path, name), os.path.join(staged, name))
+            else:
+                shutil.copy2(output_path, staged)
+
+            with self._lock:
+                destination = self._entry_path(key)
+                _remove_path(destination)
+                os.replace(staged, destination)
+                self._index[key] = {
+                    "name": os.path.basename(output_path),
+                    "size": size,
+                    "last_used": time.time(),
+                }
+                self._stores += 1
+                self._evict(keep=key)
+                self._save_index()
+        finally:
+            shutil.rmtree(temp_path, ignore_errors=True)
+        return True
+
+    def _copy(self, source, output_path):
+        copy_function = shutil.copy2
+        if self.link:
+            def copy_function(src, dst):
+                try:
+                    if os.path.lexists(dst):
+                        os.remove(dst)
+                    os.link(src, dst)
+                except OSError:
+                    shutil.copy2(src, dst)
+
+        if os.path.isdir(source):
+            shutil.copytree(source, output_path, copy_function=copy_function, dirs_exist_ok=True)
+            # The manifest names the directory it was first written to
+            manifest_path = os.path.join(output_path, MANIFEST_NAME)
+            with open(manifest_path, 'r') as f:
+                manifest = json.load(f)
+            manifest["output"] = os.fspath(output_path)
+            _remove_path(manifest_path)
+            with open(manifest_path, 'w') as f:
+                json.dump(manifest, f, indent=2)
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+            copy_function(source, output_path)
+
+    def _evict(self, keep=None):
+        total = sum(entry["size"] for entry in self._index.values())
+        if total <= self.max_bytes:
+            return
+        for key in sorted(self._index, key=lambda k: self._index[k]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= self._index.pop(key)["size"]
+            _remove_path(self._entry_path(key))
+            self._evictions += 1
+
+    def clear(self):
+        """Removes every cached output."""
+        with self._lock:
+            for key in list(self._index):
+                _remove_path(self._entry_path(key))
+            self._index.clear()
+            self._save_index()
+
+    def stats(self):
+        """Returns the CacheStats of this cache."""
+        with self._lock:
+            return CacheStats(self._hits, self._misses, self._stores, self._evictions,
+                              len(self._index), sum(entry["size"] for entry in self._index.values()))
@@ -0,0 +1,200 @@
+import json
+import os
+import threading
+
+from app.core.amendments import validate_amendment_config
+from app.core.common_processors import (DTYPE_COMPACTORS, build_record_path_columns, compact_dtypes,
+                                        convert_date_columns, flatten_and_normalize_columnar, flattened_columns,
+                                        json_normalize_with_meta, normalize_record_path)
+from app.core.summaries import validate_summary_config
+from app.core.validation import validate_validation_config
+from app.utils.logger import NULL_PROFILER
+
+# --- Constants ---
+RECORD_PATH_PROCESSOR = "flatten_and_normalize"
+
+
+class ConfigError(ValueError):
+    """Raised when a processor configuration file is malformed."""
+
+
+def _find_rename_dict(config):
+    # Sections name their rename map rename_dict, rename_b2b_dict, ...
+    rename_key = next((k for k in config if k.startswith('rename_') and k.endswith('_dict')), None)
+    return config.get(rename_key) or {}
+
+
+class SectionPlan:
+    """
+    Everything needed to turn one section of a return into a DataFrame,
+    resolved once from its entry in the processor config.
+    """
+
+    def __init__(self, key, config, processor_map):
+        if not isinstance(config.get("sheet_name"), str) or not config["sheet_name"]:
+            raise ConfigError(f"Section '{key}' has no sheet_name")
+
+        self.key = key
+        self.sheet_name = config["sheet_name"]
+        self.processor_name = config.get("processor")
+        self.args = config.get("args", {})
+        if not isinstance(self.args, dict):
+            raise ConfigError(f"Section '{key}' has args that are not an object")
+
+        # Sections like B2B are normalised along record_path instead of going through a processor
+        self.uses_record_path = self.processor_name == RECORD_PATH_PROCESSOR and 'record_path' in config
+        self.record_path = config.get("record_path")
+        self.meta = config.get("meta")
+        self.rename_dict = _find_rename_dict(config)
+        self.order = config.get("order_df") or []
+        # Compact dtypes of the output columns, e.g. {"GSTIN": "category"}
+        self.dtypes = config.get("dtypes") or {}
+        if not isinstance(self.dtypes, dict):
+            raise ConfigError(f"Section '{key}' has dtypes that are not an object")
+        for column, dtype in self.dtypes.items():
+            if dtype not in DTYPE_COMPACTORS:
+                raise ConfigError(f"Section '{key}' declares unknown dtype '{dtype}' for column '{column}'")
+        # Date columns and their strptime formats, e.g. {"date": "%d-%m-%Y"}
+        self.date_formats = config.get("date_formats") or {}
+        if not isinstance(self.date_formats, dict) or not all(
+                isinstance(date_format, str) for date_format in self.date_formats.values()):
+            raise ConfigError(f"Section '{key}' has date_formats that do not map columns to format strings")
+        # Which columns feed the summary sheets, see SummaryBuilder
+        self.summary = config.get("summary")
+        if self.summary is not None:
+            problem = validate_summary_config(key, self.summary)
+            if problem:
+                raise ConfigError(problem)
+        # The checks run on the section, see ValidationBuilder
+        self.validation = config.get("validation")
+        if self.validation is not None:
+            problem = validate_validation_config(key, self.validation)
+            if problem:
+                raise ConfigError(problem)
+        # The section it amends and how, see AmendmentResolver
+        self.amends = config.get("amends")
+        if self.amends is not None:
+            problem = validate_amendment_config(key, self.amends)
+            if problem:
+                raise ConfigError(problem)
+        # Key of the section amending this one; linked by ConversionPlan
+        self.amended_by = None
+        # Every column the section can have, in order, where the config fixes them;
+        # None when they depend on the data (e.g. simple_dataframe sections)
+        self.columns = None
+
+        if self.uses_record_path:
+            if not isinstance(self.record_path, list) or not isinstance(self.meta, list):
+                raise ConfigError(f"Section '{key}' needs record_path and meta lists")
+            if not isinstance(self.rename_dict, dict) or not isinstance(self.order, list):
+                raise ConfigError(f"Section '{key}' has a malformed rename dict or order_df")
+            self.processor = None
+            # Resolved once so that only the surviving columns are ever extracted
+            self.record_path_columns = None
+            if self.rename_dict and self.order:
+                self.record_path_columns = build_record_path_columns(self.meta, self.rename_dict, self.order)
+                self.columns = [column for column, _, _ in self.record_path_columns]
+        else:
+            self.processor = processor_map.get(self.processor_name)
+            if self.processor is flatten_and_normalize_columnar:
+                self.columns = flattened_columns(self.args.get("record_fields"))
+
+    def build_df(self, section_data, profiler=NULL_PROFILER):
+        """
+        Runs the section's processing and returns its DataFrame, with the
+        date columns declared in the config parsed and its column dtypes
+        compacted. Each step is timed as a stage of `profiler`.
+        """
+        df = self._process(section_data, profiler)
+        if self.date_formats and not df.empty:
+            with profiler.stage("dates"):
+                df = convert_date_columns(df, self.date_formats)
+        if self.dtypes and not df.empty:
+            with profiler.stage("compact"):
+                df = compact_dtypes(df, self.dtypes)
+        return df
+
+    def _process(self, section_data, profiler):
+        if self.uses_record_path:
+            with profiler.stage("normalize") as stage:
+                if self.record_path_columns is not None:
+                    df = normalize_record_path(section_data, self.record_path, self.record_path_columns)
+                else:
+                    df = json_normalize_with_meta(section_data, record_path=self.record_path, meta=self.meta)
+                stage.set(rows=len(df))
+            return df
+
+        with profiler.stage(self.processor_name) as stage:
+            df = self.processor(section_data, **self.args)
+            stage.set(rows=len(df))
+        return df
+
+
+class ConversionPlan:
+    """
+    A processor config file compiled into SectionPlans, in config order.
+    Sections whose processor is not defined are reported once and left out.
+    """
+
+    def __init__(self, config, processor_map, config_path=None):
+        if not isinstance(config, dict):
+            raise ConfigError("Processor configuration must be a JSON object")
+
+        self.config_path = config_path
+        self.sections = {}
+        # Top-level entries that are not objects only label basic info fields
+        self.labels = {}
+        for key, section_config in config.items():
+            if not isinstance(section_config, dict):
+                self.labels[key] = section_config
+                continue
+            section = SectionPlan(key, section_config, processor_map)
+            if not section.uses_record_path and section.processor is None:
+                print(f"Warning: Processor '{section.processor_name}' for section '{key}' is not defined. Skipping.")
+                continue
+            self.sections[key] = section
+
+        for key, section in self.sections.items():
+            if section.amends:
+                amended = self.sections.get(section.amends["section"])
+                if amended is None:
+                    raise ConfigError(f"Section '{key}' amends unknown section '{section.amends['section']}'")
+                amended.amended_by = key
+
+
+# --- Plan Cache ---
+_plan_cache = {}
+_plan_cache_lock = threading.Lock()
+
+
+def get_conversion_plan(config_path, processor_map):
+    """
+    Returns the compiled plan for a processor config file.
+
+    Plans are cached per process and rebuilt only when the file's modification
+    time or size changes, so converting many files re-reads nothing.
+
+    Raises:
+        OSError: If the config file cannot be read.
+        ConfigError: If the config file is not valid.
+    """
+    config_path = os.path.abspath(os.fspath(config_path))
+    stat = os.stat(config_path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cache_key = (config_path, id(processor_map))
+
+    with _plan_cache_lock:
+        cached = _plan_cache.get(cache_key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+    with open(config_path, 'r') as f:
+        try:
+            config = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ConfigError(f"Invalid JSON in {config_path}: {e}") from e
+    plan = ConversionPlan(config, processor_map, config_path)
+
+    with _plan_cache_lock:
+        _plan_cache[cache_key] = (signature, plan)
+    return plan
@@ -0,0 +1,214 @@
+import datetime
+import re
+
+import pandas as pd
+import xlsxwriter
+
+# --- Constants ---
+DATE_FORMAT = 'dd-mm-yyyy'
+AMOUNT_FORMAT = '0.00'
+HEADER_FORMAT = {'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'}
+
+MAX_SHEET_NAME_LENGTH = 31
+# Rows of an Excel sheet, header included; xlsxwriter silently drops anything below
+MAX_SHEET_ROWS = 1_048_576
+_INVALID_SHEET_CHARS = re.compile(r'[\[\]:*?/\\]')
+
+
+def sanitize_sheet_name(name: str) -> str:
+    """
+    Makes a name acceptable to Excel: characters Excel rejects are replaced
+    with '-' and the name is cut to 31 characters.
+    """
+    name = _INVALID_SHEET_CHARS.sub('-', str(name)).strip("'") or "Sheet"
+    return name[:MAX_SHEET_NAME_LENGTH]
+
+
+def shard_name(name: str, number: int) -> str:
+    """
+    Name of shard `number` of a sheet that outgrew Excel's row limit, e.g.
+    "B2B (2)"; the name is cut so that the number always fits.
+    """
+    suffix = f" ({number})"
+    return sanitize_sheet_name(name)[:MAX_SHEET_NAME_LENGTH - len(suffix)] + suffix
+
+
+class StreamingExcelWriter:
+    """
+    Writes DataFrames to one workbook using xlsxwriter's constant_memory mode.
+
+    Rows are streamed to disk as they are written, so memory stays flat no
+    matter how large a sheet gets. Cells are written row by row straight from
+    the frame's column lists, with the write method and cell format of every
+    column chosen once up front instead of being worked out per cell.
+
+    A sheet that would pass `max_rows` is sharded: the rows that do not fit
+    on "B2B" go on to new sheets "B2B (2)", "B2B (3)", ..., each starting
+    with the header again. Sheets are only ever added, so a shard follows
+    its sheet directly unless other sheets were added in between, and then
+    comes after them. `shards` records which data rows ended up on which
+    sheet.
+
+    Use as a context manager; the workbook is saved on exit.
+    """
+
+    def __init__(self, excel_path, date_format=DATE_FORMAT, amount_format=AMOUNT_FORMAT, max_rows=MAX_SHEET_ROWS):
+        self.excel_path = excel_path
+        self.max_rows = max_rows
+        self.workbook = xlsxwriter.Workbook(excel_path, {'constant_memory': True})
+        self.header_format = self.workbook.add_format(HEADER_FORMAT)
+        self.date_format = self.workbook.add_format({'num_format': date_format})
+        self.amount_format = self.workbook.add_format({'num_format': amount_format})
+        # Current worksheet and its next free row per sheet name, so a sheet can be appended to
+        self.sheets = {}
+        self._next_row = {}
+        # Per sheet name: [{"sheet", "first_row", "last_row"}] over its data rows, counted from 1
+        self.shards = {}
+        self._shard_counts = {}
+        self._headers = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.workbook.close()
+
+    def add_sheet(self, sheet_name):
+        """
+        Returns the worksheet for `sheet_name`, creating it if needed. Sheets
+        appear in the workbook in the order they are first added.
+        """
+        sheet_name = sanitize_sheet_name(sheet_name)
+        worksheet = self.sheets.get(sheet_name)
+        if worksheet is None:
+            worksheet = self.workbook.add_worksheet(sheet_name)
+            self.sheets[sheet_name] = worksheet
+            self._next_row[sheet_name] = 0
+            self.shards[sheet_name] = []
+        return worksheet
+
+    def _add_shard(self, sheet_name):
+        """
+        Continues sheet `sheet_name` on a new shard, "<name> (2)", "<name> (3)",
+        ... The first shard keeps the plain name, so no sheet is ever renamed
+        or moved. Returns the new worksheet, with the header already written
+        if the sheet has one.
+        """
+        count = self._shard_counts.get(sheet_name, 1) + 1
+        worksheet = self.workbook.add_worksheet(shard_name(sheet_name, count))
+        self._shard_counts[sheet_name] = count
+
+        self.sheets[sheet_name] = worksheet
+        row = 0
+        if sheet_name in self._headers:
+            columns, startcol = self._headers[sheet_name]
+            self._write_header(worksheet, row, columns, startcol)
+            row += 1
+        self._next_row[sheet_name] = row
+        return worksheet
+
+    def _write_header(self, worksheet, row, columns, startcol):
+        for col, name in enumerate(columns, start=startcol):
+            worksheet.write_string(row, col, str(name), self.header_format)
+
+    def _column_writer(self, worksheet, series):
+        """Picks the write method, cell format and value list for a column."""
+        kind = series.dtype.kind
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # Compacted columns are written like the values they hold
+            kind = series.dtype.categories.dtype.kind
+        if kind == 'M':
+            values = [None if pd.isna(value) else value.to_pydatetime() for value in series]
+            return worksheet.write_datetime, self.date_format, values
+        if kind == 'f':
+            return worksheet.write_number, self.amount_format, series.tolist()
+        if kind in 'iu':
+            return worksheet.write_number, None, series.tolist()
+        if kind == 'b':
+            return worksheet.write_boolean, None, series.tolist()
+
+        def write_any(row, col, value, cell_format):
+            # Mixed object/string columns; anything xlsxwriter cannot take is written as text
+            if isinstance(value, str):
+                worksheet.write_string(row, col, value)
+            elif isinstance(value, (datetime.date, datetime.time)):
+                worksheet.write_datetime(row, col, value, self.date_format)
+            else:
+                try:
+                    worksheet.write(row, col, value)
+                except TypeError:
+                    worksheet.write_string(row, col, str(value))
+
+        return write_any, None, series.tolist()
+
+    def write_dataframe(self, sheet_name, df, header=True, startrow=None, startcol=0):
+        """
+        Writes a DataFrame to a sheet, below anything already written to it.
+        Rows past `max_rows` continue on further shards of the sheet.
+
+        Args:
+            sheet_name (str): Target sheet; created on first use.
+            df (pd.DataFrame): The frame to write. The index is not written.
+            header (bool, optional): Write the column names first. Defaults to True.
+                They are repeated at the top of every further shard.
+            startrow (int, optional): First row to write. Defaults to None (the next free row).
+                In constant_memory mode rows must only move forward.
+            startcol (int, optional): First column to write. Defaults to 0.
+
+        Returns:
+            int: The number of data rows written.
+        """
+        worksheet = self.add_sheet(sheet_name)
+        sheet_name = sanitize_sheet_name(sheet_name)
+        row = self._next_row[sheet_name] if startrow is None else startrow
+
+        if header:
+            self._headers[sheet_name] = (list(df.columns), startcol)
+            if row >= self.max_rows - 1 and len(df):
+                # Not even the header and one row fit any more
+                worksheet = self._add_shard(sheet_name)
+                row = self._next_row[sheet_name]
+            else:
+                self._write_header(worksheet, row, df.columns, startcol)
+                row += 1
+
+        written = 0
+        while True:
+            room = max(self.max_rows - row, 0)
+            part = df if written == 0 and room >= len(df) else df.iloc[written:written + room]
+            row = self._write_rows(worksheet, part, row, startcol)
+            self._next_row[sheet_name] = row
+            if len(part):
+                shards = self.shards[sheet_name]
+                first_row = shards[-1]["last_row"] + 1 if shards else 1
+                if shards and shards[-1]["sheet"] == worksheet.name:
+                    shards[-1]["last_row"] += len(part)
+                else:
+                    shards.append({"sheet": worksheet.name, "first_row": first_row,
+                                   "last_row": first_row + len(part) - 1})
+            written += len(part)
+            if written >= len(df):
+                return len(df)
+            worksheet = self._add_shard(sheet_name)
+            row = self._next_row[sheet_name]
+
+    def _write_rows(self, worksheet, df, row, startcol):
+        """Writes the data rows of a frame from `row` on; returns the next free row."""
+        cells = []
+        columns = []
+        for col, (_, series) in enumerate(df.items(), start=startcol):
+            write, cell_format, values = self._column_writer(worksheet, series)
+            cells.append((col, write, cell_format))
+            columns.append(values)
+
+        for values in zip(*columns):
+            for (col, write, cell_format), value in zip(cells, values):
+                # Missing values are left blank, like DataFrame.to_excel does
+                if value is None or value is pd.NA or value is pd.NaT or (isinstance(value, float) and value != value):
+                    continue
+                write(row, col, value, cell_format)
+            row += 1
+        return row
@@ -0,0 +1,472 @@
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import sys
+import time
+import zipfile
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from app.core.batch_converter import BatchResult, _convert_one, build_output_paths
+from app.core.common_processors import process_drop
+from app.core.json_sources import GZIP_JSON_EXTENSION, ZIP_EXTENSION, is_json_source, list_json_sources
+from app.core.output_sinks import OUTPUT_FORMATS, output_extension
+
+# --- Constants ---
+STATE_FILE_NAME = ".turbo_gst_watch.json"
+STATE_VERSION = 1
+# A file counts as completely written once its size and mtime have not changed for this long
+DEFAULT_SETTLE_SECONDS = 1.0
+DEFAULT_POLL_SECONDS = 1.0
+# The polling fallback lists the folder when its mtime changes, and otherwise only this often
+DEFAULT_RESCAN_SECONDS = 60.0
+# Bytes read from the end of a file to check that its JSON is closed
+TAIL_BYTES = 64
+# Compressed bytes decompressed at a time when checking a gzipped file
+GZIP_CHECK_CHUNK = 1024 * 1024
+
+# inotify(7) flags and events
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+INOTIFY_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF | IN_MOVE_SELF
+INOTIFY_EVENT = struct.Struct("iIII")
+INOTIFY_READ_BYTES = 64 * 1024
+
+
+def is_watched_name(name):
+    """
+    The sources the loaders accept count (JSON, .json.gz and ZIP files);
+    hidden files (including the watch state) and partial downloads do not.
+    """
+    return is_json_source(name) and not name.startswith(('.', '~'))
+
+
+def _signature(path):
+    """(size, mtime_ns) of a file, or None if it is gone."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def _is_closed_json(tail):
+    return tail.rstrip().endswith((b'}', b']'))
+
+
+def _gzip_looks_complete(path):
+    """
+    A gzipped file has no closing bracket to look for, so it is decompressed
+    (and the output dropped) until the end of its stream, whose last bytes
+    must then close the JSON.
+    """
+    decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+    tail = b''
+    try:
+        with open(path, 'rb') as f:
+            while not decompressor.eof:
+                chunk = f.read(GZIP_CHECK_CHUNK)
+                if not chunk:
+                    return False
+                data = decompressor.decompress(chunk)
+                if data.strip():
+                    tail = data[-TAIL_BYTES:]
+    except (OSError, zlib.error):
+        return False
+    return _is_closed_json(tail)
+
+
+def looks_complete(path):
+    """
+    Cheap check that a source is not cut off: a JSON file must end with the
+    closing bracket of its top-level value, a gzipped one must decompress to
+    such a file and a ZIP archive must end with its central directory.
+    """
+    lowered = path.lower()
+    if lowered.endswith(ZIP_EXTENSION):
+        return zipfile.is_zipfile(path)
+    if lowered.endswith(GZIP_JSON_EXTENSION):
+        return _gzip_looks_complete(path)
+    try:
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(f.tell() - TAIL_BYTES, 0))
+            tail = f.read()
+    except OSError:
+        return False
+    return _is_closed_json(tail)
+
+
+# --- Change Sources ---
+
+class InotifyChanges:
+    """
+    Reports the names of files created, written or moved into a folder, using
+    inotify through ctypes. Only the kernel's events are read, so nothing is
+    ever listed or stat'ed to find changes.
+
+    Raises:
+        OSError: If inotify is not available (not Linux, or out of watches).
+    """
+
+    def __init__(self, folder):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1 failed: {os.strerror(errno)}")
+        if libc.inotify_add_watch(self._fd, os.fsencode(folder), INOTIFY_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, f"Cannot watch {folder}: {os.strerror(errno)}")
+        self.folder = folder
+        # Set when events were lost and the folder has to be listed again
+        self.overflowed = False
+        self.closed = False
+
+    def changes(self, timeout):
+        """Waits up to `timeout` seconds and returns the set of changed file names."""
+        names = set()
+        if self.closed:
+            time.sleep(timeout)
+            return names
+        readable, _, _ = select.select([self._fd], [], [], max(timeout, 0))
+        if not readable:
+            return names
+        try:
+            buffer = os.read(self._fd, INOTIFY_READ_BYTES)
+        except BlockingIOError:
+            return names
+        offset = 0
+        while offset + INOTIFY_EVENT.size <= len(buffer):
+            _, mask, _, length = INOTIFY_EVENT.unpack_from(buffer, offset)
+            offset += INOTIFY_EVENT.size
+            name = buffer[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                self.overflowed = True
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                print(f"Warning: The watched folder {self.folder} was moved or deleted")
+                self.closed = True
+            if name:
+                names.add(os.fsdecode(name))
+        return names
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class PollingChanges:
+    """
+    Fallback for platforms and file systems without inotify (e.g. network
+    shares). The folder is only listed when its own mtime changes, which
+    happens whenever a file is added or renamed in it, and otherwise every
+    `rescan_seconds` to catch files rewritten in place.
+    """
+
+    def __init__(self, folder, rescan_seconds=DEFAULT_RESCAN_SECONDS):
+        self.folder = folder
+        self.rescan_seconds = rescan_seconds
+        self.overflowed = False
+        self.closed = False
+        self._folder_mtime = None
+        self._last_scan = 0.0
+        self._signatures = {}
+
+    def changes(self, timeout):
+        time.sleep(max(timeout, 0))
+        folder_signature = _signature(self.folder)
+        if folder_signature is None:
+            return set()
+        if folder_signature[1] == self._folder_mtime and time.monotonic() - self._last_scan < self.rescan_seconds:
+            return set()
+        self._folder_mtime = folder_signature[1]
+        self._last_scan = time.monotonic()
+
+        names = set()
+        signatures = {}
+        with os.scandir(self.folder) as entries:
+            for entry in entries:
+                if not is_watched_name(entry.name) or not entry.is_file():
+                    continue
+                stat = entry.stat()
+                signatures[entry.name] = (stat.st_size, stat.st_mtime_ns)
+                if self._signatures.get(entry.name) != signatures[entry.name]:
+                    names.add(entry.name)
+        self._signatures = signatures
+        return names
+
+    def close(self):
+        pass
+
+
+def open_change_source(folder, use_inotify=True, rescan_seconds=DEFAULT_RESCAN_SECONDS):
+    """Returns an InotifyChanges for `folder` where possible, else a PollingChanges."""
+    if use_inotify:
+        try:
+            return InotifyChanges(folder)
+        except (OSError, AttributeError) as e:
+            print(f"Warning: Falling back to polling {folder}. Error: {e}")
+    return PollingChanges(folder, rescan_seconds)
+
+
+# --- Watch State ---
+
+class WatchState:
+    """
+    The files a watch has converted, with the (size, mtime) they had, kept in
+    a JSON file so that a restarted watch only converts what changed since.
+    Failed files are remembered too and retried once they change.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            if saved.get("version") == STATE_VERSION:
+                self.files = saved.get("files", {})
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"Warning: Ignoring unreadable watch state {path}. Error: {e}")
+
+    def is_current(self, json_path, signature):
+        entry = self.files.get(json_path)
+        return entry is not None and (entry["size"], entry["mtime_ns"]) == tuple(signature)
+
+    def record(self, json_path, signature, result):
+        self.files[json_path] = {"size": signature[0], "mtime_ns": signature[1], "output": result.output_path,
+                                 "success": result.success, "message": result.message}
+        self.save()
+
+    def save(self):
+        # Written aside and swapped in, so a crash never leaves half a state file
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": STATE_VERSION, "files": self.files}, f, indent=1)
+        os.replace(temporary_path, self.path)
+
+
+# --- Watcher ---
+
+class HotFolderWatcher:
+    """
+    Watches a folder and converts every JSON return (plain, .json.gz or in a
+    ZIP archive) dropped or rewritten in it, until stopped.
+
+    Changes come from inotify where available and from a cheap polling loop
+    otherwise. A changed file is converted once its size and mtime have been
+    stable for `settle_seconds` and it is complete (see `looks_complete`), so
+    files still being copied are left alone. The return type is detected per file. Conversions
+    run on a process pool of `max_workers`, with at most `max_in_flight`
+    files submitted; further ready files wait their turn. Finished files are
+    recorded in a state file, so on restart only new or changed files are
+    converted.
+
+    Args:
+        folder (str): The folder to watch. Like `process_drop`, only the files
+            directly inside it are considered.
+        output_dir (str, optional): Directory for the outputs. Defaults to None (the folder).
+        return_type (str, optional): "gstr1", "gstr2" or "auto". Defaults to "auto".
+        output_format (str, optional): One of OUTPUT_FORMATS. Defaults to "xlsx".
+        max_workers (int, optional): Pool size. Defaults to None (one per CPU).
+        max_in_flight (int, optional): Files submitted at once. Defaults to None (the pool size).
+        settle_seconds (float, optional): How long a file must stay unchanged before it is converted.
+        poll_seconds (float, optional): Wait between checks of the pending files and of the pool.
+        state_path (str, optional): The state file. Defaults to STATE_FILE_NAME in the output directory.
+        use_inotify (bool, optional): False forces the polling fallback, e.g. for network shares.
+        progress_callback (callable, optional): Called with each BatchResult as it completes.
+        mp_context (optional): multiprocessing context for the pool.
+        summaries (bool, optional): Add the summary sheets (see `convert_gstr1_to_excel`).
+        validate (bool, optional): Add the "Exceptions" sheet (see `convert_gstr1_to_excel`).
+        amendments (bool, optional): Add the net sheets of amended sections (see `convert_gstr2_to_excel`).
+
+    Raises:
+        ValueError: On an unknown output format or a folder that does not exist.
+    """
+
+    def __init__(self, folder, output_dir=None, return_type="auto", output_format="xlsx", max_workers=None,
+                 max_in_flight=None, settle_seconds=DEFAULT_SETTLE_SECONDS, poll_seconds=DEFAULT_POLL_SECONDS,
+                 state_path=None, use_inotify=True, progress_callback=None, mp_context=None, summaries=False,
+                 validate=False, amendments=False):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format '{output_format}'")
+        if not os.path.isdir(folder):
+            raise ValueError(f"{folder} is not a folder")
+        self.folder = os.path.abspath(folder)
+        self.output_dir = os.path.abspath(output_dir or folder)
+        self.return_type = return_type
+        self.output_format = output_format
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_in_flight = max(max_in_flight or self.max_workers, 1)
+        self.settle_seconds = settle_seconds
+        self.poll_seconds = poll_seconds
+        self.use_inotify = use_inotify
+        self.progress_callback = progress_callback
+        self.mp_context = mp_context
+        self.summaries = summaries
+        self.validate = validate
+        self.amendments = amendments
+        self.state = WatchState(state_path or os.path.join(self.output_dir, STATE_FILE_NAME))
+        self._stopped = False
+        # path -> (signature, monotonic time it was last seen changing)
+        self._pending = {}
+
+    def stop(self):
+        """Asks `run` to return once the conversions already running have finished."""
+        self._stopped = True
+
+    def _note_change(self, json_path, now):
+        signature = _signature(json_path)
+        if signature is None:
+            self._pending.pop(json_path, None)
+            return
+        previous = self._pending.get(json_path)
+        if previous is None or previous[0] != signature:
+            self._pending[json_path] = (signature, now)
+
+    def _scan_folder(self, now):
+        """Queues every file of the folder that the state does not already cover."""
+        for json_path in process_drop([self.folder], expand_archives=False):
+            if is_watched_name(os.path.basename(json_path)):
+                self._note_change(os.path.abspath(json_path), now)
+
+    def _ready_files(self, now, busy):
+        """Pops and returns the pending files that have settled, are complete and changed."""
+        ready = []
+        for json_path, (signature, since) in list(self._pending.items()):
+            if json_path in busy:
+                # Picked up again once its running conversion has finished
+                continue
+            current = _signature(json_path)
+            if current is None:
+                del self._pending[json_path]
+            elif current != signature:
+                self._pending[json_path] = (current, now)
+            elif now - since >= self.settle_seconds:
+                if not looks_complete(json_path):
+                    # Still being written, or truncated; its next write resets the timer
+                    self._pending[json_path] = (current, now)
+                    continue
+                del self._pending[json_path]
+                if not self.state.is_current(json_path, current):
+                    ready.append((json_path, current))
+        return ready
+
+    def _output_path(self, json_path):
+        return build_output_paths([json_path], self.output_dir, output_extension(self.output_format))[0]
+
+    def run(self, should_stop=None):
+        """
+        Converts the files already in the folder that changed since the last
+        run, then every new or changed file, until `stop` is called or
+        `should_stop` returns True.
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        source = open_change_source(self.folder, self.use_inotify)
+        in_flight = {}
+        busy = set()
+        # Source path -> [members still converting, result to record]; a ZIP archive is done with its last member
+        unfinished = {}
+
+        def record(json_path, signature, result):
+            busy.discard(json_path)
+            self.state.record(json_path, signature, result)
+
+        def finished(future):
+            json_path, signature, member = in_flight.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                result = BatchResult(member, self._output_path(member), False,
+                                     f"Worker failed on {member}: {e}", 0.0)
+            if self.progress_callback:
+                self.progress_callback(result)
+            entry = unfinished[json_path]
+            entry[0] -= 1
+            if entry[1] is None or entry[1].success:
+                # The first failure is what the state remembers
+                entry[1] = result
+            if entry[0] == 0:
+                del unfinished[json_path]
+                record(json_path, signature, entry[1])
+
+        def submit(executor, json_path, signature):
+            try:
+                members = list_json_sources(json_path)
+            except (OSError, zipfile.BadZipFile) as e:
+                members = []
+                message = f"Could not read {json_path}: {e}"
+            else:
+                message = f"{json_path} holds no JSON files"
+            busy.add(json_path)
+            if not members:
+                result = BatchResult(json_path, self._output_path(json_path), False, message, 0.0)
+                record(json_path, signature, result)
+                if self.progress_callback:
+                    self.progress_callback(result)
+                return
+            unfinished[json_path] = [len(members), None]
+            for member in members:
+                future = executor.submit(_convert_one, self.return_type, member, self._output_path(member), False,
+                                         self.output_format, summaries=self.summaries, validate=self.validate,
+                                         amendments=self.amendments)
+                in_flight[future] = (json_path, signature, member)
+
+        try:
+            with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self.mp_context) as executor:
+                self._scan_folder(time.monotonic())
+                while not self._stopped and not (should_stop is not None and should_stop()):
+                    now = time.monotonic()
+                    if source.overflowed:
+                        source.overflowed = False
+                        self._scan_folder(now)
+
+                    ready = self._ready_files(now, busy)
+                    for json_path, signature in ready:
+                        if len(in_flight) >= self.max_in_flight:
+                            # Back to the queue, already settled
+                            self._pending[json_path] = (signature, now - self.settle_seconds)
+                            continue
+                        # Every JSON file of a ZIP archive is a job of its own, all submitted together
+                        submit(executor, json_path, signature)
+
+                    if in_flight:
+                        done, _ = wait(in_flight, timeout=0, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            finished(future)
+
+                    # Wake up early enough to convert the next file once it has settled
+                    timeout = self.poll_seconds
+                    if self._pending:
+                        next_settled = min(since for _, since in self._pending.values()) + self.settle_seconds
+                        timeout = min(timeout, max(next_settled - time.monotonic(), 0.05))
+                    if in_flight:
+                        timeout = min(timeout, 0.2)
+                    for name in source.changes(timeout):
+                        if is_watched_name(name):
+                            self._note_change(os.path.join(self.folder, name), time.monotonic())
+
+                if in_flight:
+                    wait(in_flight)
+                    for future in list(in_flight):
+                        finished(future)
+        finally:
+            source.close()
@@ -0,0 +1,158 @@
+import gzip
+import io
+import os
+import struct
+import zipfile
+from contextlib import contextmanager
+
+# --- Constants ---
+# Kept free of pandas, like return_type, so that listing archives stays cheap
+JSON_EXTENSION = ".json"
+ZIP_EXTENSION = ".zip"
+# Only gzipped JSON; other .gz files (.tar.gz, .csv.gz) are not returns
+GZIP_JSON_EXTENSION = ".json.gz"
+_SEPARATORS = tuple({"/", os.sep, os.altsep or "/"})
+# Size of the uncompressed data, modulo 2**32, closes every gzip member
+_GZIP_SIZE = struct.Struct("<I")
+
+
+# --- Paths ---
+
+def member_path(archive_path, member):
+    """
+    Path of a JSON member inside a ZIP archive, e.g. "returns.zip/2024/gstr1_03.json".
+    Such paths are plain strings, so they can be handed to worker processes
+    and to every loader like the path of a file.
+    """
+    return os.path.join(os.fspath(archive_path), *member.split("/"))
+
+
+def split_archive_path(path):
+    """
+    Splits a path from `member_path` into the archive and the member name
+    inside it. Other paths, including bare archives, come back with member None.
+
+    Returns:
+        tuple: (archive or file path, member name or None).
+    """
+    path = os.fspath(path)
+    lowered = path.lower()
+    start = 0
+    while True:
+        index = lowered.find(ZIP_EXTENSION, start)
+        if index < 0:
+            return path, None
+        end = index + len(ZIP_EXTENSION)
+        if path[end:end + 1] in _SEPARATORS and os.path.isfile(path[:end]):
+            member = path[end + 1:]
+            for separator in _SEPARATORS:
+                member = member.replace(separator, "/")
+            return path[:end], member
+        start = end
+
+
+def is_json_source(path):
+    """
+    True for the paths the loaders accept: JSON files, gzipped JSON files
+    (.json.gz), ZIP archives and JSON members of ZIP archives.
+    """
+    name = os.fspath(path).lower()
+    return name.endswith((JSON_EXTENSION, GZIP_JSON_EXTENSION, ZIP_EXTENSION))
+
+
+def source_location(path):
+    """
+    Returns the directory and the file name stem an output for `path` is
+    named after. Members of a ZIP archive sit next to the archive, with the
+    folders inside it folded into the stem ("returns.zip/03/gstr1.json"
+    gives "03_gstr1").
+    """
+    archive_path, member = split_archive_path(path)
+    directory = os.path.dirname(os.path.abspath(archive_path))
+    if member is not None:
+        name = member.replace("/", "_")
+    else:
+        name = os.path.basename(archive_path)
+        if name.lower().endswith(GZIP_JSON_EXTENSION):
+            name = name[:-len(GZIP_JSON_EXTENSION)]
+    return directory, os.path.splitext(name)[0]
+
+
+def _is_json_member(info):
+    name = info.filename
+    base = name.rsplit("/", 1)[-1]
+    return (not info.is_dir() and name.lower().endswith(JSON_EXTENSION)
+            and not base.startswith(('.', '~')) and not name.startswith("__MACOSX/"))
+
+
+def list_json_sources(path):
+    """
+    Expands an archive into the JSON sources inside it: one `member_path`
+    per JSON member of a ZIP archive, in archive order, and the file itself
+    for gzip. Other paths are returned as they are.
+
+    Raises:
+        OSError: If the archive cannot be read.
+        zipfile.BadZipFile: If a ZIP archive is corrupt.
+    """
+    path = os.fspath(path)
+    if not path.lower().endswith(ZIP_EXTENSION):
+        return [path]
+    with zipfile.ZipFile(path) as archive:
+        return [member_path(path, info.filename) for info in archive.infolist() if _is_json_member(info)]
+
+
+def _zip_json_member(archive, archive_path):
+    """The only JSON member of an archive given without a member name."""
+    members = [info.filename for info in archive.infolist() if _is_json_member(info)]
+    if len(members) != 1:
+        raise ValueError(f"{archive_path} holds {len(members)} JSON files instead of one; "
+                         f"name the member to read, as in {member_path(archive_path, 'return.json')}")
+    return members[0]
+
+
+# --- Reading ---
+
+@contextmanager
+def open_json_source(path, binary=False):
+    """
+    Opens a JSON source for reading, decompressing ZIP members and gzip
+    files on the fly so that nothing is extracted to disk.
+
+    Args:
+        path (str): A JSON file, a gzipped JSON file, a `member_path` or a ZIP
+            archive holding a single JSON file.
+        binary (bool, optional): Yield a bytes stream instead of UTF-8 text. Defaults to False.
+
+    Raises:
+        OSError: If the file cannot be opened.
+        KeyError: If the archive has no such member.
+        ValueError: If a bare archive does not hold exactly one JSON file.
+    """
+    archive_path, member = split_archive_path(path)
+    if member is not None or archive_path.lower().endswith(ZIP_EXTENSION):
+        with zipfile.ZipFile(archive_path) as archive:
+            with archive.open(member or _zip_json_member(archive, archive_path)) as stream:
+                yield stream if binary else io.TextIOWrapper(stream, encoding='utf-8')
+    elif archive_path.lower().endswith(GZIP_JSON_EXTENSION):
+        with gzip.open(archive_path, 'rb' if binary else 'rt', encoding=None if binary else 'utf-8') as stream:
+            yield stream
+    else:
+        with open(archive_path, 'rb' if binary else 'r', encoding=None if binary else 'utf-8') as stream:
+            yield stream
+
+
+def source_size(path):
+    """
+    Uncompressed size in bytes of a JSON source, for reporting. Gzip files
+    only record it modulo 4 GiB.
+    """
+    archive_path, member = split_archive_path(path)
+    if member is not None or archive_path.lower().endswith(ZIP_EXTENSION):
+        with zipfile.ZipFile(archive_path) as archive:
+            return archive.getinfo(member or _zip_json_member(archive, archive_path)).file_size
+    if archive_path.lower().endswith(GZIP_JSON_EXTENSION):
+        with open(archive_path, 'rb') as f:
+            f.seek(-_GZIP_SIZE.size, os.SEEK_END)
+            return _GZIP_SIZE.unpack(f.read())[0]
+    return os.path.getsize(archive_path)
@@ -0,0 +1,211 @@
+import json
+import re
+
+from app.core.json_sources import open_json_source
+
+# --- Constants ---
+CHUNK_SIZE = 1 << 20
+
+_WHITESPACE = re.compile(r'\s*')
+_STRING_TAIL = re.compile(r'(?:[^"\\]|\\.)*"', re.DOTALL)
+# Everything up to the next bracket, with whole strings (which may hold brackets) swallowed
+_CONTAINER_TEXT = re.compile(r'(?:[^"\[\]{}]+|"(?:[^"\\]|\\.)*")*', re.DOTALL)
+_SCALAR = re.compile(r'[^,}\]\s]+')
+
+
+class _TopLevelScanner:
+    """
+    Walks the members of a top-level JSON object one at a time.
+
+    Only the text of the member currently being read is buffered; members that
+    are skipped are scanned for their closing bracket and discarded without
+    ever being decoded into Python objects.
+    """
+
+    def __init__(self, file, chunk_size=CHUNK_SIZE):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, capture=None, start=0):
+        """
+        Drops the consumed part of the buffer and reads the next chunk.
+        Text between `start` and the current position is moved into `capture`.
+        """
+        if capture is not None:
+            capture.append(self.buf[start:self.pos])
+        self.buf = self.buf[self.pos:]
+        self.pos = 0
+        chunk = self.file.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf += chunk
+        return True
+
+    def _peek(self):
+        """Returns the next non-whitespace character without consuming it."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON document")
+
+    def _expect(self, char):
+        found = self._peek()
+        if found != char:
+            raise ValueError(f"Expected '{char}' but found '{found}' in JSON document")
+        self.pos += 1
+
+    def _scan_string(self, capture, start):
+        """
+        Advances past a string whose opening quote is at the current position.
+        Returns the (possibly moved) start of the text being captured.
+        """
+        while True:
+            match = _STRING_TAIL.match(self.buf, self.pos + 1)
+            if match:
+                self.pos = match.end()
+                return start
+            # The closing quote has not been read yet
+            if not self._fill(capture, start):
+                raise ValueError("Unterminated string in JSON document")
+            start = 0
+
+    def _scan_container(self, capture, start):
+        """
+        Advances past the array or object whose opening bracket is at the
+        current position. Returns the (possibly moved) start of the captured text.
+
+        Buffers without backslashes are scanned with numpy: quotes toggle the
+        in-string state, and the value ends where the running bracket depth
+        first returns to zero. Buffers with escapes take the regex path.
+        """
+        import numpy as np
+
+        depth = 0
+        while True:
+            if self.buf.find('\\', self.pos) == -1:
+                codes = np.frombuffer(self.buf[self.pos:].encode('utf-32-le'), dtype=np.uint32)
+                quotes = codes == 34
+                # Only the parity of the quote count matters, so uint8 may wrap around
+                outside = (np.cumsum(quotes, dtype=np.uint8) & 1) == 0
+                steps = (((codes == 91) | (codes == 123)) & outside).view(np.int8)
+                steps = steps - (((codes == 93) | (codes == 125)) & outside).view(np.int8)
+                levels = np.cumsum(steps, dtype=np.int32)
+                levels += depth
+                closed = np.flatnonzero(levels == 0)
+                if len(closed):
+                    self.pos += int(closed[0]) + 1
+                    return start
+                consumed = len(codes)
+                if not outside[-1]:
+                    # Stop before a string cut off at the end of the buffer
+                    consumed = int(np.flatnonzero(quotes)[-1])
+                if consumed:
+                    depth = int(levels[consumed - 1])
+                self.pos += consumed
+            else:
+                while True:
+                    # Only brackets are handled here; the text between them is skipped in one regex match
+                    self.pos = _CONTAINER_TEXT.match(self.buf, self.pos).end()
+                    if self.pos == len(self.buf) or self.buf[self.pos] == '"':
+                        # End of buffer, or a string cut off at the end of it
+                        break
+                    char = self.buf[self.pos]
+                    self.pos += 1
+                    depth += 1 if char in '[{' else -1
+                    if depth == 0:
+                        return start
+            if not self._fill(capture, start):
+                raise ValueError("Unexpected end of JSON document")
+            start = 0
+
+    def read_value(self, capture_text):
+        """
+        Consumes one JSON value and returns its raw text, or None when
+        `capture_text` is False and the value is only being skipped.
+        """
+        self._peek()
+        capture = [] if capture_text else None
+        start = self.pos
+        first = self.buf[self.pos]
+
+        if first == '"':
+            start = self._scan_string(capture, start)
+        elif first in '[{':
+            start = self._scan_container(capture, start)
+        else:
+            while True:
+                match = _SCALAR.match(self.buf, self.pos)
+                end = match.end() if match else self.pos
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    break
+                # A scalar cut off at the chunk boundary; EOF ends the loop above
+                self._fill(capture, start)
+                start = 0
+
+        if capture is None:
+            return None
+        capture.append(self.buf[start:self.pos])
+        return "".join(capture)
+
+    def members(self, wanted=None):
+        """
+        Yields `(key, raw_text)` for every member of the top-level object.
+        `raw_text` is None for members rejected by the `wanted` predicate.
+        """
+        self._expect('{')
+        if self._peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            if self._peek() != '"':
+                raise ValueError("Expected an object key in JSON document")
+            key = json.loads(self.read_value(True))
+            self._expect(':')
+            yield key, self.read_value(wanted is None or wanted(key))
+            separator = self._peek()
+            self.pos += 1
+            if separator == '}':
+                return
+            if separator != ',':
+                raise ValueError(f"Expected ',' or '}}' but found '{separator}' in JSON document")
+
+
+def iter_json_sections(json_path, keys=None, raw=False, chunk_size=CHUNK_SIZE):
+    """
+    Incrementally yields the top-level members of a JSON object file.
+
+    Each member is decoded as soon as its closing bracket has been read, so
+    only one section is held in memory at a time. Members whose key is not in
+    `keys` are skipped without being materialised.
+
+    Args:
+        json_path (str): Path to the JSON file, which may be gzipped or a member of a
+            ZIP archive (see `open_json_source`).
+        keys (Iterable[str], optional): Keys to decode. Defaults to None (all keys).
+        raw (bool, optional): Yield the undecoded JSON text instead of Python objects.
+        chunk_size (int, optional): Number of characters read from disk at a time.
+
+    Yields:
+        tuple: (key, value) for every selected member, in file order.
+    """
+    wanted = None if keys is None else set(keys).__contains__
+    with open_json_source(json_path) as file:
+        for key, text in _TopLevelScanner(file, chunk_size).members(wanted):
+            if text is None:
+                continue
+            yield key, (text if raw else json.loads(text))
+
+
+def read_top_level_keys(json_path, chunk_size=CHUNK_SIZE):
+    """
+    Returns the keys of the top-level JSON object without decoding any values.
+    """
+    with open_json_source(json_path) as file:
+        return [key for key, _ in _TopLevelScanner(file, chunk_size).members(lambda key: False)]
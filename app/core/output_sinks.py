@@ -0,0 +1,479 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from app.core.excel_writer import MAX_SHEET_ROWS, StreamingExcelWriter, sanitize_sheet_name
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet/Feather output is optional
+    pa = None
+    pq = None
+
+# --- Constants ---
+MANIFEST_NAME = "manifest.json"
+CSV_CHUNK_SIZE = 100_000
+CSV_WRITER_THREADS = 4
+# Processes writing the workbooks of the "xlsx-split" format side by side
+EXCEL_WRITER_PROCESSES = 4
+
+
+class OutputSink:
+    """
+    Destination for the section DataFrames of one converted return.
+
+    Every section is written under its config key with a display name (the
+    sheet name). Writing the same key again appends rows to it. Row counts
+    are collected in `manifest`. Use as a context manager; everything is
+    flushed on exit.
+    """
+
+    format_name = None
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.manifest = {"format": self.format_name, "output": os.fspath(output_path), "sections": []}
+        self._sections = {}
+        self._written = set()
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _manifest_entry(self, key, name):
+        entry = self._sections.get(key)
+        if entry is None:
+            entry = {"key": key, "name": name, "rows": 0}
+            self._sections[key] = entry
+            self.manifest["sections"].append(entry)
+        return entry
+
+    def reserve_section(self, key, name):
+        """Fixes the position of a section that will only be written later."""
+        self._manifest_entry(key, name)
+
+    def write_section(self, key, name, df):
+        """Writes (or appends) a section and records its rows in the manifest."""
+        entry = self._manifest_entry(key, name)
+        first = key not in self._written
+        self._written.add(key)
+        self._write(key, name, df, first)
+        entry["rows"] += len(df)
+
+    def _write(self, key, name, df, first):
+        raise NotImplementedError
+
+    def close(self):
+        """Flushes everything to disk. Calling it again does nothing."""
+        if not self._closed:
+            self._closed = True
+            self._close()
+
+    def _close(self):
+        pass
+
+
+class ExcelSink(OutputSink):
+    """
+    All sections as sheets of one workbook, via StreamingExcelWriter.
+    Sections past Excel's row limit are sharded over several sheets; their
+    manifest entries list the sheets with the rows each holds as "shards".
+    """
+
+    format_name = "xlsx"
+
+    def __init__(self, output_path, max_rows=MAX_SHEET_ROWS):
+        super().__init__(output_path)
+        self.writer = StreamingExcelWriter(output_path, max_rows=max_rows)
+
+    def reserve_section(self, key, name):
+        super().reserve_section(key, name)
+        self.writer.add_sheet(name)
+
+    def _write(self, key, name, df, first):
+        self.writer.write_dataframe(name, df, header=first)
+        shards = self.writer.shards[sanitize_sheet_name(name)]
+        if len(shards) > 1:
+            self._sections[key]["shards"] = shards
+
+    def _close(self):
+        self.writer.close()
+
+
+class DirectorySink(OutputSink):
+    """
+    One file per section inside an output directory, plus a manifest.json
+    listing the sections, their files and row counts.
+    """
+
+    extension = None
+
+    def __init__(self, output_path):
+        super().__init__(output_path)
+        os.makedirs(output_path, exist_ok=True)
+
+    def section_path(self, key):
+        return os.path.join(self.output_path, f"{key}{self.extension}")
+
+    def _manifest_entry(self, key, name):
+        entry = super()._manifest_entry(key, name)
+        entry.setdefault("file", os.path.basename(self.section_path(key)))
+        return entry
+
+    def _close(self):
+        with open(os.path.join(self.output_path, MANIFEST_NAME), 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+
+
+class CsvSink(DirectorySink):
+    """
+    CSV files written in chunks on a small thread pool, so writing one section
+    overlaps with processing the next. Each write to a file waits for the
+    previous one to it, so appends land in the order they were made.
+    """
+
+    format_name = "csv"
+    extension = ".csv"
+
+    def __init__(self, output_path, max_workers=CSV_WRITER_THREADS, chunksize=CSV_CHUNK_SIZE):
+        super().__init__(output_path)
+        self.chunksize = chunksize
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="csv-sink")
+        self._pending = []
+        # Latest write submitted per section
+        self._last_writes = {}
+
+    def _write(self, key, name, df, first):
+        path = self.section_path(key)
+        previous = self._last_writes.get(key)
+
+        def write():
+            # Earlier writes were submitted first, so this never waits on one still queued
+            if previous is not None:
+                previous.result()
+            df.to_csv(path, mode='w' if first else 'a', header=first, index=False, chunksize=self.chunksize)
+
+        future = self._executor.submit(write)
+        self._last_writes[key] = future
+        self._pending.append(future)
+
+    def _close(self):
+        try:
+            for future in self._pending:
+                future.result()
+        finally:
+            self._executor.shutdown(wait=True)
+        super()._close()
+
+
+# Workbooks open in an "xlsx-split" writer process, by path
+_open_workbooks = {}
+
+
+def _write_workbook(path, sheet_name, df, header, max_rows):
+    """Writer process side of ExcelSplitSink: appends a frame to one of its workbooks."""
+    writer = _open_workbooks.get(path)
+    if writer is None:
+        writer = _open_workbooks[path] = StreamingExcelWriter(path, max_rows=max_rows)
+    writer.write_dataframe(sheet_name, df, header=header)
+
+
+def _close_workbooks():
+    """Writer process side of ExcelSplitSink: saves every workbook the process holds."""
+    try:
+        for writer in _open_workbooks.values():
+            writer.close()
+    finally:
+        _open_workbooks.clear()
+
+
+class ExcelSplitSink(DirectorySink):
+    """
+    One workbook per section inside an output directory, plus a manifest.json.
+    A section past Excel's row limit is split over several workbooks,
+    "b2b.xlsx", "b2b (2).xlsx", ..., each with the header on top; its
+    manifest entry lists them with the rows each holds as "shards".
+
+    The workbooks are written on a few processes, every workbook always by
+    the same one, so they are built side by side while this process only
+    hands the frames over.
+    """
+
+    format_name = "xlsx-split"
+    extension = ".xlsx"
+
+    def __init__(self, output_path, max_workers=EXCEL_WRITER_PROCESSES, max_rows=MAX_SHEET_ROWS):
+        super().__init__(output_path)
+        self.max_rows = max_rows
+        self._max_workers = max(max_workers or os.cpu_count() or 1, 1)
+        # One single-process pool per writer process, so that the writes to a workbook keep their order
+        self._executors = []
+        self._pending = []
+        # Per section: [path, executor, data rows] of every workbook, the last one open for appends
+        self._workbooks = {}
+
+    def _submit(self, executor, *args):
+        self._pending.append(executor.submit(*args))
+
+    def _executor(self):
+        """The writer process of the next new workbook, round robin."""
+        count = sum(len(workbooks) for workbooks in self._workbooks.values())
+        if len(self._executors) < self._max_workers:
+            self._executors.append(ProcessPoolExecutor(max_workers=1))
+        return self._executors[count % self._max_workers]
+
+    def _shard_path(self, key, number):
+        return os.path.join(self.output_path, f"{key} ({number}){self.extension}")
+
+    def _write(self, key, name, df, first):
+        workbooks = self._workbooks.setdefault(key, [])
+        written = 0
+        while written < len(df) or not workbooks:
+            if not workbooks or workbooks[-1][2] >= self.max_rows - 1:
+                path = self.section_path(key) if not workbooks else self._shard_path(key, len(workbooks) + 1)
+                workbooks.append([path, self._executor(), 0])
+            path, executor, rows = workbooks[-1]
+            part = df.iloc[written:written + self.max_rows - 1 - rows]
+            # Every workbook starts with the header
+            self._submit(executor, _write_workbook, path, name, part, rows == 0, self.max_rows)
+            workbooks[-1][2] += len(part)
+            written += len(part)
+
+        entry = self._sections[key]
+        if len(workbooks) > 1:
+            entry["file"] = None
+            entry["shards"] = []
+            first_row = 1
+            for path, _, rows in workbooks:
+                entry["shards"].append({"file": os.path.basename(path), "sheet": sanitize_sheet_name(name),
+                                        "first_row": first_row, "last_row": first_row + rows - 1})
+                first_row += rows
+
+    def _close(self):
+        try:
+            for future in self._pending:
+                future.result()
+            for future in [executor.submit(_close_workbooks) for executor in self._executors]:
+                future.result()
+        finally:
+            for executor in self._executors:
+                executor.shutdown(wait=True)
+        super()._close()
+
+
+def _decode_categorical(series):
+    try:
+        return series.astype(series.cat.categories.dtype)
+    except (TypeError, ValueError):
+        # Integer categories with missing values
+        return np.asarray(series)
+
+
+class SchemaMismatchError(ValueError):
+    """Raised when a chunk of a section does not fit the Arrow schema of its earlier chunks."""
+
+
+def _cast_column(values, field):
+    """Casts a column to the type of `field`, widening numbers as needed."""
+    if values.type == field.type:
+        return values
+    if pa.types.is_null(values.type):
+        return pa.nulls(len(values), field.type)
+    if pa.types.is_floating(field.type) and (pa.types.is_integer(values.type) or pa.types.is_floating(values.type)):
+        # Widening; Arrow only calls int64 -> float64 unsafe for integers past 2**53
+        return values.cast(field.type, safe=False)
+    try:
+        return values.cast(field.type)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+        raise SchemaMismatchError(
+            f"Column '{field.name}' holds {values.type} values that do not fit its type {field.type}") from e
+
+
+def _cast_table(table, schema):
+    """Casts a table to `schema`; columns it lacks come out empty."""
+    extra = [name for name in table.column_names if schema.get_field_index(name) < 0]
+    if extra:
+        raise SchemaMismatchError(f"Columns {extra} are not in the schema of the section")
+    columns = [_cast_column(table.column(field.name), field) if field.name in table.column_names
+               else pa.nulls(table.num_rows, field.type) for field in schema]
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def _promote_schema(schema, other):
+    """
+    Returns a schema that holds chunks of both `schema` and `other`: types
+    promoted where they differ (e.g. int64 and double to double, or text
+    where nothing else fits) and the columns only `other` has appended.
+    """
+    fields = []
+    for field in schema:
+        index = other.get_field_index(field.name)
+        if index < 0:
+            fields.append(field)
+            continue
+        try:
+            unified = pa.unify_schemas([pa.schema([field]), pa.schema([other.field(index)])],
+                                       promote_options="permissive")
+            fields.append(unified.field(0))
+        except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+            fields.append(pa.field(field.name, pa.string()))
+    fields.extend(field for field in other if schema.get_field_index(field.name) < 0)
+    # The pandas metadata of the first chunk no longer describes the columns
+    return pa.schema(fields)
+
+
+def _to_arrow_table(df, schema=None):
+    """
+    Converts a frame to an Arrow table. Object columns holding mixed types,
+    which Arrow cannot type, are written as text.
+
+    Compacted columns are widened back to the plain types: categoricals to
+    their values, since their dictionaries differ from chunk to chunk (which
+    the Feather file format cannot store), and narrow integers to int64, so
+    every chunk of a section has the same schema. Parquet dictionary- and
+    bit-packs them again on its own.
+
+    With `schema` (of the earlier chunks of a section) the table is cast to
+    it: integers and empty columns are widened to the pinned type.
+
+    Raises:
+        SchemaMismatchError: If a column cannot be cast without losing values,
+            e.g. decimals into an integer column.
+    """
+    widened = {}
+    for column, series in df.items():
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            widened[column] = _decode_categorical(series)
+        elif series.dtype.kind == 'i' and series.dtype.itemsize < 8:
+            widened[column] = series.astype('int64')
+    if widened:
+        df = df.assign(**widened)
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        df = df.copy()
+        for column in df.columns:
+            if df[column].dtype == object:
+                df[column] = df[column].map(lambda value: value if value is None or value != value else str(value))
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    if schema is None:
+        return table
+    if table.schema.equals(schema, check_metadata=False):
+        return table.replace_schema_metadata(schema.metadata)
+    return _cast_table(table, schema)
+
+
+class ArrowSink(DirectorySink):
+    """
+    Base for Arrow-backed formats; keeps one open writer per section for
+    appends. When a chunk does not fit the schema of the section so far, the
+    schema is promoted and the section rewritten with it (see _promote_schema).
+    """
+
+    def __init__(self, output_path):
+        if pa is None:
+            raise ImportError(f"{self.format_name} output requires the 'pyarrow' package")
+        super().__init__(output_path)
+        self._writers = {}
+        self._schemas = {}
+
+    def _open_writer(self, path, schema):
+        raise NotImplementedError
+
+    def _read_table(self, path):
+        raise NotImplementedError
+
+    def _write(self, key, name, df, first):
+        writer = self._writers.get(key)
+        if writer is None:
+            table = _to_arrow_table(df)
+            writer = self._open_writer(self.section_path(key), table.schema)
+            self._writers[key] = writer
+            self._schemas[key] = table.schema
+        else:
+            # Later chunks must match the schema of the first one (Feather writers do not expose it)
+            try:
+                table = _to_arrow_table(df, schema=self._schemas[key])
+            except SchemaMismatchError:
+                # E.g. whole amounts in the first chunk and decimals now
+                table = _to_arrow_table(df)
+                writer = self._promote(key, _promote_schema(self._schemas[key], table.schema))
+                table = _cast_table(table, self._schemas[key])
+        writer.write_table(table)
+
+    def _promote(self, key, schema):
+        """Reopens a section with a promoted schema, rewriting the chunks written so far."""
+        self._writers.pop(key).close()
+        path = self.section_path(key)
+        written = self._read_table(path)
+        writer = self._open_writer(path, schema)
+        writer.write_table(_cast_table(written, schema))
+        self._writers[key] = writer
+        self._schemas[key] = schema
+        return writer
+
+    def _close(self):
+        for writer in self._writers.values():
+            writer.close()
+        super()._close()
+
+
+class ParquetSink(ArrowSink):
+    format_name = "parquet"
+    extension = ".parquet"
+
+    def _open_writer(self, path, schema):
+        return pq.ParquetWriter(path, schema)
+
+    def _read_table(self, path):
+        return pq.read_table(path)
+
+
+class FeatherSink(ArrowSink):
+    format_name = "feather"
+    extension = ".feather"
+
+    def _open_writer(self, path, schema):
+        # Feather v2 is the Arrow IPC file format
+        return pa.ipc.new_file(path, schema)
+
+    def _read_table(self, path):
+        # Read into memory, not mapped, since the file is written over next
+        with pa.OSFile(path) as f:
+            return pa.ipc.open_file(f).read_all()
+
+
+# --- Sink Mapping ---
+# Maps output format names to their sinks
+SINK_MAP = {
+    "xlsx": ExcelSink,
+    "xlsx-split": ExcelSplitSink,
+    "csv": CsvSink,
+    "parquet": ParquetSink,
+    "feather": FeatherSink,
+}
+OUTPUT_FORMATS = tuple(SINK_MAP)
+
+
+def output_extension(output_format):
+    """Extension of the output path for a format; directory formats have none."""
+    return ".xlsx" if output_format == "xlsx" else ""
+
+
+def open_output_sink(output_format, output_path):
+    """
+    Creates the sink for `output_format`. Excel writes one workbook at
+    `output_path`; the other formats, "xlsx-split" included, write a
+    directory of per-section files.
+    """
+    sink_class = SINK_MAP.get(output_format)
+    if sink_class is None:
+        raise ValueError(f"Unknown output format '{output_format}'")
+    return sink_class(output_path)
@@ -0,0 +1,365 @@
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from app.core.conversion_plan import get_conversion_plan
+from app.core.gstr2_converter import CONFIG_PATH, PROCESSOR_MAP
+from app.core.json_stream import iter_json_sections
+from app.core.output_sinks import open_output_sink
+
+# --- Constants ---
+# GSTR-2 sections reconciled against the books, with the document type they hold
+PORTAL_SECTIONS = {"b2b": "Invoice", "cdnr": "Note"}
+AMOUNT_COLUMNS = ["Taxable Value", "IGST", "CGST", "SGST", "Cess"]
+TAX_COLUMNS = ["IGST", "CGST", "SGST", "Cess"]
+KEY_COLUMNS = ["gstin_key", "number_key", "date_key"]
+DEFAULT_TOLERANCE = 1.0
+
+# Formats tried, in order, for dates that are not already dates
+DATE_FORMATS = ["%d-%m-%Y", "%d/%m/%Y", "%Y-%m-%d", "%d.%m.%Y", "%d-%b-%Y", "%d %b %Y", "%Y-%m-%d %H:%M:%S"]
+
+STATUS_MATCHED = "Matched"
+STATUS_AMOUNT_MISMATCH = "Amount mismatch"
+STATUS_MISSING_IN_BOOKS = "Missing in books"
+STATUS_MISSING_IN_2B = "Missing in 2B"
+
+# --- Register Columns ---
+# Accepted purchase register headers for each column, compared without case,
+# spaces or punctuation
+REGISTER_COLUMN_ALIASES = {
+    "GSTIN": ["gstin", "suppliergstin", "gstinofsupplier", "ctin", "partygstin", "gstinuin"],
+    "Document Number": ["invoicenumber", "invoiceno", "invno", "billno", "billnumber", "documentnumber",
+                        "docno", "documentno", "notenumber", "inum", "voucherno", "supplierinvoiceno"],
+    "Date": ["invoicedate", "date", "billdate", "documentdate", "docdate", "idt", "supplierinvoicedate"],
+    "Document Value": ["invoicevalue", "totalvalue", "billvalue", "documentvalue", "val", "grossamount"],
+    "Taxable Value": ["taxablevalue", "taxableamount", "txval", "assessablevalue"],
+    "IGST": ["igst", "integratedtax", "iamt", "igstamount"],
+    "CGST": ["cgst", "centraltax", "camt", "cgstamount"],
+    "SGST": ["sgst", "statetax", "sgstutgst", "utgst", "samt", "sgstamount"],
+    "Cess": ["cess", "csamt", "cessamount"],
+}
+REQUIRED_REGISTER_COLUMNS = ["GSTIN", "Document Number"]
+EXCEL_EXTENSIONS = (".xlsx", ".xlsm", ".xls")
+CSV_EXTENSIONS = (".csv", ".txt")
+
+# Output sections, in workbook order
+OUTPUT_SECTIONS = [
+    ("summary", "Summary"),
+    ("matched", STATUS_MATCHED),
+    ("amount_mismatch", STATUS_AMOUNT_MISMATCH),
+    ("missing_in_books", STATUS_MISSING_IN_BOOKS),
+    ("missing_in_2b", STATUS_MISSING_IN_2B),
+]
+
+_HEADER_NOISE = re.compile(r'[^0-9a-z]')
+
+
+# --- Normalisation ---
+
+def normalise_gstin(series: pd.Series) -> pd.Series:
+    """Upper-cases GSTINs and drops any whitespace."""
+    return series.astype("string").str.upper().str.replace(r'\s+', '', regex=True)
+
+
+def normalise_document_number(series: pd.Series) -> pd.Series:
+    """
+    Fuzzy key for invoice and note numbers: upper case, separators and
+    punctuation removed, and leading zeros of every digit run dropped, so
+    "inv/24-0012", "INV 24 12" and "INV2412" share one key.
+    """
+    keys = series.astype("string").str.upper()
+    # Zeros first, while separators still delimit the digit runs. Written without
+    # lookarounds so that Arrow-backed strings keep the native regex engine.
+    keys = keys.str.replace(r'(^|[^0-9])0+([0-9])', r'\1\2', regex=True)
+    return keys.str.replace(r'[^0-9A-Z]', '', regex=True)
+
+
+def parse_dates(series: pd.Series) -> pd.Series:
+    """
+    Parses a column of dates written in any of DATE_FORMATS. Values that
+    already are dates are kept; anything unparseable becomes NaT. Like
+    `common_processors.parse_dates`, each distinct value is parsed once.
+    """
+    if series.dtype.kind == 'M':
+        return series.dt.normalize()
+    codes, uniques = pd.factorize(series.astype("string").str.strip())
+    text = pd.Series(uniques, dtype="string")
+    parsed = pd.Series(pd.NaT, index=text.index, dtype="datetime64[ns]")
+    for date_format in DATE_FORMATS:
+        missing = parsed.isna() & text.notna()
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(text[missing], format=date_format, errors='coerce')
+    # Code -1 (missing) picks the trailing NaT
+    parsed = np.append(parsed.to_numpy(), np.datetime64('NaT', 'ns'))
+    return pd.Series(parsed[codes], index=series.index)
+
+
+def _add_keys(df):
+    df["gstin_key"] = normalise_gstin(df["GSTIN"])
+    df["number_key"] = normalise_document_number(df["Document Number"])
+    df["date_key"] = parse_dates(df["Date"])
+    return df
+
+
+# --- Loading ---
+
+def load_portal_documents(json_path):
+    """
+    Builds the GSTR-2A/2B documents to reconcile from a return file: the
+    flattened b2b and cdnr sections, with line items summed per document.
+
+    Returns:
+        pd.DataFrame: One row per document, with Section, Document Type, GSTIN,
+            Document Number, Date, Document Value and the AMOUNT_COLUMNS.
+    """
+    plan = get_conversion_plan(CONFIG_PATH, PROCESSOR_MAP)
+    frames = []
+    for key, section_data in iter_json_sections(json_path, keys=set(PORTAL_SECTIONS)):
+        if not section_data or key not in plan.sections:
+            continue
+        items = plan.sections[key].build_df(section_data)
+        del section_data
+        if items.empty:
+            continue
+        items = pd.DataFrame({
+            "GSTIN": items["recipient_gstin"].astype("string"),
+            "Document Number": items["invoice_or_note_number"].astype("string"),
+            # Parsed by the section's date_formats
+            "Date": items["date"],
+            "Document Value": pd.to_numeric(items["total_value"], errors='coerce'),
+            **{column: pd.to_numeric(items[source], errors='coerce') if source in items else 0.0
+               for column, source in zip(AMOUNT_COLUMNS, ["taxable_value", "igst", "cgst", "sgst", "cess"])},
+        })
+        documents = items.groupby(["GSTIN", "Document Number", "Date"], sort=False, dropna=False).agg(
+            {"Document Value": "first", **dict.fromkeys(AMOUNT_COLUMNS, "sum")}).reset_index()
+        documents.insert(0, "Document Type", PORTAL_SECTIONS[key])
+        documents.insert(0, "Section", key)
+        frames.append(documents)
+    if not frames:
+        return pd.DataFrame(columns=["Section", "Document Type", "GSTIN", "Document Number", "Date",
+                                     "Document Value"] + AMOUNT_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _map_register_columns(columns, column_map=None):
+    """Returns {register header: standard column} for the headers that are recognised."""
+    mapping = {}
+    if column_map:
+        mapping.update({source: target for target, source in column_map.items() if source in columns})
+    lookup = {alias: target for target, aliases in REGISTER_COLUMN_ALIASES.items() for alias in aliases}
+    taken = set(mapping.values())
+    for column in columns:
+        if column in mapping:
+            continue
+        target = lookup.get(_HEADER_NOISE.sub('', str(column).lower()))
+        if target is not None and target not in taken:
+            mapping[column] = target
+            taken.add(target)
+    return mapping
+
+
+def load_purchase_register(register_path, sheet_name=0, column_map=None):
+    """
+    Reads a purchase register from CSV or Excel and maps its headers to the
+    standard columns using REGISTER_COLUMN_ALIASES.
+
+    Args:
+        register_path (str): A .csv, .xlsx or .xls file.
+        sheet_name (str | int, optional): Sheet of an Excel register. Defaults to the first.
+        column_map (dict, optional): Standard column -> register header, for headers the
+            aliases do not recognise (e.g. {"Document Number": "Vch Ref"}).
+
+    Returns:
+        pd.DataFrame: The register rows with the standard columns. Missing amount
+            columns are filled with 0.
+
+    Raises:
+        ValueError: If the file type is not supported, or the GSTIN or document number
+            column cannot be found.
+    """
+    extension = os.path.splitext(os.fspath(register_path))[1].lower()
+    if extension in EXCEL_EXTENSIONS:
+        raw = pd.read_excel(register_path, sheet_name=sheet_name, dtype=object)
+    elif extension in CSV_EXTENSIONS:
+        raw = pd.read_csv(register_path, dtype=str, keep_default_na=False, na_values=[""])
+    else:
+        raise ValueError(f"Unsupported purchase register '{register_path}'; expected a CSV or Excel file")
+
+    mapping = _map_register_columns(list(raw.columns), column_map)
+    missing = [column for column in REQUIRED_REGISTER_COLUMNS if column not in mapping.values()]
+    if missing:
+        raise ValueError(f"Purchase register has no column for {', '.join(missing)}; "
+                         f"found {', '.join(map(str, raw.columns))}")
+
+    register = raw[list(mapping)].rename(columns=mapping)
+    if "Date" not in register:
+        register["Date"] = pd.NaT
+    for column in ["Document Value"] + AMOUNT_COLUMNS:
+        if column in register:
+            text = register[column].astype("string").str.replace(',', '', regex=False)
+            register[column] = pd.to_numeric(text, errors='coerce').fillna(0.0)
+        else:
+            register[column] = 0.0
+    register = register.dropna(subset=["GSTIN", "Document Number"], how="all")
+    return register.reset_index(drop=True)
+
+
+# --- Matching ---
+
+def _collapse(df):
+    """
+    Sums the rows of one side that share a key, so that every join below is
+    one-to-one. Returns the documents and how many rows each one stands for.
+    """
+    grouped = df.groupby(KEY_COLUMNS, sort=False, dropna=False)
+    documents = grouped.agg({
+        "GSTIN": "first", "Document Number": "first", "Date": "first", "Document Value": "sum",
+        **dict.fromkeys(AMOUNT_COLUMNS, "sum"),
+        **({"Section": "first", "Document Type": "first"} if "Section" in df else {}),
+    }).reset_index()
+    documents["Rows"] = grouped.size().to_numpy()
+    return documents
+
+
+def _suffixed(df, suffix, keys):
+    return df.rename(columns={column: f"{column} ({suffix})" for column in df.columns if column not in keys})
+
+
+def _unique_on(df, keys):
+    return df[~df.duplicated(keys, keep=False)]
+
+
+def _anti_join(df, other, keys):
+    """Rows of `df` whose `keys` do not occur in `other`, in their original order."""
+    marked = df.merge(other[keys].drop_duplicates(), on=keys, how="left", indicator=True)
+    return df[(marked["_merge"] == "left_only").to_numpy()]
+
+
+def reconcile_documents(portal, books, tolerance=DEFAULT_TOLERANCE):
+    """
+    Matches GSTR-2A/2B documents against purchase register documents.
+
+    Both sides are keyed on the normalised GSTIN, document number and date
+    and joined with hash merges, in two passes: first on all three keys, then
+    the leftovers on GSTIN and number alone (dates often differ between the
+    supplier's filing and the books). The second pass only pairs documents
+    whose key is unique on both sides, so it never guesses.
+
+    Args:
+        portal (pd.DataFrame): Output of `load_portal_documents`.
+        books (pd.DataFrame): Output of `load_purchase_register`.
+        tolerance (float, optional): Largest difference in taxable value or total
+            tax still treated as a match. Defaults to 1.0.
+
+    Returns:
+        dict: Section key of OUTPUT_SECTIONS -> DataFrame.
+    """
+    portal = _collapse(_add_keys(portal.copy()))
+    books = _collapse(_add_keys(books.copy()))
+
+    # Pass 1: GSTIN, number and date
+    exact = _suffixed(portal, "2B", KEY_COLUMNS).merge(_suffixed(books, "Books", KEY_COLUMNS), on=KEY_COLUMNS)
+    exact["Matched On"] = "GSTIN, number and date"
+    portal_left = _anti_join(portal, exact, KEY_COLUMNS)
+    books_left = _anti_join(books, exact, KEY_COLUMNS)
+
+    # Pass 2: GSTIN and number, where that pair is unambiguous on both sides
+    loose_keys = ["gstin_key", "number_key"]
+    loose = _suffixed(_unique_on(portal_left, loose_keys), "2B", loose_keys).merge(
+        _suffixed(_unique_on(books_left, loose_keys), "Books", loose_keys), on=loose_keys)
+    loose["Matched On"] = "GSTIN and number"
+    missing_in_books = _anti_join(portal_left, loose, loose_keys)
+    missing_in_2b = _anti_join(books_left, loose, loose_keys)
+
+    pairs = pd.concat([exact, loose], ignore_index=True)
+
+    # Amount checks on the pairs, vectorised
+    pairs["Tax (2B)"] = pairs[[f"{column} (2B)" for column in TAX_COLUMNS]].sum(axis=1)
+    pairs["Tax (Books)"] = pairs[[f"{column} (Books)" for column in TAX_COLUMNS]].sum(axis=1)
+    pairs["Taxable Difference"] = (pairs["Taxable Value (2B)"] - pairs["Taxable Value (Books)"]).round(2)
+    pairs["Tax Difference"] = (pairs["Tax (2B)"] - pairs["Tax (Books)"]).round(2)
+    within = (pairs["Taxable Difference"].abs() <= tolerance) & (pairs["Tax Difference"].abs() <= tolerance)
+    pairs["Status"] = STATUS_AMOUNT_MISMATCH
+    pairs.loc[within, "Status"] = STATUS_MATCHED
+
+    pair_columns = (["Section (2B)", "Document Type (2B)", "GSTIN (2B)", "Document Number (2B)",
+                     "Document Number (Books)", "Date (2B)", "Date (Books)", "Matched On",
+                     "Taxable Value (2B)", "Taxable Value (Books)", "Taxable Difference",
+                     "Tax (2B)", "Tax (Books)", "Tax Difference"]
+                    + [f"{column} ({side})" for column in TAX_COLUMNS for side in ("2B", "Books")]
+                    + ["Document Value (2B)", "Document Value (Books)", "Rows (Books)", "Status"])
+    pairs = pairs[pair_columns].rename(columns={"Section (2B)": "Section", "Document Type (2B)": "Document Type",
+                                                "GSTIN (2B)": "GSTIN"})
+
+    side_columns = ["GSTIN", "Document Number", "Date", "Document Value"] + AMOUNT_COLUMNS
+    missing_in_books = missing_in_books[["Section", "Document Type"] + side_columns].assign(
+        Status=STATUS_MISSING_IN_BOOKS)
+    missing_in_2b = missing_in_2b[side_columns + ["Rows"]].assign(Status=STATUS_MISSING_IN_2B)
+
+    sections = {
+        "matched": pairs[pairs["Status"] == STATUS_MATCHED].reset_index(drop=True),
+        "amount_mismatch": pairs[pairs["Status"] == STATUS_AMOUNT_MISMATCH].reset_index(drop=True),
+        "missing_in_books": missing_in_books.reset_index(drop=True),
+        "missing_in_2b": missing_in_2b.reset_index(drop=True),
+    }
+    sections["summary"] = _summary(sections)
+    return sections
+
+
+def _summary(sections):
+    rows = []
+    for key, status in OUTPUT_SECTIONS[1:]:
+        df = sections[key]
+        if key in ("matched", "amount_mismatch"):
+            taxable_2b, taxable_books = df["Taxable Value (2B)"].sum(), df["Taxable Value (Books)"].sum()
+            tax_2b, tax_books = df["Tax (2B)"].sum(), df["Tax (Books)"].sum()
+        elif key == "missing_in_books":
+            taxable_2b, taxable_books = df["Taxable Value"].sum(), 0.0
+            tax_2b, tax_books = df[TAX_COLUMNS].sum().sum(), 0.0
+        else:
+            taxable_2b, taxable_books = 0.0, df["Taxable Value"].sum()
+            tax_2b, tax_books = 0.0, df[TAX_COLUMNS].sum().sum()
+        rows.append((status, len(df), round(taxable_2b, 2), round(taxable_books, 2),
+                     round(tax_2b, 2), round(tax_books, 2)))
+    return pd.DataFrame(rows, columns=["Status", "Documents", "Taxable Value (2B)", "Taxable Value (Books)",
+                                       "Tax (2B)", "Tax (Books)"])
+
+
+def reconcile_gstr2(json_path, register_path, output_path, tolerance=DEFAULT_TOLERANCE, output_format="xlsx",
+                    sheet_name=0, column_map=None):
+    """
+    Reconciles a GSTR-2A/2B return with a purchase register and writes a
+    workbook with a Summary sheet and one sheet per status.
+
+    Args:
+        json_path (str): The GSTR-2A/2B JSON file.
+        register_path (str): The purchase register (.csv or Excel).
+        output_path (str): The workbook, or directory for the other formats, to write.
+        tolerance (float, optional): See `reconcile_documents`. Defaults to 1.0.
+        output_format (str, optional): One of OUTPUT_FORMATS. Defaults to "xlsx".
+        sheet_name, column_map: See `load_purchase_register`.
+
+    Returns a tuple (success, message).
+    """
+    try:
+        portal = load_portal_documents(json_path)
+    except Exception as e:
+        return (False, f"Error reading GSTR-2 file: {e}")
+    try:
+        books = load_purchase_register(register_path, sheet_name=sheet_name, column_map=column_map)
+    except Exception as e:
+        return (False, f"Error reading purchase register: {e}")
+
+    try:
+        sections = reconcile_documents(portal, books, tolerance)
+        with open_output_sink(output_format, output_path) as sink:
+            for key, name in OUTPUT_SECTIONS:
+                sink.write_section(key, name, sections[key])
+    except Exception as e:
+        return (False, f"Error during reconciliation: {e}")
+
+    counts = ", ".join(f"{len(sections[key])} {name.lower()}" for key, name in OUTPUT_SECTIONS[1:])
+    return (True, f"Reconciled {len(portal)} 2B and {len(books)} register documents ({counts}) into {output_path}")
@@ -0,0 +1,206 @@
+import json
+
+import pandas as pd
+
+from app.core.conversion_plan import get_conversion_plan
+from app.core.json_sources import open_json_source, source_size
+from app.core.json_stream import iter_json_sections
+from app.core.output_sinks import open_output_sink
+from app.core.section_pipeline import SectionPipeline
+from app.core.section_reports import add_to_reports, build_reports, write_reports
+from app.utils.logger import NULL_PROFILER, ConversionResult
+
+# --- Constants ---
+BASIC_INFO_KEYS = ["gstin", "fp", "gt", "cur_gt"]
+
+# --- Main Conversion Function ---
+
+def convert_return(json_path, excel_path, config_path, processor_map, converter_module, stream=False,
+                   output_format="xlsx", section_workers=None, profiler=None, summaries=False, validate=False,
+                   amendments=False):
+    """
+    Reads a return, processes all its sections based on the processor
+    configuration at `config_path`, and writes them to separate sheets in an
+    Excel file. The GSTR-1 and GSTR-2 converters are thin wrappers around it.
+
+    With `stream=True` the return is read one top-level section at a time, so
+    peak memory depends on the largest section rather than the whole file.
+    Sheets are then written in the order the sections appear in the file, and
+    sections not mapped in the configuration are never decoded.
+
+    `output_format` selects the output sink (see `output_sinks.SINK_MAP`):
+    "xlsx" writes one workbook at `excel_path`, sharding sections past
+    Excel's row limit over "B2B", "B2B (2)", ... sheets; "xlsx-split",
+    "csv", "parquet" and "feather" write a directory at `excel_path` with one
+    file per section (oversized ones split over several workbooks for
+    "xlsx-split") and a manifest.json of sections and row counts.
+
+    With `section_workers` above 1 the sections are parsed and processed
+    concurrently on that many processes, while a single writer writes them in
+    config order as they finish. Wall time then approaches that of the
+    slowest section rather than the sum of all of them.
+
+    Pass a `Profiler` (app.utils.logger) as `profiler` to record the time,
+    rows and memory of every stage and section; its ConversionReport comes
+    back as the `report` attribute of the result.
+
+    With `summaries=True` the output ends with rate-, place of supply-,
+    counterparty- and month-wise summary sheets over the invoice and note
+    sections (credit notes subtracted), and a "Totals Check" sheet listing
+    the net totals of the sections and checking that every summary sheet
+    adds up to them.
+
+    With `validate=True` every section is checked as it is written (invoice
+    values, IGST against CGST/SGST, duplicate numbers, HSN totals; see
+    `validation.ValidationBuilder`) and what fails is listed in an
+    "Exceptions" sheet.
+
+    With `amendments=True` every section that another one amends (e.g. b2b
+    by b2ba; see the "amends" entries of the config) gets a net sheet as well:
+    the original documents with every amended one replaced by its latest
+    amendment, and an "Amendment Trail" column saying what each replaced.
+
+    Args:
+        json_path (str): The return, see `json_sources.open_json_source`.
+        excel_path (str): The workbook, or for directory formats the folder, to write.
+        config_path (str): The processor configuration of the return type.
+        processor_map (dict): Processor names of the configuration -> functions.
+        converter_module (str): Module defining `processor_map` as PROCESSOR_MAP; the
+            section workers of `section_workers` import it to rebuild the plan.
+
+    Returns a ConversionResult, which unpacks like the tuple (success, message).
+    """
+    profiler = profiler or NULL_PROFILER
+    reports = build_reports(summaries, validate, amendments)
+    success, message = _convert(json_path, excel_path, config_path, processor_map, converter_module, stream,
+                                output_format, section_workers, profiler, reports)
+    return ConversionResult(success, message, profiler.finish(success=success))
+
+def _convert(json_path, excel_path, config_path, processor_map, converter_module, stream, output_format,
+             section_workers, profiler, reports=()):
+    """
+    Body of `convert_return`; returns a plain (success, message) tuple.
+    """
+    if not stream and not (section_workers and section_workers > 1):
+        try:
+            with profiler.stage("load") as stage, open_json_source(json_path) as f:
+                data = json.load(f)
+                stage.set(bytes=source_size(json_path))
+        except Exception as e:
+            return (False, f"Error reading or parsing JSON file: {e}")
+
+    try:
+        # Compiled once per config file and reused until the file changes
+        with profiler.stage("plan"):
+            plan = get_conversion_plan(config_path, processor_map)
+    except Exception as e:
+        return (False, f"Error reading processor configuration file: {e}")
+
+    if section_workers and section_workers > 1:
+        return _convert_pipeline(json_path, excel_path, plan, converter_module, output_format, section_workers,
+                                 profiler, reports)
+    if stream:
+        return _convert_streaming(json_path, excel_path, plan, output_format, profiler, reports)
+
+    try:
+        with open_output_sink(output_format, excel_path) as sink:
+            # 1. Create and write the Basic Info sheet
+            with profiler.stage("basic_info"):
+                basic_info_df = create_basic_info_df(data)
+                sink.write_section('basic_info', 'Basic Info', basic_info_df)
+
+            # 2. Process and write each major section based on the config
+            for key, section in plan.sections.items():
+                if key in data and data[key]:
+                    write_section(sink, section, data[key], profiler, reports, data)
+            write_reports(sink, reports, data, profiler)
+
+            with profiler.stage("save"):
+                sink.close()
+
+        return (True, f"Successfully converted {json_path} to {excel_path}")
+    except Exception as e:
+        return (False, f"Error during Excel conversion: {e}")
+
+def _convert_streaming(json_path, excel_path, plan, output_format="xlsx", profiler=NULL_PROFILER, reports=()):
+    """
+    Streaming variant of `convert_return`. Each section is handed to
+    its processor as soon as it has been parsed and released once its sheet
+    has been written.
+    """
+    wanted_keys = set(BASIC_INFO_KEYS) | set(plan.sections)
+    basic_info = {}
+    try:
+        with open_output_sink(output_format, excel_path) as sink:
+            # Reserve the first sheet; basic info keys may appear anywhere in the file
+            sink.reserve_section('basic_info', 'Basic Info')
+
+            sections = iter_json_sections(json_path, keys=wanted_keys)
+            for key, section_data in profiler.iter_stages(sections, lambda item: f"read {item[0]}"):
+                if key in plan.sections:
+                    if section_data:
+                        write_section(sink, plan.sections[key], section_data, profiler, reports, basic_info)
+                else:
+                    basic_info[key] = section_data
+                del section_data
+
+            with profiler.stage("basic_info"):
+                sink.write_section('basic_info', 'Basic Info', create_basic_info_df(basic_info))
+            write_reports(sink, reports, basic_info, profiler)
+            with profiler.stage("save"):
+                sink.close()
+
+        return (True, f"Successfully converted {json_path} to {excel_path}")
+    except Exception as e:
+        return (False, f"Error during streaming Excel conversion: {e}")
+
+def _convert_pipeline(json_path, excel_path, plan, converter_module, output_format, section_workers,
+                      profiler=NULL_PROFILER, reports=()):
+    """
+    Pipeline variant of `convert_return`. Sections are built on a
+    process pool and written by this process, one at a time, in config order.
+    """
+    try:
+        with SectionPipeline(converter_module, section_workers, profiler=profiler) as pipeline:
+            basic_info = pipeline.submit(json_path, plan, extra_keys=BASIC_INFO_KEYS)
+            with open_output_sink(output_format, excel_path) as sink:
+                with profiler.stage("basic_info"):
+                    sink.write_section('basic_info', 'Basic Info', create_basic_info_df(basic_info))
+                for section, section_df in pipeline.results():
+                    with profiler.stage(f"write {section.key}"):
+                        sink.write_section(section.key, section.sheet_name, section_df)
+                    add_to_reports(reports, section, section_df, basic_info, profiler)
+                write_reports(sink, reports, basic_info, profiler)
+                with profiler.stage("save"):
+                    sink.close()
+
+        return (True, f"Successfully converted {json_path} to {excel_path}")
+    except Exception as e:
+        return (False, f"Error during parallel Excel conversion: {e}")
+
+def write_section(sink, section, section_data, profiler=NULL_PROFILER, reports=(), basic_info=None):
+    """
+    Processes one section according to its SectionPlan and writes it to the
+    output sink, then hands it to the section `reports` (see section_reports).
+    Failures are reported and skipped so that the remaining sections
+    are still converted.
+    """
+    try:
+        with profiler.stage(section.key) as stage:
+            section_df = section.build_df(section_data, profiler)
+            stage.set(rows=len(section_df))
+            if not section_df.empty:
+                with profiler.stage("write"):
+                    sink.write_section(section.key, section.sheet_name, section_df)
+                add_to_reports(reports, section, section_df, basic_info, profiler)
+    except Exception as e:
+        print(f"Warning: Could not process section '{section.key}'. Error: {e}")
+
+# --- Helper Functions ---
+
+def create_basic_info_df(data):
+    """
+    Extracts the non-nested, basic information from the JSON data.
+    """
+    info = {key: data.get(key) for key in BASIC_INFO_KEYS if key in data}
+    return pd.DataFrame(list(info.items()), columns=['Key', 'Value'])
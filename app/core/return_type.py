@@ -0,0 +1,79 @@
+import json
+import os
+from pathlib import Path
+
+from app.core.json_stream import read_top_level_keys
+
+# --- Constants ---
+# Kept free of pandas so that detection stays cheap for the CLI
+BASE_CONFIG_DIR = Path(__file__).resolve().parents[2] / "resources" / "configs"
+CONFIG_PATHS = {
+    "gstr1": BASE_CONFIG_DIR / "gstr1_processors.json",
+    "gstr2": BASE_CONFIG_DIR / "gstr2_processors.json",
+}
+RETURN_TYPES = tuple(CONFIG_PATHS)
+
+# Keys every return carries; they say nothing about its type
+SHARED_KEYS = {"gstin", "fp"}
+FILENAME_HINTS = {
+    "gstr1": ("gstr1", "gstr-1", "_r1_"),
+    "gstr2": ("gstr2", "gstr-2", "gstr2a", "gstr2b", "_2a_", "_2b_"),
+}
+
+_marker_keys = None
+
+
+def _get_marker_keys():
+    """
+    Returns, per return type, the top-level keys that only its processor
+    config knows about.
+    """
+    global _marker_keys
+    if _marker_keys is None:
+        config_keys = {}
+        for return_type, config_path in CONFIG_PATHS.items():
+            with open(config_path, 'r') as f:
+                config_keys[return_type] = set(json.load(f))
+        _marker_keys = {
+            return_type: keys - SHARED_KEYS - set().union(*(other for name, other in config_keys.items() if name != return_type))
+            for return_type, keys in config_keys.items()
+        }
+    return _marker_keys
+
+
+def detect_return_type(json_path, default="gstr1"):
+    """
+    Detects whether a JSON file is a GSTR-1 or a GSTR-2A/B return.
+
+    Only the top-level keys are scanned, so this is cheap even for large files.
+    Keys unique to one processor config decide; ties fall back to hints in the
+    file name and then to `default`.
+
+    Returns:
+        str: "gstr1" or "gstr2", or None if the file is not a JSON object.
+    """
+    try:
+        keys = set(read_top_level_keys(json_path))
+    except (OSError, ValueError) as e:
+        print(f"Error in detect_return_type: {e}")
+        return None
+    return detect_return_type_from_keys(keys, json_path, default)
+
+
+def detect_return_type_from_keys(keys, json_path="", default="gstr1"):
+    """
+    Same as `detect_return_type`, for callers that already know the
+    top-level keys of the file. `json_path` is only used for name hints.
+    """
+    keys = set(keys)
+    scores = {return_type: len(keys & markers) for return_type, markers in _get_marker_keys().items()}
+    best = max(scores.values())
+    candidates = [return_type for return_type, score in scores.items() if score == best]
+    if len(candidates) == 1:
+        return candidates[0]
+
+    name = os.path.basename(os.fspath(json_path)).lower()
+    for return_type in candidates:
+        if any(hint in name for hint in FILENAME_HINTS[return_type]):
+            return return_type
+    return default
@@ -0,0 +1,114 @@
+import importlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.core.conversion_plan import get_conversion_plan
+from app.core.json_sources import source_size
+from app.core.json_stream import iter_json_sections
+from app.utils.logger import NULL_PROFILER
+
+
+def _build_section(converter_module, config_path, key, raw_text):
+    """
+    Worker entry point: parses one section's raw JSON text and runs its
+    processor. Returns (DataFrame or None, error message or None, seconds)
+    and never raises, so one bad section does not take the others down.
+    """
+    start = time.perf_counter()
+    try:
+        section_data = json.loads(raw_text)
+        del raw_text
+        if not section_data:
+            return None, None, time.perf_counter() - start
+        # Compiled once per worker process, then served from the plan cache
+        module = importlib.import_module(converter_module)
+        plan = get_conversion_plan(config_path, module.PROCESSOR_MAP)
+        return plan.sections[key].build_df(section_data), None, time.perf_counter() - start
+    except Exception as e:
+        return None, str(e), time.perf_counter() - start
+
+
+class SectionPipeline:
+    """
+    Builds the sections of one return concurrently on a process pool, while
+    the caller writes the finished DataFrames in config order.
+
+    The file is scanned once and each wanted section is handed to a worker
+    as raw JSON text, so parsing is parallel too and nothing large is
+    pickled on the way in. Results are yielded in config order as soon as
+    the next one is ready, which lets a single writer stay busy while later
+    sections are still being built.
+
+    Args:
+        converter_module (str): Module defining the PROCESSOR_MAP the plan was built from.
+        max_workers (int, optional): Pool size. Defaults to None (one per CPU).
+        mp_context (optional): multiprocessing context for the pool.
+        profiler (Profiler, optional): Records the scan and, per section, the
+            time its worker spent building it.
+    """
+
+    def __init__(self, converter_module, max_workers=None, mp_context=None, profiler=NULL_PROFILER):
+        self.converter_module = converter_module
+        self.profiler = profiler
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.mp_context = mp_context
+        self._executor = None
+        self._plan = None
+        self._futures = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def submit(self, json_path, plan, extra_keys=()):
+        """
+        Scans `json_path` and submits every section known to `plan`.
+
+        Args:
+            json_path (str): The return file.
+            plan (ConversionPlan): The compiled config the sections are built with.
+            extra_keys (iterable, optional): Other top-level keys to parse here and return.
+
+        Returns:
+            dict: The values of the `extra_keys` present in the file.
+        """
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=self.mp_context)
+        self._plan = plan
+        extra_keys = set(extra_keys)
+        extras = {}
+        with self.profiler.stage("scan") as stage:
+            for key, raw_text in iter_json_sections(json_path, keys=extra_keys | set(plan.sections), raw=True):
+                if key in plan.sections:
+                    self._futures[key] = self._executor.submit(
+                        _build_section, self.converter_module, plan.config_path, key, raw_text)
+                else:
+                    extras[key] = json.loads(raw_text)
+                del raw_text
+            stage.set(bytes=source_size(json_path))
+        return extras
+
+    def results(self):
+        """
+        Yields (SectionPlan, DataFrame) in config order for every submitted
+        section that produced rows. Failed sections are reported and skipped.
+        """
+        for key, section in self._plan.sections.items():
+            future = self._futures.pop(key, None)
+            if future is None:
+                continue
+            section_df, error, seconds = future.result()
+            self.profiler.add(key, seconds, rows=None if section_df is None else len(section_df))
+            if error is not None:
+                print(f"Warning: Could not process section '{key}'. Error: {error}")
+            elif section_df is not None and not section_df.empty:
+                yield section, section_df
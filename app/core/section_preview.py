@@ -0,0 +1,351 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from app.core.common_processors import GST_DATE_FORMAT
+from app.core.consolidator import PROCESSOR_MAPS
+from app.core.conversion_plan import get_conversion_plan
+from app.core.json_stream import iter_json_sections, read_top_level_keys
+from app.core.output_sinks import MANIFEST_NAME
+from app.core.return_type import CONFIG_PATHS, detect_return_type
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet/Feather output is optional
+    pa = None
+    pq = None
+
+# --- Constants ---
+# Rows are fetched, formatted and cached a page at a time
+PAGE_ROWS = 500
+MAX_CACHED_PAGES = 64
+# Decoded Parquet row groups / Feather record batches kept per section file
+MAX_CACHED_CHUNKS = 4
+# Output formats whose section files can be read without converting again
+PREVIEW_FORMATS = ("csv", "parquet", "feather")
+
+
+# --- Display ---
+
+def display_values(series):
+    """
+    Formats a column for display the way the workbook shows it: dates as
+    dd-mm-yyyy, amounts with two decimals and missing values blank.
+
+    Returns:
+        np.ndarray: One string per value (object dtype).
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Formatted once per category; code -1 (missing) picks the blank at the end
+        texts = np.append(display_values(pd.Series(series.cat.categories)), "")
+        return texts[series.cat.codes.to_numpy()]
+    kind = series.dtype.kind
+    if kind == 'M':
+        return series.dt.strftime(GST_DATE_FORMAT).fillna("").to_numpy(dtype=object)
+    if kind == 'f':
+        values = series.to_numpy(dtype=float, na_value=np.nan)
+        texts = np.array([f"{value:.2f}" for value in values], dtype=object)
+        texts[np.isnan(values)] = ""
+        return texts
+    if kind in 'iub':
+        return series.astype(str).to_numpy(dtype=object)
+    if isinstance(series.dtype, pd.StringDtype):
+        return series.fillna("").to_numpy(dtype=object)
+    # Mixed columns, e.g. amounts the JSON gave as both integers and decimals
+    return np.array(["" if value is None or value is pd.NA or value is pd.NaT or value != value
+                     else f"{value:.2f}" if isinstance(value, float) else str(value)
+                     for value in series.astype(object)], dtype=object)
+
+
+def _is_numeric(series):
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        dtype = dtype.categories.dtype
+    if dtype == object:
+        return pd.api.types.infer_dtype(series, skipna=True) in ("floating", "integer", "mixed-integer-float")
+    return dtype.kind in 'iuf'
+
+
+def _matches(series, text):
+    """Boolean array: which values contain `text` as displayed, ignoring case."""
+    # Matched once per distinct value, so repetitive columns cost next to nothing
+    codes, uniques = pd.factorize(series)
+    texts = pd.Series(uniques)
+    if not isinstance(texts.dtype, pd.StringDtype):
+        texts = pd.Series(display_values(texts), dtype=object)
+    hits = np.append(texts.str.contains(text, case=False, regex=False).to_numpy(dtype=bool), False)
+    return hits[codes]
+
+
+# --- Sources ---
+
+class FrameSource:
+    """Rows of a section DataFrame held in memory."""
+
+    def __init__(self, df):
+        self.df = df.reset_index(drop=True)
+        self.columns = [str(column) for column in self.df.columns]
+        self.num_rows = len(self.df)
+
+    def take(self, positions):
+        """The rows at `positions`, in that order."""
+        return self.df.iloc[positions]
+
+    def column(self, index):
+        """The whole column `index`, for sorting and filtering."""
+        return self.df.iloc[:, index]
+
+
+class ArrowFileSource:
+    """
+    Rows of a Parquet or Feather section file, read one row group or record
+    batch at a time. Feather files are memory-mapped, so only the chunks
+    that are looked at are paged in; at most MAX_CACHED_CHUNKS decoded
+    chunks are kept. Reads are serialised, so whole columns can be read on
+    a worker thread while rows are being browsed.
+    """
+
+    def __init__(self, path):
+        if pa is None:
+            raise ImportError("Previewing Parquet/Feather output requires the 'pyarrow' package")
+        if path.endswith(".feather"):
+            self._reader = pa.ipc.open_file(pa.memory_map(path))
+            self._parquet = None
+            schema = self._reader.schema
+            sizes = [self._reader.get_batch(i).num_rows for i in range(self._reader.num_record_batches)]
+        else:
+            self._reader = None
+            self._parquet = pq.ParquetFile(path, memory_map=True)
+            schema = self._parquet.schema_arrow
+            metadata = self._parquet.metadata
+            sizes = [metadata.row_group(i).num_rows for i in range(metadata.num_row_groups)]
+        self.columns = list(schema.names)
+        self._offsets = np.cumsum([0] + sizes)
+        self.num_rows = int(self._offsets[-1])
+        self._chunks = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _chunk(self, number):
+        with self._lock:
+            table = self._chunks.get(number)
+            if table is None:
+                if self._reader is not None:
+                    table = pa.Table.from_batches([self._reader.get_batch(number)])
+                else:
+                    table = self._parquet.read_row_group(number)
+                self._chunks[number] = table
+                if len(self._chunks) > MAX_CACHED_CHUNKS:
+                    self._chunks.popitem(last=False)
+            else:
+                self._chunks.move_to_end(number)
+            return table
+
+    def take(self, positions):
+        """The rows at `positions`, in that order."""
+        positions = np.asarray(positions, dtype=np.int64)
+        chunk_numbers = np.searchsorted(self._offsets, positions, side='right') - 1
+        # Gathered chunk by chunk, then put back in the order asked for
+        grouped = np.argsort(chunk_numbers, kind='stable')
+        pieces = []
+        for number in np.unique(chunk_numbers):
+            local = positions[chunk_numbers == number] - self._offsets[number]
+            pieces.append(self._chunk(int(number)).take(pa.array(local)))
+        if not pieces:
+            return pd.DataFrame(columns=self.columns)
+        df = pa.concat_tables(pieces).to_pandas()
+        return df.iloc[np.argsort(grouped)]
+
+    def column(self, index):
+        """The whole column `index`, for sorting and filtering."""
+        with self._lock:
+            if self._reader is not None:
+                array = self._reader.read_all().column(index)
+            else:
+                array = self._parquet.read(columns=[self.columns[index]]).column(0)
+        return array.to_pandas()
+
+
+# --- Views ---
+
+class SectionView:
+    """
+    One section as a table that is sorted and filtered by pandas and read a
+    page of PAGE_ROWS rows at a time, so browsing costs the same whether the
+    section has a thousand rows or a million. At most MAX_CACHED_PAGES
+    formatted pages are kept.
+
+    Args:
+        source (FrameSource | ArrowFileSource): Where the rows come from.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.columns = source.columns
+        self.numeric = [False] * len(self.columns)
+        # Source rows in sort order, the rows that pass the filter, and those of
+        # them in sort order as displayed; None is all rows, unsorted
+        self._sorted = None
+        self._mask = None
+        self._rows = None
+        self._pages = OrderedDict()
+
+    def __len__(self):
+        return self.source.num_rows if self._rows is None else len(self._rows)
+
+    @property
+    def total_rows(self):
+        """Rows of the section, filtered or not."""
+        return self.source.num_rows
+
+    def source_row(self, index):
+        """Position of displayed row `index` in the section."""
+        return index if self._rows is None else int(self._rows[index])
+
+    def sort(self, column=None, ascending=True):
+        """Sorts by column `column` (an index), keeping ties in section order; None restores it."""
+        if column is None or column < 0:
+            self._sorted = None
+        else:
+            values = self.source.column(column).reset_index(drop=True)
+            self._sorted = values.sort_values(ascending=ascending, kind='stable', na_position='last').index.to_numpy()
+        self._refresh()
+
+    def match(self, text, column=None):
+        """
+        Finds the rows whose displayed value in column `column` (an index, or
+        None for any column) contains `text`, ignoring case. Only reads the
+        source, so it can run on a worker thread while the view is browsed.
+
+        Returns:
+            np.ndarray: A boolean mask over the rows of the section, or None for an empty text.
+        """
+        if not text:
+            return None
+        columns = range(len(self.columns)) if column is None else [column]
+        mask = np.zeros(self.source.num_rows, dtype=bool)
+        for index in columns:
+            mask |= _matches(self.source.column(index), text)
+        return mask
+
+    def filter(self, text, column=None, mask=None):
+        """
+        Keeps the rows that `match(text, column)`; pass the `mask` it returned
+        if it was computed already. An empty text shows every row again.
+        """
+        self._mask = self.match(text, column) if mask is None else mask
+        self._refresh()
+
+    def _refresh(self):
+        rows = self._sorted
+        if self._mask is not None:
+            rows = np.flatnonzero(self._mask) if rows is None else rows[self._mask[rows]]
+        self._rows = rows
+        self._pages.clear()
+
+    def row(self, index):
+        """The displayed texts of row `index`."""
+        number, offset = divmod(index, PAGE_ROWS)
+        page = self._pages.get(number)
+        if page is None:
+            page = self._load_page(number)
+            self._pages[number] = page
+            if len(self._pages) > MAX_CACHED_PAGES:
+                self._pages.popitem(last=False)
+        else:
+            self._pages.move_to_end(number)
+        return page[offset]
+
+    def _load_page(self, number):
+        start = number * PAGE_ROWS
+        stop = min(start + PAGE_ROWS, len(self))
+        positions = np.arange(start, stop) if self._rows is None else self._rows[start:stop]
+        df = self.source.take(positions)
+        self.numeric = [_is_numeric(series) for _, series in df.items()]
+        return list(zip(*(display_values(series) for _, series in df.items())))
+
+
+# --- Previews ---
+
+class ReturnPreview:
+    """
+    The sections of a return file. A section is built with the processor
+    config of the return type, like a conversion does, when it is opened.
+    """
+
+    def __init__(self, json_path, return_type=None):
+        self.json_path = json_path
+        return_type = return_type or detect_return_type(json_path)
+        if return_type not in CONFIG_PATHS:
+            raise ValueError(f"Could not detect the return type of {json_path}")
+        self._plan = get_conversion_plan(CONFIG_PATHS[return_type], PROCESSOR_MAPS[return_type])
+        keys = set(read_top_level_keys(json_path))
+        self.sections = [(key, section.sheet_name) for key, section in self._plan.sections.items() if key in keys]
+
+    def open_section(self, key):
+        """Returns the SectionView of section `key`."""
+        section = self._plan.sections[key]
+        for _, section_data in iter_json_sections(self.json_path, keys={key}):
+            df = section.build_df(section_data) if section_data else pd.DataFrame()
+            return SectionView(FrameSource(df))
+        raise KeyError(f"{self.json_path} has no section '{key}'")
+
+
+class OutputPreview:
+    """
+    The sections of a csv, parquet or feather output directory, read from
+    the files its manifest lists. CSV files cannot be read from an offset,
+    so a CSV section is loaded whole; the others are read a chunk at a time.
+    """
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        with open(os.path.join(output_dir, MANIFEST_NAME), 'r') as f:
+            manifest = json.load(f)
+        self.format = manifest.get("format")
+        if self.format not in PREVIEW_FORMATS:
+            raise ValueError(f"Cannot preview {self.format} output; use one of {', '.join(PREVIEW_FORMATS)}")
+        self._files = {}
+        self.sections = []
+        for section in manifest.get("sections", []):
+            path = os.path.join(output_dir, section.get("file") or "")
+            if section.get("file") and os.path.isfile(path):
+                self._files[section["key"]] = path
+                self.sections.append((section["key"], section["name"]))
+
+    def open_section(self, key):
+        """Returns the SectionView of section `key`."""
+        path = self._files[key]
+        if self.format == "csv":
+            return SectionView(FrameSource(pd.read_csv(path)))
+        return SectionView(ArrowFileSource(path))
+
+
+def is_previewable_output(path):
+    """True for an output directory whose sections `OutputPreview` can read."""
+    try:
+        with open(os.path.join(path, MANIFEST_NAME), 'r') as f:
+            return json.load(f).get("format") in PREVIEW_FORMATS
+    except (OSError, ValueError):
+        return False
+
+
+def open_preview(json_path=None, output_path=None, return_type=None):
+    """
+    Opens the sections of a conversion for browsing: from its output when
+    that is a csv, parquet or feather directory, which is faster, else from
+    the return file itself.
+
+    Raises:
+        OSError: If the files cannot be read.
+        ValueError: If there is nothing to preview.
+    """
+    if output_path and is_previewable_output(output_path):
+        return OutputPreview(output_path)
+    if json_path:
+        return ReturnPreview(json_path, return_type)
+    raise ValueError(f"Cannot preview {output_path}; it is not a csv, parquet or feather output directory")
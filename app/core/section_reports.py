@@ -0,0 +1,39 @@
+from app.core.amendments import AmendmentResolver
+from app.core.summaries import SummaryBuilder
+from app.core.validation import ValidationBuilder
+from app.utils.logger import NULL_PROFILER
+
+# Section reports are built from the section frames while they are written,
+# and appended to the output after the last section. Each report has a
+# `stage_name`, `add(section, df, basic_info)` and `sections(basic_info)`,
+# which returns (key, sheet name, DataFrame) tuples.
+
+
+def build_reports(summaries=False, validate=False, amendments=False):
+    """Returns the reports a conversion asked for, in the order their sheets are written."""
+    reports = []
+    if amendments:
+        reports.append(AmendmentResolver())
+    if validate:
+        reports.append(ValidationBuilder())
+    if summaries:
+        reports.append(SummaryBuilder())
+    return reports
+
+
+def add_to_reports(reports, section, section_df, basic_info, profiler=NULL_PROFILER):
+    """
+    Hands one written section to every report. `basic_info` holds the basic
+    info keys read so far.
+    """
+    for report in reports:
+        with profiler.stage(report.stage_name):
+            report.add(section, section_df, basic_info)
+
+
+def write_reports(sink, reports, basic_info, profiler=NULL_PROFILER):
+    """Writes the sheets of every report to the output sink, after the sections."""
+    for report in reports:
+        with profiler.stage(report.stage_name + " output"):
+            for key, sheet_name, report_df in report.sections(basic_info):
+                sink.write_section(key, sheet_name, report_df)
@@ -0,0 +1,220 @@
+import pandas as pd
+
+from app.core.common_processors import GST_DATE_FORMAT, parse_dates
+
+# --- Constants ---
+MEASURES = ["Taxable Value", "IGST", "CGST", "SGST", "Cess"]
+# Roles a section's "summary" config can map to one of its columns
+MEASURE_ROLES = {"taxable": "Taxable Value", "igst": "IGST", "cgst": "CGST", "sgst": "SGST", "cess": "Cess"}
+DIMENSION_ROLES = ("rate", "pos", "counterparty", "date", "note_type")
+# Note types that add to the totals; anything else in a notes section is a credit
+DEBIT_NOTE_TYPES = {"D"}
+
+# Output sections: key, sheet name and the column the rows are grouped by
+SUMMARY_SECTIONS = [
+    ("summary_rate", "Summary by Rate", "Rate"),
+    ("summary_pos", "Summary by POS", "Place of Supply"),
+    ("summary_counterparty", "Summary by Counterparty", "Counterparty"),
+    ("summary_month", "Summary by Month", "Month"),
+]
+TOTALS_SECTION = ("totals_check", "Totals Check")
+
+
+def validate_summary_config(key, config):
+    """
+    Returns the problem with a section's "summary" config, or None if it is valid.
+    """
+    if not isinstance(config, dict):
+        return f"Section '{key}' has a summary that is not an object"
+    columns = config.get("columns", {})
+    values = config.get("values", {})
+    if not isinstance(columns, dict) or not isinstance(values, dict):
+        return f"Section '{key}' has summary columns or values that are not objects"
+    known = set(MEASURE_ROLES) | set(DIMENSION_ROLES)
+    unknown = [role for role in list(columns) + list(values) if role not in known]
+    if unknown:
+        return f"Section '{key}' maps unknown summary roles {unknown}"
+    if "taxable" not in columns:
+        return f"Section '{key}' has a summary without a taxable column"
+    return None
+
+
+def _map_values(series, func):
+    """
+    Applies `func` to every value of `series`; categoricals have it applied
+    once per category.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.map({category: func(category) for category in series.cat.categories})
+    return series.astype(object).map(func)
+
+
+def _months(series):
+    """Monthly Periods of a date column; dates may be datetimes or dd-mm-yyyy text."""
+    return parse_dates(series, GST_DATE_FORMAT).dt.to_period('M')
+
+
+def _period_month(fp):
+    """MMYYYY return period as a monthly Period, or NaT."""
+    fp = str(fp or "")
+    return pd.Period(year=int(fp[2:]), month=int(fp[:2]), freq='M') if len(fp) == 6 and fp.isdigit() else pd.NaT
+
+
+def section_roles(config, df):
+    """
+    Returns a lookup `role(name, default=None)` that gives the column of
+    `df` a "summary"-style config maps the role to, else the constant from
+    its "values", else `default`.
+    """
+    columns = config.get("columns", {})
+    values = config.get("values", {})
+
+    def role(name, default=None):
+        column = columns.get(name)
+        if column is not None and column in df.columns:
+            return df[column]
+        return values.get(name, default)
+    return role
+
+
+def amounts(values, index):
+    """The given role values (a column or a constant) as float64, missing and unparsable ones 0."""
+    if not isinstance(values, pd.Series):
+        return pd.Series(float(values or 0.0), index=index)
+    if values.dtype.kind not in 'iuf':
+        values = pd.to_numeric(values.astype(object), errors='coerce')
+    return values.astype(float).fillna(0.0)
+
+
+def signed_amounts(config, df, role):
+    """
+    The taxable value and taxes of a section as a float frame of MEASURES,
+    with credit notes negated in sections marked "notes".
+    """
+    sign = 1.0
+    if config.get("notes"):
+        note_types = role("note_type")
+        if isinstance(note_types, pd.Series):
+            sign = _map_values(note_types, lambda note_type: 1.0 if note_type in DEBIT_NOTE_TYPES else -1.0)
+            sign = sign.astype(float).to_numpy()
+        else:
+            sign = 1.0 if note_types in DEBIT_NOTE_TYPES else -1.0
+    return pd.DataFrame({measure: amounts(role(name, 0.0), df.index) * sign
+                         for name, measure in MEASURE_ROLES.items()}, index=df.index)
+
+
+class SummaryBuilder:
+    """
+    Rate-, place of supply-, counterparty- and month-wise totals across the
+    sections of one return, built in the same pass that writes them.
+
+    Every section frame handed to `add` is reduced right away to partial
+    group sums, so nothing the size of a section is kept. Sections are
+    described by the "summary" entry of their processor config, which maps
+    roles (taxable, igst, cgst, sgst, cess, rate, pos, counterparty, date,
+    note_type) to columns, and may give constant `values` for roles the
+    section has no column for. In sections marked "notes", credit notes are
+    subtracted. Where a section has no place of supply, the state code of
+    the counterparty GSTIN is used; rows without a date count towards the
+    month of the return period (fp).
+    """
+
+    # Profiler stage of the per-section work
+    stage_name = "summarize"
+
+    def __init__(self):
+        self._partials = {column: [] for _, _, column in SUMMARY_SECTIONS}
+        self._section_totals = []
+
+    def add(self, section, df, basic_info=None):
+        """Adds the rows of one written section (a SectionPlan and its frame)."""
+        config = section.summary
+        if not config or df.empty:
+            return
+        role = section_roles(config, df)
+        frame = signed_amounts(config, df, role)
+
+        counterparty = role("counterparty")
+        pos = role("pos")
+        if pos is None and isinstance(counterparty, pd.Series):
+            pos = _map_values(counterparty, lambda gstin: gstin[:2] if isinstance(gstin, str) else None)
+        dates = role("date")
+        # Left missing here; filled with the return period once it is known
+        months = _months(dates) if isinstance(dates, pd.Series) else pd.NaT
+
+        frame["Rate"] = role("rate")
+        frame["Place of Supply"] = pos
+        frame["Counterparty"] = counterparty
+        frame["Month"] = months
+
+        for _, _, column in SUMMARY_SECTIONS:
+            groups = frame.groupby(column, dropna=False, sort=False, observed=True)
+            partial = groups[MEASURES].sum().assign(Rows=groups.size())
+            # Categories differ between sections, so partials are combined as plain values
+            partial.index = partial.index.astype(object)
+            self._partials[column].append(partial)
+        self._section_totals.append(
+            (section.key, section.sheet_name, len(frame), *frame[MEASURES].sum().round(2).tolist()))
+
+    def sections(self, basic_info=None):
+        """
+        Returns the summary sheets as (key, sheet name, DataFrame), followed by
+        the totals check that reconciles them with the sections.
+        """
+        basic_info = basic_info or {}
+        result = []
+        sheet_totals = []
+        for key, name, column in SUMMARY_SECTIONS:
+            partials = self._partials[column]
+            if not partials:
+                continue
+            totals = pd.concat(partials)
+            if column == "Month":
+                period = _period_month(basic_info.get("fp"))
+                months = [period if pd.isna(month) else month for month in totals.index]
+                totals.index = pd.Index([None if pd.isna(month) else str(month) for month in months], name=column)
+            totals = totals.groupby(level=0, dropna=False).sum()
+            totals = totals.round(2).reset_index()
+            totals["Total Tax"] = totals[["IGST", "CGST", "SGST", "Cess"]].sum(axis=1).round(2)
+            totals = totals[[column, "Rows"] + MEASURES + ["Total Tax"]]
+            result.append((key, name, _sorted(totals, column)))
+            sheet_totals.append((key, name, *totals[["Rows"] + MEASURES + ["Total Tax"]].sum().tolist()))
+        if self._section_totals:
+            result.append((*TOTALS_SECTION, self._totals_check(sheet_totals)))
+        return result
+
+    def _totals_check(self, sheet_totals):
+        """
+        The net totals of the section sheets, followed by the grand total of
+        every summary sheet and its difference from that net. The gt/cur_gt
+        turnovers of the return are annual figures, so nothing is checked
+        against them.
+        """
+        check = pd.DataFrame(self._section_totals, columns=["Section", "Sheet", "Rows"] + MEASURES)
+        check = check.groupby(["Section", "Sheet"], sort=False, as_index=False).sum()
+        check["Total Tax"] = check[["IGST", "CGST", "SGST", "Cess"]].sum(axis=1).round(2)
+        net = check[["Rows"] + MEASURES + ["Total Tax"]].sum().round(2)
+        rows = [check, pd.DataFrame([{"Section": "net", "Sheet": "Net of credit notes", **net.to_dict()}])]
+
+        # Every summary sheet regroups the same rows, so its totals must add up to the net of the sections
+        for key, name, *totals in sheet_totals:
+            totals = pd.Series(totals, index=net.index).round(2)
+            difference = (totals - net).round(2)
+            matches = difference["Rows"] == 0 and (difference[MEASURES + ["Total Tax"]].abs() < 0.01).all()
+            rows.append(pd.DataFrame([{
+                "Section": key, "Sheet": name, **totals.to_dict(),
+                "Difference": difference["Taxable Value"],
+                "Check": "OK" if matches else "Does not add up to the net of the sections",
+            }]))
+        check = pd.concat(rows, ignore_index=True)
+        check["Rows"] = check["Rows"].astype("Int64")
+        return check
+
+
+def _sorted(df, column):
+    try:
+        return df.sort_values(column, kind="stable", na_position="last").reset_index(drop=True)
+    except TypeError:
+        # Mixed value types (e.g. numeric and text rates)
+        return df.sort_values(column, key=lambda values: values.astype(str), kind="stable").reset_index(drop=True)
+
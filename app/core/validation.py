@@ -0,0 +1,273 @@
+import numpy as np
+import pandas as pd
+
+from app.core.summaries import MEASURES, amounts, section_roles, signed_amounts
+
+# --- Constants ---
+CHECKS = ("value", "tax_split", "duplicates", "hsn_totals")
+# Roles a section's "validation" config can map, on top of those of its "summary"
+VALIDATION_ROLES = ("number", "value", "invoice_type", "taxable", "igst", "cgst", "sgst", "cess",
+                    "pos", "counterparty", "date")
+SUPPLIERS = ("self", "counterparty")
+# Rupees of rounding allowed before two amounts count as different
+ROUNDING_TOLERANCE = 1.0
+# Exceptions listed per section and check; the rest are only counted
+MAX_EXCEPTIONS_PER_CHECK = 1000
+# SEZ supplies are inter-state even within the supplier's state
+INTER_STATE_INVOICE_TYPES = {"SEWP", "SEWOP"}
+
+EXCEPTIONS_SECTION = ("exceptions", "Exceptions")
+EXCEPTION_COLUMNS = ["Section", "Check", "Counterparty", "Document", "Expected", "Found", "Difference", "Detail"]
+CHECK_LABELS = {
+    "value": "Invoice value",
+    "tax_split": "IGST / CGST+SGST",
+    "duplicates": "Duplicate number",
+    "hsn_totals": "HSN vs invoices",
+}
+
+
+def validate_validation_config(key, config):
+    """
+    Returns the problem with a section's "validation" config, or None if it is valid.
+    """
+    if not isinstance(config, dict):
+        return f"Section '{key}' has a validation that is not an object"
+    checks = config.get("checks")
+    if not isinstance(checks, list) or not checks:
+        return f"Section '{key}' has a validation without a list of checks"
+    unknown = [check for check in checks if check not in CHECKS]
+    if unknown:
+        return f"Section '{key}' asks for unknown checks {unknown}"
+    columns = config.get("columns", {})
+    if not isinstance(columns, dict) or any(role not in VALIDATION_ROLES for role in columns):
+        return f"Section '{key}' maps unknown validation roles"
+    if config.get("supplier", "self") not in SUPPLIERS:
+        return f"Section '{key}' has a supplier other than {list(SUPPLIERS)}"
+    return None
+
+
+def _state_number(value):
+    """State code of a GSTIN or place of supply as a number, or -1 if there is none."""
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return -1
+    value = str(value).strip()[:2]
+    return int(value) if value.isdigit() else -1
+
+
+def _state_numbers(values):
+    """
+    `_state_number` of every value of a column, as an array; the codes are
+    worked out once per distinct value. Constants give a single number.
+    """
+    if not isinstance(values, pd.Series):
+        return _state_number(values)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, uniques = values.cat.codes.to_numpy(), values.cat.categories
+    else:
+        codes, uniques = pd.factorize(values.astype(object))
+    # Code -1 (missing) picks the trailing -1
+    lookup = np.array([_state_number(value) for value in uniques] + [-1], dtype=np.int16)
+    return lookup[codes]
+
+
+class ValidationBuilder:
+    """
+    Checks the sections of one return as they are written and collects what
+    fails into an "Exceptions" section.
+
+    All checks are column operations and groupbys on the frames the
+    processors have already built; the JSON is never walked again. A
+    section's "validation" config lists its checks:
+
+    - value: the invoice or note value against the sum of its items'
+      taxable value and taxes.
+    - tax_split: IGST on inter-state supplies, equal CGST and SGST on
+      intra-state ones, judged from the place of supply and the supplier's
+      state (the filer's own, or with "supplier": "counterparty" the state
+      of the counterparty GSTIN).
+    - duplicates: one document number used for different documents of the
+      same counterparty.
+    - hsn_totals: the section's totals against the net totals of every
+      section with a "summary" config (credit notes subtracted).
+
+    Column roles come from the section's "summary" config, extended and
+    overridden by the "columns" of its "validation" config.
+
+    Args:
+        tolerance (float, optional): Rupees of difference still accepted. Defaults to ROUNDING_TOLERANCE.
+    """
+
+    # Profiler stage of the per-section work
+    stage_name = "validate"
+
+    def __init__(self, tolerance=ROUNDING_TOLERANCE):
+        self.tolerance = tolerance
+        self._exceptions = []
+        self._counts = []
+        self._supply_totals = pd.Series(0.0, index=MEASURES)
+        self._hsn_totals = {}
+
+    def add(self, section, df, basic_info=None):
+        """Checks one written section (a SectionPlan and its frame)."""
+        if df.empty:
+            return
+        if section.summary:
+            role = section_roles(section.summary, df)
+            self._supply_totals += signed_amounts(section.summary, df, role).sum()
+
+        config = section.validation
+        if not config:
+            return
+        summary = section.summary or {}
+        role = section_roles({"columns": {**summary.get("columns", {}), **config.get("columns", {})},
+                              "values": {**summary.get("values", {}), **config.get("values", {})}}, df)
+        documents = None
+        for check in config["checks"]:
+            if check == "hsn_totals":
+                self._hsn_totals[section.key] = (section.sheet_name, pd.Series(
+                    {measure: amounts(role(name, 0.0), df.index).sum()
+                     for name, measure in zip(("taxable", "igst", "cgst", "sgst", "cess"), MEASURES)}))
+                continue
+            if check == "tax_split":
+                found = self._check_tax_split(role, df.index, config.get("supplier", "self"), basic_info or {})
+            else:
+                if documents is None:
+                    # Shared by the value and duplicate checks
+                    documents = self._documents(role, df.index)
+                if documents is False:
+                    continue
+                found = self._check_values(documents) if check == "value" else self._check_duplicates(documents)
+            if found is not None and not found.empty:
+                self._record(section, check, found)
+
+    # --- Checks ---
+
+    def _documents(self, role, index):
+        """
+        Groups the rows of a section into documents, keyed by counterparty,
+        number, date and value, with the sum of their items' taxable value
+        and taxes as "Computed". Returns False without a number column.
+        """
+        number = role("number")
+        if not isinstance(number, pd.Series):
+            return False
+        rows = pd.DataFrame({"Counterparty": role("counterparty"), "Document": number}, index=index)
+        for name in ("date", "value"):
+            column = role(name)
+            if isinstance(column, pd.Series):
+                rows[name] = column
+        keys = list(rows.columns)
+        rows["Computed"] = sum(amounts(role(name, 0.0), index) for name in ("taxable", "igst", "cgst", "sgst", "cess"))
+        return rows.groupby(keys, observed=True, sort=False, dropna=False)["Computed"].sum().reset_index()
+
+    def _check_values(self, documents):
+        if "value" not in documents:
+            return None
+        found = amounts(documents["value"], documents.index)
+        difference = found - documents["Computed"]
+        bad = difference.abs() > self.tolerance
+        return pd.DataFrame({
+            "Counterparty": documents["Counterparty"][bad], "Document": documents["Document"][bad],
+            "Expected": documents["Computed"][bad].round(2), "Found": found[bad],
+            "Difference": difference[bad].round(2), "Detail": "Value differs from taxable value plus taxes",
+        })
+
+    def _check_tax_split(self, role, index, supplier, basic_info):
+        if supplier == "self":
+            supplier_state = _state_number(basic_info.get("gstin"))
+            # Notes to registered persons carry no place of supply; theirs is the recipient's state
+            place = role("pos", role("counterparty"))
+        else:
+            supplier_state = _state_numbers(role("counterparty"))
+            # Inward supplies without a place of supply are taken to be received in the filer's state
+            place = role("pos", basic_info.get("gstin"))
+        place = _state_numbers(place)
+        known = (np.asarray(place) >= 0) & (np.asarray(supplier_state) >= 0)
+        if not known.any():
+            return None
+        inter_state = np.broadcast_to(place != supplier_state, (len(index),)).copy()
+        invoice_type = role("invoice_type")
+        if isinstance(invoice_type, pd.Series):
+            inter_state |= invoice_type.astype(object).isin(INTER_STATE_INVOICE_TYPES).to_numpy()
+        known = pd.Series(np.broadcast_to(known, (len(index),)), index=index)
+        inter_state = pd.Series(inter_state, index=index)
+        taxes = {name: amounts(role(name, 0.0), index) for name in ("igst", "cgst", "sgst")}
+        tolerance = self.tolerance
+        wrong_igst = known & ~inter_state & (taxes["igst"].abs() > tolerance)
+        wrong_split = known & inter_state & ((taxes["cgst"].abs() > tolerance) | (taxes["sgst"].abs() > tolerance))
+        unequal = known & ~inter_state & ((taxes["cgst"] - taxes["sgst"]).abs() > tolerance)
+        bad = wrong_igst | wrong_split | unequal
+        if not bad.any():
+            return None
+
+        rows = pd.DataFrame({"Counterparty": role("counterparty"), "Document": role("number")}, index=index)
+        rows = rows[bad].astype(object)
+        rows["Place"] = pd.Series(np.broadcast_to(place, (len(index),)), index=index)[bad].map("{:02d}".format)
+        rows["Detail"] = "CGST and SGST differ"
+        rows.loc[wrong_igst[bad].to_numpy(), "Detail"] = "IGST charged on an intra-state supply"
+        rows.loc[wrong_split[bad].to_numpy(), "Detail"] = "CGST/SGST charged on an inter-state supply"
+        for name, column in (("igst", "IGST"), ("cgst", "CGST"), ("sgst", "SGST")):
+            rows[column] = taxes[name][bad]
+        # One exception per document and problem
+        rows = rows.groupby(["Counterparty", "Document", "Place", "Detail"], dropna=False, sort=False)[
+            ["IGST", "CGST", "SGST"]].sum().reset_index()
+        found = rows["IGST"].where(rows["Detail"] == "IGST charged on an intra-state supply", rows["CGST"])
+        expected = rows["SGST"].where(rows["Detail"] == "CGST and SGST differ", 0.0)
+        return pd.DataFrame({
+            "Counterparty": rows["Counterparty"], "Document": rows["Document"],
+            "Expected": expected.round(2), "Found": found.round(2), "Difference": (found - expected).round(2),
+            "Detail": rows["Detail"] + " (place of supply " + rows["Place"].astype(str) + ")",
+        })
+
+    def _check_duplicates(self, documents):
+        counts = documents.groupby(["Counterparty", "Document"], observed=True, sort=False, dropna=False).size()
+        counts = counts[counts > 1].reset_index(name="Found")
+        return pd.DataFrame({
+            "Counterparty": counts["Counterparty"], "Document": counts["Document"], "Expected": 1,
+            "Found": counts["Found"], "Difference": counts["Found"] - 1,
+            "Detail": "Number used for documents with different dates or values",
+        })
+
+    # --- Output ---
+
+    def _record(self, section, check, found):
+        self._counts.append((section.key, check, len(found)))
+        listed = found.head(MAX_EXCEPTIONS_PER_CHECK).astype({"Counterparty": object, "Document": object})
+        listed.insert(0, "Check", CHECK_LABELS[check])
+        listed.insert(0, "Section", section.sheet_name)
+        self._exceptions.append(listed)
+        if len(found) > MAX_EXCEPTIONS_PER_CHECK:
+            self._exceptions.append(pd.DataFrame([{
+                "Section": section.sheet_name, "Check": CHECK_LABELS[check],
+                "Detail": f"... and {len(found) - MAX_EXCEPTIONS_PER_CHECK} more",
+            }]))
+
+    def _hsn_exceptions(self):
+        rows = []
+        for sheet_name, totals in self._hsn_totals.values():
+            difference = totals - self._supply_totals
+            for measure in MEASURES:
+                if abs(difference[measure]) > self.tolerance:
+                    rows.append({"Section": sheet_name, "Check": CHECK_LABELS["hsn_totals"], "Document": measure,
+                                 "Expected": round(self._supply_totals[measure], 2),
+                                 "Found": round(totals[measure], 2), "Difference": round(difference[measure], 2),
+                                 "Detail": "HSN total differs from the net total of the invoice and note sections"})
+        return rows
+
+    @property
+    def exception_count(self):
+        return sum(count for _, _, count in self._counts) + len(self._hsn_exceptions())
+
+    def sections(self, basic_info=None):
+        """
+        Returns the "Exceptions" section as [(key, sheet name, DataFrame)]; it
+        says so in one row when every check passed.
+        """
+        frames = list(self._exceptions)
+        hsn_rows = self._hsn_exceptions()
+        if hsn_rows:
+            frames.append(pd.DataFrame(hsn_rows))
+        if not frames:
+            frames = [pd.DataFrame([{"Detail": "No exceptions found"}])]
+        exceptions = pd.concat(frames, ignore_index=True).reindex(columns=EXCEPTION_COLUMNS)
+        return [(*EXCEPTIONS_SECTION, exceptions)]
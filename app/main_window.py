@@ -1,12 +1,15 @@
 import sys
 import os
+from types import SimpleNamespace
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QPushButton,
-    QLabel, QStackedWidget, QStatusBar, QFrame, QGridLayout, QCheckBox
+    QLabel, QStackedWidget, QStatusBar, QFrame, QGridLayout, QCheckBox,
+    QFileDialog, QMessageBox, QProgressBar
 )
-from PySide6.QtCore import Qt, QSize, QPropertyAnimation, QEasingCurve
+from PySide6.QtCore import Qt, QSize, QPropertyAnimation, QEasingCurve, QThreadPool
 from PySide6.QtGui import QIcon
-from qt_material import apply_stylesheet, get_theme
+from app.ui.widgets.section_preview import PreviewPane
+from app.ui.workers import ConversionWorker, WatchWorker
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -14,6 +17,8 @@ class MainWindow(QMainWindow):
         self.setWindowTitle("Turbo GST")
         self.resize(1024, 768)
         self.is_sidebar_collapsed = False
+        self.conversion_pages = {}
+        self.thread_pool = QThreadPool.globalInstance()
 
         # Main layout
         main_layout = QHBoxLayout()
@@ -111,7 +116,7 @@ class MainWindow(QMainWindow):
 
         self.home_page = self._create_home_page()
         self.gstr1_page = self._create_gstr1_page()
-        self.gstr2_page = self._create_placeholder_page("GSTR-2")
+        self.gstr2_page = self._create_gstr2_page()
         self.settings_page = self._create_placeholder_page("Settings")
         self.about_page = self._create_placeholder_page("About")
 
@@ -160,11 +165,21 @@ class MainWindow(QMainWindow):
         return page
 
     def _create_gstr1_page(self):
+        return self._create_conversion_page("GSTR-1 Conversion", "gstr1")
+
+    def _create_gstr2_page(self):
+        return self._create_conversion_page("GSTR-2 Conversion", "gstr2")
+
+    def _create_conversion_page(self, title, return_type):
         page = QWidget()
         layout = QVBoxLayout(page)
         layout.setAlignment(Qt.AlignTop)
 
-        header = QLabel("GSTR-1 Conversion")
+        # Per-page widgets and selections, looked up by return type in the handlers
+        state = SimpleNamespace(files=[], folder=None, output_dir=None, worker=None, watcher=None)
+        self.conversion_pages[return_type] = state
+
+        header = QLabel(title)
         header.setObjectName("sectionHeader")
         layout.addWidget(header)
 
@@ -187,17 +202,17 @@ class MainWindow(QMainWindow):
         file_select_layout.addStretch()
         card_layout.addLayout(file_select_layout)
 
-        source_path_button = QPushButton("Select source path...")
-        source_path_button.setIcon(QIcon(os.path.join('resources', 'icons', 'source.svg')))
-        source_path_button.setIconSize(QSize(24, 24))
-        source_path_button.setObjectName("pathDisplayButton")
-        card_layout.addWidget(source_path_button)
+        state.source_path_button = QPushButton("Select source path...")
+        state.source_path_button.setIcon(QIcon(os.path.join('resources', 'icons', 'source.svg')))
+        state.source_path_button.setIconSize(QSize(24, 24))
+        state.source_path_button.setObjectName("pathDisplayButton")
+        card_layout.addWidget(state.source_path_button)
 
-        dest_path_button = QPushButton("Select destination path...")
-        dest_path_button.setIcon(QIcon(os.path.join('resources', 'icons', 'destination.svg')))
-        dest_path_button.setIconSize(QSize(24, 24))
-        dest_path_button.setObjectName("pathDisplayButton")
-        card_layout.addWidget(dest_path_button)
+        state.dest_path_button = QPushButton("Select destination path...")
+        state.dest_path_button.setIcon(QIcon(os.path.join('resources', 'icons', 'destination.svg')))
+        state.dest_path_button.setIconSize(QSize(24, 24))
+        state.dest_path_button.setObjectName("pathDisplayButton")
+        card_layout.addWidget(state.dest_path_button)
 
         options_container = QFrame()
         options_container.setObjectName("optionsContainer")
@@ -205,35 +220,211 @@ class MainWindow(QMainWindow):
         options_layout.setContentsMargins(0,0,0,0)
         options_layout.setSpacing(0)
 
-        self.options_header = QPushButton()
-        self.options_header.setObjectName("optionsHeaderButton")
-        self.options_header.setCheckable(True)
-        self.options_header.setChecked(True)
+        state.options_header = QPushButton()
+        state.options_header.setObjectName("optionsHeaderButton")
+        state.options_header.setCheckable(True)
+        state.options_header.setChecked(True)
         
-        self.options_body = QWidget()
-        self.options_body.setObjectName("optionsBody")
-        options_grid = QGridLayout(self.options_body)
+        state.options_body = QWidget()
+        state.options_body.setObjectName("optionsBody")
+        options_grid = QGridLayout(state.options_body)
         options_grid.addWidget(QCheckBox("B2B"), 0, 0)
         options_grid.addWidget(QCheckBox("B2C"), 0, 2)
         options_grid.addWidget(QCheckBox("CDNR"), 1, 0)
         options_grid.addWidget(QCheckBox("Export"), 1, 1)
 
-        options_layout.addWidget(self.options_header)
-        options_layout.addWidget(self.options_body)
+        options_layout.addWidget(state.options_header)
+        options_layout.addWidget(state.options_body)
         card_layout.addWidget(options_container)
         
-        self.options_header.toggled.connect(self.on_options_toggled)
-        self.on_options_toggled(True) # Set initial state
-
-        convert_button = QPushButton("Convert")
-        convert_button.setIcon(QIcon(os.path.join('resources', 'icons', 'convert.svg')))
-        convert_button.setIconSize(QSize(24, 24))
-        convert_button.setObjectName("convertButton")
-        card_layout.addWidget(convert_button)
+        state.options_header.toggled.connect(lambda checked: self.on_options_toggled(checked, return_type))
+        self.on_options_toggled(True, return_type) # Set initial state
+
+        state.watch_checkbox = QCheckBox("Watch folder and convert new returns automatically")
+        state.watch_checkbox.setObjectName("watchCheckBox")
+        card_layout.addWidget(state.watch_checkbox)
+
+        state.progress_bar = QProgressBar()
+        state.progress_bar.setVisible(False)
+        card_layout.addWidget(state.progress_bar)
+
+        action_layout = QHBoxLayout()
+        state.convert_button = QPushButton("Convert")
+        state.convert_button.setIcon(QIcon(os.path.join('resources', 'icons', 'convert.svg')))
+        state.convert_button.setIconSize(QSize(24, 24))
+        state.convert_button.setObjectName("convertButton")
+        state.cancel_button = QPushButton("Cancel")
+        state.cancel_button.setObjectName("cancelButton")
+        state.cancel_button.setVisible(False)
+        action_layout.addWidget(state.convert_button, 1)
+        action_layout.addWidget(state.cancel_button)
+        card_layout.addLayout(action_layout)
+
+        file_button.clicked.connect(lambda: self._select_files(return_type))
+        state.source_path_button.clicked.connect(lambda: self._select_files(return_type))
+        folder_button.clicked.connect(lambda: self._select_folder(return_type))
+        state.dest_path_button.clicked.connect(lambda: self._select_destination(return_type))
+        state.convert_button.clicked.connect(lambda: self._start_conversion(return_type))
+        state.cancel_button.clicked.connect(lambda: self._cancel_conversion(return_type))
+        state.watch_checkbox.toggled.connect(lambda checked: self._toggle_watch(return_type, checked))
 
         layout.addWidget(card)
+
+        # Browses the selected return, or the output of the last conversion, without opening Excel
+        preview_card = QFrame()
+        preview_card.setObjectName("contentCard")
+        preview_layout = QVBoxLayout(preview_card)
+        state.preview = PreviewPane()
+        preview_layout.addWidget(state.preview)
+        layout.addWidget(preview_card, 1)
         return page
 
+    # --- Conversion Handlers ---
+
+    def _set_source_files(self, return_type, files, folder=None):
+        state = self.conversion_pages[return_type]
+        state.files = files
+        state.folder = folder
+        if len(files) == 1:
+            state.source_path_button.setText(files[0])
+        else:
+            state.source_path_button.setText(f"{len(files)} JSON files selected")
+        if files:
+            state.preview.set_source(files[0], return_type=return_type)
+
+    def _select_files(self, return_type):
+        files, _ = QFileDialog.getOpenFileNames(self, "Select JSON File(s)", "",
+                                                "JSON Files (*.json *.zip *.json.gz)")
+        if files:
+            from app.core.common_processors import process_drop
+            from app.core.json_sources import is_json_source
+            # Every JSON file inside a chosen ZIP archive is a file of its own
+            files = [path for path in process_drop(files) if is_json_source(path)]
+            self._set_source_files(return_type, files)
+
+    def _select_folder(self, return_type):
+        folder = QFileDialog.getExistingDirectory(self, "Select Folder")
+        if folder:
+            from app.core.common_processors import process_drop
+            from app.core.json_sources import is_json_source
+            files = [path for path in process_drop([folder]) if is_json_source(path)]
+            self._set_source_files(return_type, files, folder)
+
+    def _select_destination(self, return_type):
+        folder = QFileDialog.getExistingDirectory(self, "Select Destination Folder")
+        if folder:
+            state = self.conversion_pages[return_type]
+            state.output_dir = folder
+            state.dest_path_button.setText(folder)
+
+    def _start_conversion(self, return_type):
+        state = self.conversion_pages[return_type]
+        if state.worker is not None:
+            return
+        if not state.files:
+            self.status_label.setText("Status: Select JSON file(s) to convert")
+            return
+
+        worker = ConversionWorker(state.files, output_dir=state.output_dir, return_type=return_type)
+        worker.signals.started.connect(lambda total: self._on_conversion_started(return_type, total))
+        worker.signals.progress.connect(lambda done, total: self._on_conversion_progress(return_type, done, total))
+        worker.signals.file_finished.connect(self._on_file_converted)
+        worker.signals.error.connect(self._on_conversion_error)
+        worker.signals.finished.connect(lambda results: self._on_conversion_finished(return_type, results))
+        state.worker = worker
+
+        state.convert_button.setEnabled(False)
+        state.cancel_button.setEnabled(True)
+        state.cancel_button.setVisible(True)
+        self.thread_pool.start(worker)
+
+    def _cancel_conversion(self, return_type):
+        state = self.conversion_pages[return_type]
+        if state.worker is not None:
+            state.worker.cancel()
+            state.cancel_button.setEnabled(False)
+            self.status_label.setText("Status: Cancelling...")
+
+    def _on_conversion_started(self, return_type, total):
+        state = self.conversion_pages[return_type]
+        state.progress_bar.setRange(0, total)
+        state.progress_bar.setValue(0)
+        state.progress_bar.setVisible(True)
+        self.status_label.setText(f"Status: Converting {total} file(s)...")
+
+    def _on_conversion_progress(self, return_type, done, total):
+        self.conversion_pages[return_type].progress_bar.setValue(done)
+        self.status_label.setText(f"Status: Converted {done} of {total} file(s)")
+
+    def _on_file_converted(self, result):
+        if not result.success:
+            print(f"Warning: {result.message}")
+
+    def _on_conversion_error(self, message):
+        QMessageBox.critical(self, "Conversion Error", message)
+
+    def _on_conversion_finished(self, return_type, results):
+        state = self.conversion_pages[return_type]
+        state.worker = None
+        state.convert_button.setEnabled(True)
+        state.cancel_button.setVisible(False)
+        state.progress_bar.setVisible(False)
+
+        failed = [result for result in results if not result.success]
+        self.status_label.setText(f"Status: {len(results) - len(failed)} of {len(results)} file(s) converted")
+        converted = [result for result in results if result.success]
+        if converted:
+            state.preview.set_source(converted[0].json_path, converted[0].output_path, return_type)
+        if failed:
+            details = "\n".join(result.message for result in failed[:20])
+            QMessageBox.warning(self, "Conversion Finished", f"{len(failed)} file(s) could not be converted:\n\n{details}")
+
+    # --- Watch Handlers ---
+
+    def _toggle_watch(self, return_type, checked):
+        state = self.conversion_pages[return_type]
+        if not checked:
+            if state.watcher is not None:
+                state.watcher.cancel()
+                self.status_label.setText("Status: Stopping the folder watch...")
+            return
+        if state.watcher is not None:
+            return
+        if not state.folder:
+            self.status_label.setText("Status: Select a folder to watch")
+            state.watch_checkbox.setChecked(False)
+            return
+
+        watcher = WatchWorker(state.folder, output_dir=state.output_dir, return_type=return_type)
+        watcher.signals.file_finished.connect(self._on_watched_file_converted)
+        watcher.signals.error.connect(self._on_conversion_error)
+        watcher.signals.finished.connect(lambda: self._on_watch_finished(return_type))
+        state.watcher = watcher
+        self.thread_pool.start(watcher)
+        self.status_label.setText(f"Status: Watching {state.folder}")
+
+    def _on_watched_file_converted(self, result):
+        if result.success:
+            self.status_label.setText(f"Status: Converted {os.path.basename(result.json_path)}")
+        else:
+            self.status_label.setText(f"Status: Could not convert {os.path.basename(result.json_path)}")
+            print(f"Warning: {result.message}")
+
+    def _on_watch_finished(self, return_type):
+        state = self.conversion_pages[return_type]
+        state.watcher = None
+        state.watch_checkbox.setChecked(False)
+        self.status_label.setText("Status: Stopped watching")
+
+    def closeEvent(self, event):
+        # Stop queueing new files; conversions already running finish on their own
+        for state in self.conversion_pages.values():
+            if state.worker is not None:
+                state.worker.cancel()
+            if state.watcher is not None:
+                state.watcher.cancel()
+        super().closeEvent(event)
+
     def _create_placeholder_page(self, title):
         # ... (This method remains the same)
         page = QWidget()
@@ -257,14 +448,15 @@ class MainWindow(QMainWindow):
             button.style().unpolish(button)
             button.style().polish(button)
 
-    def on_options_toggled(self, checked):
-        self.options_body.setVisible(checked)
+    def on_options_toggled(self, checked, return_type):
+        state = self.conversion_pages[return_type]
+        state.options_body.setVisible(checked)
         if checked:
-            self.options_header.setText("Options")
-            self.options_header.setIcon(QIcon(os.path.join('resources', 'icons', 'arrow_down.svg')))
+            state.options_header.setText("Options")
+            state.options_header.setIcon(QIcon(os.path.join('resources', 'icons', 'arrow_down.svg')))
         else:
-            self.options_header.setText("Options")
-            self.options_header.setIcon(QIcon(os.path.join('resources', 'icons', 'arrow_up.svg')))
+            state.options_header.setText("Options")
+            state.options_header.setIcon(QIcon(os.path.join('resources', 'icons', 'arrow_up.svg')))
 
     def toggle_sidebar(self):
         self.is_sidebar_collapsed = not self.is_sidebar_collapsed
@@ -293,6 +485,8 @@ class MainWindow(QMainWindow):
         self.animation.start()
 
 if __name__ == '__main__':
+    # qt_material pulls in jinja2; only this standalone entry point uses it
+    from qt_material import apply_stylesheet
     app = QApplication(sys.argv)
     apply_stylesheet(app, theme='dark_blue.xml')
     window = MainWindow()
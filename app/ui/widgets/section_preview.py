@@ -0,0 +1,240 @@
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt, QThreadPool
+from PySide6.QtWidgets import (
+    QComboBox, QFileDialog, QHBoxLayout, QHeaderView, QLabel, QLineEdit, QPushButton, QTableView,
+    QVBoxLayout, QWidget
+)
+
+from app.ui.workers import TaskWorker
+
+# --- Constants ---
+ALL_COLUMNS = "All columns"
+ROW_HEIGHT = 22
+
+
+def _open_preview(json_path, output_path, return_type):
+    # Deferred so that building the window does not pay for pandas
+    from app.core.section_preview import open_preview
+    return open_preview(json_path, output_path, return_type)
+
+
+class SectionTableModel(QAbstractTableModel):
+    """
+    Table model over a SectionView (app.core.section_preview). The view
+    reports every row, but rows are only read and formatted, a page at a
+    time, when the table asks for them while painting, so scrolling through
+    a million rows stays instant. Sorting is handed to the view, i.e. done
+    by pandas over the whole section.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.view = None
+
+    def set_view(self, view):
+        self.beginResetModel()
+        self.view = view
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() or self.view is None else len(self.view)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() or self.view is None else len(self.view.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or self.view is None:
+            return None
+        if role == Qt.DisplayRole:
+            return self.view.row(index.row())[index.column()]
+        if role == Qt.TextAlignmentRole and self.view.numeric[index.column()]:
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or self.view is None:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.view.columns[section]
+        # Row numbers of the section, which stay put while sorting and filtering
+        return str(self.view.source_row(section) + 1)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        if self.view is None:
+            return
+        self.beginResetModel()
+        try:
+            self.view.sort(column, ascending=order == Qt.AscendingOrder)
+        finally:
+            self.endResetModel()
+
+    def set_filter(self, text, column=None, mask=None):
+        if self.view is None:
+            return
+        self.beginResetModel()
+        try:
+            self.view.filter(text, column, mask)
+        finally:
+            self.endResetModel()
+
+
+class PreviewPane(QWidget):
+    """
+    Browses the sections of a return or of a csv/parquet/feather output
+    folder: a section selector, a row filter and a virtualised table.
+    Returns and sections are opened off the GUI thread.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.thread_pool = QThreadPool.globalInstance()
+        self.preview = None
+        self.return_type = None
+        # Tasks in flight, kept alive until they report back; only the latest request counts
+        self._tasks = set()
+        self._request = 0
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        controls = QHBoxLayout()
+        title = QLabel("Preview")
+        title.setObjectName("cardTitleLabel")
+        self.section_combo = QComboBox()
+        self.section_combo.setMinimumWidth(200)
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("Filter rows (Enter)")
+        self.filter_column_combo = QComboBox()
+        self.open_button = QPushButton("Open Output...")
+        self.open_button.setObjectName("previewOpenButton")
+        controls.addWidget(title)
+        controls.addWidget(self.section_combo)
+        controls.addWidget(self.filter_edit, 1)
+        controls.addWidget(self.filter_column_combo)
+        controls.addWidget(self.open_button)
+        layout.addLayout(controls)
+
+        self.model = SectionTableModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setWordWrap(False)
+        self.table.setMinimumHeight(320)
+        self.table.verticalHeader().setDefaultSectionSize(ROW_HEIGHT)
+        # Fixed sizes, so that the table never measures rows or columns it does not show
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.table.setSortingEnabled(True)
+        layout.addWidget(self.table)
+
+        self.status_label = QLabel("Select a return to preview its sections")
+        self.status_label.setObjectName("descriptionLabel")
+        layout.addWidget(self.status_label)
+
+        self.section_combo.currentIndexChanged.connect(self._on_section_selected)
+        self.filter_edit.returnPressed.connect(self._apply_filter)
+        self.filter_column_combo.currentIndexChanged.connect(self._apply_filter)
+        self.open_button.clicked.connect(self._select_output)
+
+    # --- Loading ---
+
+    def _run(self, function, args, on_finished):
+        """Runs `function(*args)` on the thread pool; `on_finished` gets its result if no newer request came."""
+        self._request += 1
+        request = self._request
+        task = TaskWorker(function, *args)
+        self._tasks.add(task)
+
+        def finished(result):
+            self._tasks.discard(task)
+            if request == self._request:
+                on_finished(result)
+
+        def failed(message):
+            self._tasks.discard(task)
+            if request == self._request:
+                self.status_label.setText(f"Preview failed: {message}")
+
+        task.signals.finished.connect(finished)
+        task.signals.error.connect(failed)
+        self.thread_pool.start(task)
+
+    def set_source(self, json_path=None, output_path=None, return_type=None):
+        """
+        Shows the sections of a conversion: of its output folder when that is
+        csv, parquet or feather, else of the return file `json_path`.
+        """
+        self.return_type = return_type
+        self.preview = None
+        self.model.set_view(None)
+        self.section_combo.blockSignals(True)
+        self.section_combo.clear()
+        self.section_combo.blockSignals(False)
+        self.status_label.setText(f"Reading {output_path or json_path}...")
+        self._run(_open_preview, (json_path, output_path, return_type), self._on_preview_opened)
+
+    def _on_preview_opened(self, preview):
+        self.preview = preview
+        self.section_combo.blockSignals(True)
+        for key, name in preview.sections:
+            self.section_combo.addItem(name, key)
+        self.section_combo.blockSignals(False)
+        if preview.sections:
+            self._on_section_selected(0)
+        else:
+            self.status_label.setText("No sections to preview")
+
+    def _on_section_selected(self, index):
+        if self.preview is None or index < 0:
+            return
+        key = self.section_combo.itemData(index)
+        self.model.set_view(None)
+        self.status_label.setText(f"Opening {self.section_combo.itemText(index)}...")
+        self._run(self.preview.open_section, (key,), self._on_section_opened)
+
+    def _on_section_opened(self, view):
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.model.set_view(view)
+        self.filter_column_combo.blockSignals(True)
+        self.filter_column_combo.clear()
+        self.filter_column_combo.addItem(ALL_COLUMNS)
+        self.filter_column_combo.addItems(view.columns)
+        self.filter_column_combo.blockSignals(False)
+        if self.filter_edit.text():
+            self._apply_filter()
+        else:
+            self._update_status()
+
+    def _select_output(self):
+        folder = QFileDialog.getExistingDirectory(self, "Select Output Folder")
+        if folder:
+            self.set_source(output_path=folder, return_type=self.return_type)
+
+    # --- Filtering ---
+
+    def _apply_filter(self):
+        view = self.model.view
+        if view is None:
+            return
+        text = self.filter_edit.text()
+        column = self.filter_column_combo.currentIndex() - 1
+        column = None if column < 0 else column
+        if not text:
+            self.model.set_filter("")
+            self._update_status()
+            return
+        # Matching a million rows takes a moment; the table stays usable meanwhile
+        self.status_label.setText(f"Filtering {view.total_rows:,} rows...")
+        self._run(view.match, (text, column), lambda mask: self._on_filtered(text, column, mask))
+
+    def _on_filtered(self, text, column, mask):
+        self.model.set_filter(text, column, mask)
+        self._update_status()
+
+    def _update_status(self):
+        view = self.model.view
+        if view is None:
+            return
+        if len(view) == view.total_rows:
+            self.status_label.setText(f"{view.total_rows:,} rows")
+        else:
+            self.status_label.setText(f"{len(view):,} of {view.total_rows:,} rows")
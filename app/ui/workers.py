@@ -0,0 +1,148 @@
+import multiprocessing
+import os
+import threading
+import traceback
+
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+
+class ConversionSignals(QObject):
+    """
+    Signals emitted by a ConversionWorker. QRunnable is not a QObject, so the
+    signals live on this helper and are delivered to the GUI thread through
+    queued connections.
+    """
+    started = Signal(int)              # total number of files
+    progress = Signal(int, int)        # files completed, total
+    file_finished = Signal(object)     # BatchResult
+    error = Signal(str)                # unexpected failure of the whole run
+    finished = Signal(list)            # all BatchResults, in input order
+
+
+class ConversionWorker(QRunnable):
+    """
+    Runs a batch conversion off the GUI thread.
+
+    The runnable itself only coordinates: files are converted on a process
+    pool sized to the machine, so the window stays responsive while every
+    core is busy.
+    """
+
+    def __init__(self, files, output_dir=None, return_type="gstr1", max_workers=None):
+        super().__init__()
+        self.files = list(files)
+        self.output_dir = output_dir
+        self.return_type = return_type
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.signals = ConversionSignals()
+        self._cancel_event = threading.Event()
+        self._completed = 0
+
+    def cancel(self):
+        """Requests cancellation. Files already being converted are allowed to finish."""
+        self._cancel_event.set()
+
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    def _on_file_finished(self, result):
+        self._completed += 1
+        self.signals.file_finished.emit(result)
+        self.signals.progress.emit(self._completed, len(self.files))
+
+    def run(self):
+        # Deferred so that building the window does not pay for pandas
+        from app.core.batch_converter import convert_batch
+
+        self.signals.started.emit(len(self.files))
+        try:
+            results = convert_batch(
+                self.files,
+                output_dir=self.output_dir,
+                return_type=self.return_type,
+                max_workers=self.max_workers,
+                progress_callback=self._on_file_finished,
+                should_cancel=self.is_cancelled,
+                # Forking a process that runs Qt threads is unsafe
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        except Exception:
+            self.signals.error.emit(traceback.format_exc())
+            results = []
+        self.signals.finished.emit(results)
+
+
+class WatchSignals(QObject):
+    """Signals emitted by a WatchWorker."""
+    file_finished = Signal(object)     # BatchResult
+    error = Signal(str)                # the watch could not start or failed
+    finished = Signal()
+
+
+class WatchWorker(QRunnable):
+    """
+    Runs a hot-folder watch off the GUI thread until cancelled, converting
+    every return dropped into the folder.
+    """
+
+    def __init__(self, folder, output_dir=None, return_type="auto", max_workers=None):
+        super().__init__()
+        self.folder = folder
+        self.output_dir = output_dir
+        self.return_type = return_type
+        self.max_workers = max_workers
+        self.signals = WatchSignals()
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """Stops watching. Files already being converted are allowed to finish."""
+        self._cancel_event.set()
+
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    def run(self):
+        # Deferred so that building the window does not pay for pandas
+        from app.core.hot_folder import HotFolderWatcher
+
+        try:
+            watcher = HotFolderWatcher(
+                self.folder,
+                output_dir=self.output_dir,
+                return_type=self.return_type,
+                max_workers=self.max_workers,
+                progress_callback=self.signals.file_finished.emit,
+                # Forking a process that runs Qt threads is unsafe
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            watcher.run(should_stop=self.is_cancelled)
+        except Exception:
+            self.signals.error.emit(traceback.format_exc())
+        self.signals.finished.emit()
+
+
+class TaskSignals(QObject):
+    """Signals emitted by a TaskWorker."""
+    finished = Signal(object)          # the return value of the task
+    error = Signal(str)                # the task raised
+
+
+class TaskWorker(QRunnable):
+    """
+    Runs a single function off the GUI thread, e.g. opening a section for
+    the preview, and hands its return value back through `signals`.
+    """
+
+    def __init__(self, function, *args):
+        super().__init__()
+        self.function = function
+        self.args = args
+        self.signals = TaskSignals()
+
+    def run(self):
+        try:
+            result = self.function(*self.args)
+        except Exception as e:
+            self.signals.error.emit(str(e))
+            return
+        self.signals.finished.emit(result)
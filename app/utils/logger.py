@@ -0,0 +1,290 @@
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+
+# --- Constants ---
+STAGE_SEPARATOR = "/"
+LOGGER_NAME = "turbo_gst"
+
+# Warnings of the app. Without a configured handler they go to stderr, like print did
+logger = logging.getLogger(LOGGER_NAME)
+
+
+class StageRecord:
+    """Measurements of one stage of a conversion."""
+
+    __slots__ = ("name", "seconds", "rows", "bytes", "peak_bytes")
+
+    def __init__(self, name, seconds=0.0, rows=None, bytes=None, peak_bytes=None):
+        self.name = name
+        self.seconds = seconds
+        self.rows = rows
+        self.bytes = bytes
+        self.peak_bytes = peak_bytes
+
+    @property
+    def depth(self):
+        return self.name.count(STAGE_SEPARATOR)
+
+    def to_dict(self):
+        return {"stage": self.name, "seconds": round(self.seconds, 6), "rows": self.rows,
+                "bytes": self.bytes, "peak_bytes": self.peak_bytes}
+
+
+class ConversionReport:
+    """
+    Per-conversion profile: one StageRecord per stage, in the order the
+    stages started, plus the total wall time.
+    """
+
+    def __init__(self, context=None):
+        self.context = dict(context or {})
+        self.stages = []
+        self.total_seconds = 0.0
+
+    def __repr__(self):
+        return f"ConversionReport({len(self.stages)} stages, {self.total_seconds:.3f}s)"
+
+    def stage(self, name):
+        """Returns the first record named `name`, or None."""
+        return next((record for record in self.stages if record.name == name), None)
+
+    def to_dict(self):
+        return {**self.context, "total_seconds": round(self.total_seconds, 6),
+                "stages": [record.to_dict() for record in self.stages]}
+
+    def format(self):
+        """Renders the report as a table with nested stages indented."""
+        lines = [f"{'stage':<40} {'seconds':>9} {'rows':>10} {'MB':>9} {'peak MB':>9}"]
+        for record in self.stages:
+            label = "  " * record.depth + record.name.rsplit(STAGE_SEPARATOR, 1)[-1]
+            rows = "" if record.rows is None else f"{record.rows:,}"
+            size = "" if record.bytes is None else f"{record.bytes / (1024 * 1024):.2f}"
+            peak = "" if record.peak_bytes is None else f"{record.peak_bytes / (1024 * 1024):.2f}"
+            lines.append(f"{label:<40} {record.seconds:>9.3f} {rows:>10} {size:>9} {peak:>9}")
+        lines.append(f"{'total':<40} {self.total_seconds:>9.3f}")
+        return "\n".join(lines)
+
+
+class _Stage:
+    """Context manager for one running stage; see `Profiler.stage`."""
+
+    __slots__ = ("profiler", "record", "start", "start_memory", "peak")
+
+    def __init__(self, profiler, record):
+        self.profiler = profiler
+        self.record = record
+
+    def set(self, rows=None, bytes=None):
+        """Attaches the row count and/or size of what the stage produced."""
+        if rows is not None:
+            self.record.rows = rows
+        if bytes is not None:
+            self.record.bytes = bytes
+
+    def __enter__(self):
+        self.profiler._enter(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.record.seconds = time.perf_counter() - self.start
+        self.profiler._exit(self)
+
+
+class Profiler:
+    """
+    Collects wall time, rows, bytes and (optionally) tracemalloc peaks of the
+    stages of one conversion into a ConversionReport.
+
+    Stages nest: a stage opened inside another is recorded as
+    "outer/inner". Memory peaks are the highest traced allocation above what
+    was allocated when the stage started, and include nested stages.
+
+    Args:
+        trace_memory (bool, optional): Measure peaks with tracemalloc. Slows the
+            conversion down noticeably. Defaults to False.
+        jsonl_path (str, optional): Append one JSON line per stage, and one
+            per finished report, to this file for aggregation across runs.
+        context (dict, optional): Fields added to the report and every JSON line,
+            e.g. the input path and return type.
+    """
+
+    enabled = True
+
+    def __init__(self, trace_memory=False, jsonl_path=None, context=None):
+        self.trace_memory = trace_memory
+        self.jsonl_path = jsonl_path
+        self.report = ConversionReport(context)
+        self._stack = []
+        self._started_tracing = False
+        self._start = time.perf_counter()
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+    def stage(self, name):
+        """
+        Returns a context manager that times the block as stage `name`. Call
+        `.set(rows=..., bytes=...)` on it to record what the stage produced.
+        """
+        if self._stack:
+            name = self._stack[-1].record.name + STAGE_SEPARATOR + name
+        return _Stage(self, StageRecord(name))
+
+    def profile(self, name=None):
+        """Decorator form of `stage`; the stage is named after the function by default."""
+        def decorator(fn):
+            stage_name = name or fn.__name__
+
+            def wrapper(*args, **kwargs):
+                with self.stage(stage_name):
+                    return fn(*args, **kwargs)
+            wrapper.__name__ = fn.__name__
+            wrapper.__doc__ = fn.__doc__
+            return wrapper
+        return decorator
+
+    def add(self, name, seconds, rows=None, bytes=None, peak_bytes=None):
+        """Records a stage that was measured elsewhere, e.g. in a worker process."""
+        if self._stack:
+            name = self._stack[-1].record.name + STAGE_SEPARATOR + name
+        record = StageRecord(name, seconds, rows, bytes, peak_bytes)
+        self.report.stages.append(record)
+        if self.jsonl_path:
+            self._emit_stage(record)
+
+    def iter_stages(self, iterable, name):
+        """
+        Yields the items of `iterable`, recording the time spent producing
+        each one as a stage named `name(item)`.
+        """
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.add(name(item), time.perf_counter() - start)
+            yield item
+
+    def _enter(self, stage):
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                # Keep the parent's peak before the counter is reset for the child
+                parent = self._stack[-1]
+                parent.peak = max(parent.peak, peak)
+            tracemalloc.reset_peak()
+            stage.start_memory = current
+            stage.peak = current
+        self._stack.append(stage)
+        self.report.stages.append(stage.record)
+
+    def _exit(self, stage):
+        self._stack.pop()
+        if self.trace_memory:
+            stage.peak = max(stage.peak, tracemalloc.get_traced_memory()[1])
+            stage.record.peak_bytes = stage.peak - stage.start_memory
+            if self._stack:
+                parent = self._stack[-1]
+                parent.peak = max(parent.peak, stage.peak)
+        if self.jsonl_path:
+            self._emit_stage(stage.record)
+
+    def _emit_stage(self, record):
+        self._emit({**self.report.context, "event": "stage", **record.to_dict()})
+
+    def _emit(self, entry):
+        # One write per line in append mode, so lines from parallel workers do not interleave
+        line = json.dumps(entry, default=str) + "\n"
+        with _emit_lock, open(self.jsonl_path, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+    def finish(self, **context):
+        """
+        Closes the report, adding `context` (e.g. success) to it, and returns it.
+        """
+        self.report.total_seconds = time.perf_counter() - self._start
+        self.report.context.update(context)
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        if self.jsonl_path:
+            self._emit({**self.report.context, "event": "conversion", "pid": os.getpid(),
+                        "total_seconds": round(self.report.total_seconds, 6),
+                        "stages": len(self.report.stages)})
+        return self.report
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def set(self, rows=None, bytes=None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class NullProfiler:
+    """
+    Stand-in used when profiling is off. Every method returns immediately,
+    so instrumented code pays one method call per stage and nothing else.
+    """
+
+    enabled = False
+    report = None
+
+    def stage(self, name):
+        return _NULL_STAGE
+
+    def profile(self, name=None):
+        return lambda fn: fn
+
+    def add(self, name, seconds, rows=None, bytes=None, peak_bytes=None):
+        pass
+
+    def iter_stages(self, iterable, name):
+        return iterable
+
+    def finish(self, **context):
+        return None
+
+
+NULL_PROFILER = NullProfiler()
+_emit_lock = threading.Lock()
+
+
+class ConversionResult(tuple):
+    """
+    The (success, message) pair returned by the converters, carrying the
+    ConversionReport of the run as `.report` (None when profiling was off).
+    Unpacks exactly like the plain tuple.
+    """
+
+    def __new__(cls, success, message, report=None):
+        result = super().__new__(cls, (success, message))
+        result.report = report
+        return result
+
+    def __getnewargs__(self):
+        return (self[0], self[1], self.report)
+
+    @property
+    def success(self):
+        return self[0]
+
+    @property
+    def message(self):
+        return self[1]
@@ -0,0 +1,111 @@
+import importlib
+import os
+import sys
+import threading
+import time
+
+from app.utils.logger import ConversionReport, StageRecord, logger
+
+# --- Constants ---
+# Seconds from launch until the window is shown; TURBO_GST_STARTUP_BUDGET overrides it
+STARTUP_BUDGET_SECONDS = 1.5
+STARTUP_BUDGET_ENV = "TURBO_GST_STARTUP_BUDGET"
+# Imported in the background once the window is up, never on the way to it
+DEFERRED_MODULES = (
+    "pandas",
+    "xlsxwriter",
+    "app.core.batch_converter",
+    "app.core.gstr1_converter",
+    "app.core.gstr2_converter",
+    "app.core.hot_folder",
+)
+WARM_STAGE = "warm"
+SHOWN_STAGE = "show window"
+
+
+def startup_budget():
+    """The startup budget in seconds, from TURBO_GST_STARTUP_BUDGET if it is set."""
+    try:
+        return float(os.environ.get(STARTUP_BUDGET_ENV) or STARTUP_BUDGET_SECONDS)
+    except ValueError:
+        logger.warning("%s is not a number; using %ss", STARTUP_BUDGET_ENV, STARTUP_BUDGET_SECONDS)
+        return STARTUP_BUDGET_SECONDS
+
+
+class StartupTimer:
+    """
+    Times the launch of the desktop app as a ConversionReport: one stage
+    per phase up to the shown window, then "warm/<module>" stages for the
+    background imports of `warm_imports`.
+
+    Args:
+        start (float, optional): `time.perf_counter()` when the launch began.
+            Defaults to now.
+    """
+
+    def __init__(self, start=None):
+        self.start = time.perf_counter() if start is None else start
+        self.report = ConversionReport()
+        self.shown_seconds = None
+        self.eager_modules = []
+        self._last = self.start
+        self._lock = threading.Lock()
+
+    def mark(self, name):
+        """Ends phase `name`, which ran since the previous mark."""
+        now = time.perf_counter()
+        self._add(StageRecord(name, now - self._last))
+        self._last = now
+        if name == SHOWN_STAGE:
+            self.shown_seconds = now - self.start
+            # Whatever of the deferred modules is loaded by now slowed the window down
+            self.eager_modules = [module for module in DEFERRED_MODULES if module in sys.modules]
+
+    def _add(self, record):
+        with self._lock:
+            self.report.stages.append(record)
+            self.report.total_seconds = time.perf_counter() - self.start
+
+    def problems(self, budget=None):
+        """Returns what is wrong with the launch: a blown budget or deferred modules imported eagerly."""
+        budget = startup_budget() if budget is None else budget
+        problems = []
+        if self.shown_seconds is not None and self.shown_seconds > budget:
+            problems.append(f"The window took {self.shown_seconds:.3f}s to show; the budget is {budget:.3f}s")
+        if self.eager_modules:
+            problems.append(f"Imported before the window was shown: {', '.join(self.eager_modules)}")
+        return problems
+
+    def format(self, budget=None):
+        """Renders the phases and warm-up imports, followed by any problems."""
+        lines = [self.report.format()]
+        if self.shown_seconds is not None:
+            lines.append(f"{'window shown after':<40} {self.shown_seconds:>9.3f}")
+        lines.extend(f"Warning: {problem}" for problem in self.problems(budget))
+        return "\n".join(lines)
+
+
+def warm_imports(timer=None, modules=DEFERRED_MODULES):
+    """
+    Imports `modules` on a daemon thread, so that the first conversion does
+    not wait for pandas and the converters. A conversion started earlier
+    simply blocks on the module being imported until it is ready.
+
+    Returns:
+        threading.Thread: The started thread.
+    """
+    def run():
+        for module in modules:
+            start = time.perf_counter()
+            try:
+                importlib.import_module(module)
+            except Exception as e:
+                # The conversion that needs it reports the error properly
+                logger.warning("Could not preload %s: %s", module, e)
+                continue
+            if timer is not None:
+                timer._add(StageRecord(f"{WARM_STAGE}/{module}", time.perf_counter() - start))
+
+    thread = threading.Thread(target=run, name="warm-imports", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,291 @@
+"""
+Scaling benchmarks for the GSTR-1 and GSTR-2 converters.
+
+Synthetic returns from 1k to 1M line items are generated once into a work
+directory, then every stage of a conversion is timed on its own and with
+each available engine: json.load vs the streaming reader, json_normalize vs
+the record_path normaliser, the columnar flattener, to_excel vs the
+streaming writer, and the converters end to end. Peak memory of each
+stage is measured in a second run under tracemalloc, so it does not distort
+the timings. Allocations made by pyarrow are not visible to tracemalloc.
+
+Usage:
+    python -m benchmarks.scaling --sizes 1000,10000,100000 --json results.jsonl
+    python -m benchmarks.scaling --baseline results.jsonl --tolerance 0.25
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+from benchmarks.synthetic import write_return
+
+# --- Constants ---
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+RETURN_TYPES = ("gstr1", "gstr2")
+
+
+def measure(fn, memory=True):
+    """
+    Runs `fn` once for its wall time and, if `memory` is set, once more under
+    tracemalloc for its peak allocation.
+
+    Returns:
+        tuple: (seconds, peak bytes or None, result of the timed run)
+    """
+    gc.collect()
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+
+    peak = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        try:
+            fn()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return seconds, peak, result
+
+
+def _load(json_path):
+    with open(json_path, 'r') as f:
+        return json.load(f)
+
+
+def _stream_all(json_path):
+    from app.core.json_stream import iter_json_sections
+    for _ in iter_json_sections(json_path):
+        pass
+
+
+def _to_excel(df, excel_path):
+    import pandas as pd
+    with pd.ExcelWriter(excel_path, engine='xlsxwriter') as writer:
+        df.to_excel(writer, sheet_name='B2B', index=False)
+
+
+def _streaming_excel(df, excel_path):
+    from app.core.excel_writer import StreamingExcelWriter
+    with StreamingExcelWriter(excel_path) as writer:
+        writer.write_dataframe('B2B', df)
+
+
+def _sink(output_format, df, output_path):
+    from app.core.output_sinks import open_output_sink
+    with open_output_sink(output_format, output_path) as sink:
+        sink.write_section('b2b', 'B2B', df)
+
+
+def build_stages(return_type, json_path, work_dir):
+    """
+    Returns the stages to benchmark for one input as (stage, engine, fn,
+    prepare). `prepare`, if not None, builds the stage's input (the parsed
+    return or the B2B frame) before it is timed.
+    """
+    import pandas as pd
+
+    from app.core import common_processors as cp
+    from app.core.gstr1_converter import STRUCTURE_PATH, convert_gstr1_to_excel
+    from app.core.gstr2_converter import CONFIG_PATH, convert_gstr2_to_excel
+
+    config_path = STRUCTURE_PATH if return_type == "gstr1" else CONFIG_PATH
+    convert = convert_gstr1_to_excel if return_type == "gstr1" else convert_gstr2_to_excel
+    with open(config_path, 'r') as f:
+        config = json.load(f)
+    cache = {}
+
+    def data():
+        if "data" not in cache:
+            cache["data"] = _load(json_path)
+        return cache["data"]
+
+    def out(name):
+        return os.path.join(work_dir, f"{return_type}-{name}")
+
+    stages = [
+        ("ingest", "json.load", lambda: _load(json_path), None),
+        ("ingest", "stream", lambda: _stream_all(json_path), None),
+    ]
+
+    b2b = config["b2b"]
+    if "record_path" in b2b:
+        columns = cp.build_record_path_columns(b2b["meta"], b2b["rename_dict"], b2b["order_df"])
+
+        def normalise_pandas():
+            df = cp.json_normalize_with_meta(data()["b2b"], record_path=b2b["record_path"], meta=b2b["meta"])
+            df = cp.safe_reorder(df, b2b["rename_dict"], b2b["order_df"])
+            return cp.convert_date_columns(df, b2b.get("date_formats", {}))
+
+        def normalise_record_path():
+            df = cp.normalize_record_path(data()["b2b"], b2b["record_path"], columns)
+            return cp.convert_date_columns(df, b2b.get("date_formats", {}))
+
+        stages += [
+            ("normalise b2b", "json_normalize", normalise_pandas, data),
+            ("normalise b2b", "record_path", normalise_record_path, data),
+        ]
+        frame = normalise_record_path
+    else:
+        frame = None
+
+    # GSTR-2 b2b and GSTR-1 cdnr go through the flattener
+    flatten_key = "cdnr" if return_type == "gstr1" else "b2b"
+    flatten_args = config[flatten_key]["args"]
+    stages += [
+        (f"flatten {flatten_key}", "columnar",
+         lambda: cp.flatten_and_normalize_columnar(data().get(flatten_key, []), **flatten_args), data),
+    ]
+
+    def flat_dates():
+        if "dates" not in cache:
+            flat = cp.flatten_and_normalize_columnar(data().get(flatten_key, []), **flatten_args)
+            cache["dates"] = flat.get("date", pd.Series(dtype=object))
+        return cache["dates"]
+
+    stages += [
+        ("parse dates", "to_datetime", lambda: pd.to_datetime(flat_dates(), errors='coerce'), flat_dates),
+        ("parse dates", "unique", lambda: cp.parse_dates(flat_dates(), cp.GST_DATE_FORMAT), flat_dates),
+    ]
+
+    def b2b_frame():
+        if "frame" not in cache:
+            if frame is not None:
+                cache["frame"] = frame()
+            else:
+                cache["frame"] = cp.flatten_and_normalize_columnar(data().get("b2b", []), **flatten_args)
+        return cache["frame"]
+
+    stages += [
+        ("write b2b", "to_excel", lambda: _to_excel(b2b_frame(), out("to_excel.xlsx")), b2b_frame),
+        ("write b2b", "streaming", lambda: _streaming_excel(b2b_frame(), out("streaming.xlsx")), b2b_frame),
+        ("write b2b", "csv", lambda: _sink("csv", b2b_frame(), out("csv")), b2b_frame),
+    ]
+    try:
+        import pyarrow  # noqa: F401
+        stages.append(("write b2b", "parquet", lambda: _sink("parquet", b2b_frame(), out("parquet")), b2b_frame))
+    except ImportError:
+        pass
+
+    stages += [
+        ("convert", "default", lambda: convert(json_path, out("default.xlsx")), None),
+        ("convert", "stream", lambda: convert(json_path, out("stream.xlsx"), stream=True), None),
+    ]
+    if (os.cpu_count() or 1) > 1:
+        stages.append(("convert", "pipeline",
+                       lambda: convert(json_path, out("pipeline.xlsx"), section_workers=os.cpu_count()), None))
+    return stages, cache.clear
+
+
+def run(sizes, return_types, work_dir, memory=True, only=None, seed=0, report=print):
+    """
+    Runs the benchmark matrix and returns one result dict per measurement.
+    `report` is called with each result as it becomes available.
+    """
+    results = []
+    for return_type in return_types:
+        for items in sizes:
+            json_path = os.path.join(work_dir, f"{return_type}-{items}.json")
+            if not os.path.exists(json_path):
+                write_return(json_path, return_type, items, seed=seed)
+            file_bytes = os.path.getsize(json_path)
+
+            stages, release_inputs = build_stages(return_type, json_path, work_dir)
+            for stage, engine, fn, prepare in stages:
+                if only and not any(word in f"{stage} {engine}" for word in only):
+                    continue
+                if prepare is not None:
+                    prepare()
+
+                seconds, peak, result = measure(fn, memory)
+                if isinstance(result, tuple) and result and result[0] is False:
+                    print(f"Warning: {stage}/{engine} failed: {result[1]}", file=sys.stderr)
+                entry = {
+                    "return_type": return_type,
+                    "items": items,
+                    "file_mb": round(file_bytes / (1024 * 1024), 2),
+                    "stage": stage,
+                    "engine": engine,
+                    "seconds": round(seconds, 4),
+                    "peak_mb": None if peak is None else round(peak / (1024 * 1024), 2),
+                }
+                results.append(entry)
+                report(entry)
+            release_inputs()
+    return results
+
+
+def _format(entry):
+    peak = "-" if entry["peak_mb"] is None else f"{entry['peak_mb']:.1f}"
+    return (f"{entry['return_type']:<6} {entry['items']:>9,} {entry['stage']:<16} {entry['engine']:<15} "
+            f"{entry['seconds']:>10.3f} {peak:>10}")
+
+
+def compare(results, baseline_path, tolerance):
+    """
+    Compares results with a JSON-lines baseline and returns the entries that
+    are slower than baseline * (1 + tolerance).
+    """
+    baseline = {}
+    with open(baseline_path, 'r') as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                baseline[(entry["return_type"], entry["items"], entry["stage"], entry["engine"])] = entry
+    regressions = []
+    for entry in results:
+        previous = baseline.get((entry["return_type"], entry["items"], entry["stage"], entry["engine"]))
+        if previous and entry["seconds"] > previous["seconds"] * (1 + tolerance):
+            regressions.append((entry, previous))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark converter stages on synthetic returns.")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="Comma-separated line item counts (default: 1k to 1M)")
+    parser.add_argument("--types", default=",".join(RETURN_TYPES), help="Comma-separated return types")
+    parser.add_argument("--only", action="append", help="Only run stages whose 'stage engine' contains this text")
+    parser.add_argument("--work-dir", help="Where inputs and outputs go; generated inputs are reused (default: a temp dir)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc run of each stage")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Append results to this JSON-lines file")
+    parser.add_argument("--baseline", help="JSON-lines results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown against the baseline (default: 0.2)")
+    args = parser.parse_args(argv)
+    # The same pandas date warning would otherwise be printed for every stage
+    warnings.filterwarnings("ignore", message="Parsing dates")
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    return_types = [name for name in args.types.split(",") if name]
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="turbo-gst-bench-")
+    os.makedirs(work_dir, exist_ok=True)
+
+    print(f"{'type':<6} {'items':>9} {'stage':<16} {'engine':<15} {'seconds':>10} {'peak MB':>10}")
+    results = run(sizes, return_types, work_dir, memory=not args.no_memory, only=args.only,
+                  seed=args.seed, report=lambda entry: print(_format(entry), flush=True))
+
+    if args.json:
+        with open(args.json, 'a') as f:
+            for entry in results:
+                f.write(json.dumps(entry) + "\n")
+
+    if args.baseline:
+        regressions = compare(results, args.baseline, args.tolerance)
+        for entry, previous in regressions:
+            print(f"REGRESSION {entry['return_type']} {entry['items']:,} {entry['stage']}/{entry['engine']}: "
+                  f"{previous['seconds']:.3f}s -> {entry['seconds']:.3f}s", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,454 @@
+"""
+Deterministic synthetic GSTR-1 and GSTR-2A/2B returns for tests and benchmarks.
+
+The returns follow the shapes the processor configs expect (b2b.inv.itms.itm_det,
+cdnr.nt, hsn.data, doc_issue.doc_det.docs, tds, ...). Sizes are given in line
+items, spread over the sections roughly like a real filer's. The same size and
+seed always produce byte-identical files.
+
+Usage:
+    python -m benchmarks.synthetic gstr1 100000 -o gstr1_100k.json
+"""
+import argparse
+import json
+import os
+import random
+
+# --- Constants ---
+RATES = (0, 5, 12, 18, 28)
+STATE_CODES = ("27", "29", "07", "33", "24", "09", "19", "32", "36", "06")
+UQCS = ("NOS", "KGS", "MTR", "LTR", "BOX", "PCS")
+DEFAULT_GSTIN = "27AAACT1234F1Z5"
+DEFAULT_PERIOD = "032024"
+_GSTIN_ALPHABET = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+# Share of the line items that goes to each section
+GSTR1_MIX = {
+    "b2b": 0.60,
+    "b2cl": 0.05,
+    "exp": 0.05,
+    "cdnr": 0.12,
+    "cdnur": 0.03,
+    "hsn": 0.10,
+    "b2cs": 0.05,
+}
+GSTR2_MIX = {
+    "b2b": 0.70,
+    "cdnr": 0.10,
+    "b2ba": 0.05,
+    "cdnra": 0.05,
+    "isd": 0.04,
+    "tds": 0.03,
+    "tcs": 0.03,
+}
+
+
+def _gstin_checksum(body):
+    # Mod-36 check character used by GSTINs
+    total = 0
+    for index, char in enumerate(body):
+        value = _GSTIN_ALPHABET.index(char) * (2 if index % 2 else 1)
+        total += value // 36 + value % 36
+    return _GSTIN_ALPHABET[(36 - total % 36) % 36]
+
+
+def make_gstin(rng, state=None):
+    """Returns a well-formed GSTIN with a valid check character."""
+    state = state or rng.choice(STATE_CODES)
+    letters = "".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(5))
+    digits = "".join(rng.choice("0123456789") for _ in range(4))
+    body = f"{state}{letters}{digits}{rng.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ')}{rng.randint(1, 9)}Z"
+    return body + _gstin_checksum(body)
+
+
+class _SectionBuilder:
+    """
+    Builds the records of one section from its own random stream, so the
+    content of a section does not depend on the sizes of the others.
+    """
+
+    def __init__(self, key, items, seed, gstin, period):
+        self.rng = random.Random(f"{seed}:{key}")
+        self.items = items
+        self.gstin = gstin
+        self.home_state = gstin[:2]
+        self.month = int(period[:2])
+        self.year = int(period[2:])
+        self._counter = 0
+
+    def date(self):
+        return f"{self.rng.randint(1, 28):02d}-{self.month:02d}-{self.year}"
+
+    def number(self, prefix):
+        self._counter += 1
+        return f"{prefix}/{self.year % 100:02d}/{self._counter:07d}"
+
+    def item_detail(self, pos):
+        rng = self.rng
+        txval = round(rng.uniform(100, 250_000), 2)
+        rate = rng.choice(RATES)
+        tax = round(txval * rate / 100, 2)
+        detail = {"txval": txval, "rt": rate, "iamt": 0, "camt": 0, "samt": 0,
+                  "csamt": round(txval * 0.01, 2) if rate == 28 else 0}
+        if pos == self.home_state:
+            detail["camt"] = detail["samt"] = round(tax / 2, 2)
+        else:
+            detail["iamt"] = tax
+        return detail
+
+    def item_list(self, count, pos):
+        items = []
+        for num in range(1, count + 1):
+            # The rate doubles as the item number in returns downloaded from the portal
+            detail = self.item_detail(pos)
+            items.append({"num": detail["rt"] * 100 + num, "itm_det": detail})
+        return items
+
+    def invoice_value(self, items):
+        return round(sum(item["itm_det"]["txval"] + item["itm_det"]["iamt"] + item["itm_det"]["camt"]
+                         + item["itm_det"]["samt"] + item["itm_det"]["csamt"] for item in items), 2)
+
+    def parties(self, make_records, records_per_party=(1, 40)):
+        """Groups generated records under parties until the item budget is used."""
+        remaining = self.items
+        while remaining > 0:
+            party_gstin = make_gstin(self.rng)
+            records = []
+            for _ in range(self.rng.randint(*records_per_party)):
+                if remaining <= 0:
+                    break
+                count = min(self.rng.randint(1, 4), remaining)
+                remaining -= count
+                records.append(make_records(party_gstin[:2], count))
+            yield party_gstin, records
+
+
+# --- GSTR-1 Sections ---
+
+def _gstr1_b2b(builder):
+    def invoice(pos, count):
+        items = builder.item_list(count, pos)
+        return {"inum": builder.number("INV"), "idt": builder.date(), "val": builder.invoice_value(items),
+                "pos": pos, "rchrg": builder.rng.choice("NNNNNNNNNY"), "inv_typ": "R", "flag": "N",
+                "updby": "S", "cflag": "N", "chksum": f"{builder.rng.getrandbits(128):032x}", "itms": items}
+
+    for ctin, invoices in builder.parties(invoice):
+        yield {"ctin": ctin, "cfs": "Y", "inv": invoices}
+
+
+def _gstr1_b2cl(builder):
+    # Inter-state supplies to unregistered persons above the B2CL limit
+    remaining = builder.items
+    while remaining > 0:
+        pos = builder.rng.choice([code for code in STATE_CODES if code != builder.home_state])
+        invoices = []
+        for _ in range(builder.rng.randint(1, 20)):
+            if remaining <= 0:
+                break
+            count = min(builder.rng.randint(1, 4), remaining)
+            remaining -= count
+            items = builder.item_list(count, pos)
+            invoices.append({"inum": builder.number("BCL"), "idt": builder.date(),
+                             "val": builder.invoice_value(items), "flag": "N", "itms": items})
+        yield {"pos": pos, "inv": invoices}
+
+
+def _split(builder, kinds):
+    """Splits the item budget of a section evenly over its record kinds."""
+    share, extra = divmod(builder.items, len(kinds))
+    return [(kind, share + (index < extra)) for index, kind in enumerate(kinds)]
+
+
+def _gstr1_exp(builder):
+    for exp_typ, budget in _split(builder, ("WPAY", "WOPAY")):
+        invoices = []
+        while budget > 0:
+            count = min(builder.rng.randint(1, 4), budget)
+            budget -= count
+            # Exports are inter-state supplies
+            items = builder.item_list(count, "96")
+            invoices.append({"inum": builder.number("EXP"), "idt": builder.date(),
+                             "val": builder.invoice_value(items), "sbpcode": "INNSA1",
+                             "sbnum": str(builder.rng.randint(1_000_000, 9_999_999)), "sbdt": builder.date(),
+                             "flag": "N", "itms": items})
+        if invoices:
+            yield {"exp_typ": exp_typ, "inv": invoices}
+
+
+def _note(builder, pos, count):
+    items = builder.item_list(count, pos)
+    return {"ntty": builder.rng.choice("CCCCD"), "nt_num": builder.number("CN"), "nt_dt": builder.date(),
+            "val": builder.invoice_value(items), "pos": pos, "rchrg": "N", "inv_typ": "R",
+            "flag": "N", "chksum": f"{builder.rng.getrandbits(128):032x}", "itms": items}
+
+
+def _gstr1_cdnr(builder):
+    for ctin, notes in builder.parties(lambda pos, count: _note(builder, pos, count), (1, 10)):
+        yield {"ctin": ctin, "cfs": "Y", "nt": notes}
+
+
+def _gstr1_cdnur(builder):
+    for typ, budget in _split(builder, ("B2CL", "EXPWP", "EXPWOP")):
+        notes = []
+        while budget > 0:
+            count = min(builder.rng.randint(1, 4), budget)
+            budget -= count
+            notes.append(_note(builder, builder.rng.choice(STATE_CODES), count))
+        if notes:
+            yield {"typ": typ, "nt": notes}
+
+
+def _gstr1_b2cs(builder):
+    rng = builder.rng
+    for _ in range(builder.items):
+        pos = rng.choice(STATE_CODES)
+        detail = builder.item_detail(pos)
+        record = {"sply_ty": "INTRA" if pos == builder.home_state else "INTER", "rt": detail["rt"],
+                  "typ": "OE", "pos": pos, "txval": detail["txval"], "iamt": detail["iamt"],
+                  "camt": detail["camt"], "samt": detail["samt"], "csamt": detail["csamt"], "flag": "N"}
+        yield record
+
+
+def _gstr1_hsn(builder):
+    rng = builder.rng
+    for num in range(1, builder.items + 1):
+        pos = rng.choice(STATE_CODES)
+        detail = builder.item_detail(pos)
+        qty = rng.randint(1, 5000)
+        yield {"num": num, "det": {"hsn_sc": str(rng.randint(1001, 9999)) + rng.choice(("", "10", "90")),
+                                   "desc": f"Goods {num}", "uqc": rng.choice(UQCS), "qty": qty,
+                                   "val": builder.invoice_value([{"itm_det": detail}]), **detail}}
+
+
+def _gstr1_nil(builder):
+    for sply_ty in ("INTRB2B", "INTRB2C", "INTRAB2B", "INTRAB2C"):
+        yield {"inv": [{"sply_ty": sply_ty, "expt_amt": round(builder.rng.uniform(0, 1e6), 2),
+                        "nil_amt": round(builder.rng.uniform(0, 1e5), 2),
+                        "ngsup_amt": round(builder.rng.uniform(0, 1e4), 2)}]}
+
+
+def _gstr1_doc_issue(builder, total_documents):
+    start = 1
+    for doc_num, prefix in enumerate(("INV", "BCL", "EXP", "CN"), start=1):
+        totnum = max(total_documents // 4, 1)
+        cancel = builder.rng.randint(0, max(totnum // 100, 1))
+        yield {"doc_num": doc_num, "docs": [{"num": 1, "from": f"{prefix}/{start:07d}",
+                                             "to": f"{prefix}/{start + totnum - 1:07d}",
+                                             "totnum": totnum, "cancel": cancel, "net_issue": totnum - cancel}]}
+
+
+# --- GSTR-2A/2B Sections ---
+
+def _gstr2_b2b(builder):
+    def invoice(pos, count):
+        # Inward supplies: the supplier's state decides the tax split
+        items = builder.item_list(count, pos)
+        return {"inum": builder.number("SUP"), "idt": builder.date(), "val": builder.invoice_value(items),
+                "pos": builder.home_state, "rchrg": "N", "inv_typ": "R",
+                "chksum": f"{builder.rng.getrandbits(128):032x}", "itms": items}
+
+    for ctin, invoices in builder.parties(invoice):
+        yield {"ctin": ctin, "cfs": "Y", "cfs3b": "Y", "fldtr1": builder.date(),
+               "flprdr1": f"{builder.month:02d}{builder.year}", "inv": invoices}
+
+
+def _gstr2_b2ba(builder):
+    def invoice(pos, count):
+        items = builder.item_list(count, pos)
+        original = builder.number("SUP")
+        return {"oinum": original, "oidt": builder.date(), "inum": original + "A", "idt": builder.date(),
+                "val": builder.invoice_value(items), "pos": builder.home_state, "rchrg": "N",
+                "inv_typ": "R", "itms": items}
+
+    for ctin, invoices in builder.parties(invoice, (1, 10)):
+        yield {"ctin": ctin, "cfs": "Y", "inv": invoices}
+
+
+def _gstr2_cdnr(builder):
+    for ctin, notes in builder.parties(lambda pos, count: _note(builder, pos, count), (1, 10)):
+        yield {"ctin": ctin, "cfs": "Y", "nt": notes}
+
+
+def _gstr2_cdnra(builder):
+    def note(pos, count):
+        record = _note(builder, pos, count)
+        record["ont_num"], record["ont_dt"] = record["nt_num"], builder.date()
+        record["nt_num"] += "A"
+        return record
+
+    for ctin, notes in builder.parties(note, (1, 5)):
+        yield {"ctin": ctin, "cfs": "Y", "nt": notes}
+
+
+def _gstr2_isd(builder):
+    remaining = builder.items
+    while remaining > 0:
+        documents = []
+        for _ in range(builder.rng.randint(1, 20)):
+            if remaining <= 0:
+                break
+            remaining -= 1
+            detail = builder.item_detail(builder.rng.choice(STATE_CODES))
+            documents.append({"isd_docty": builder.rng.choice(("ISD", "ISDCN")), "docnum": builder.number("ISD"),
+                              "docdt": builder.date(), "itc_elg": "Y", "iamt": detail["iamt"],
+                              "camt": detail["camt"], "samt": detail["samt"], "cess": detail["csamt"]})
+        yield {"ctin": make_gstin(builder.rng), "docdet": documents}
+
+
+def _gstr2_tds(builder):
+    rng = builder.rng
+    for _ in range(builder.items):
+        amount = round(rng.uniform(10_000, 5_000_000), 2)
+        yield {"gstin_ded": make_gstin(rng), "amt_ded": amount, "iamt": round(amount * 0.02, 2),
+               "camt": 0, "samt": 0}
+
+
+def _gstr2_tcs(builder):
+    rng = builder.rng
+    for _ in range(builder.items):
+        supplies = round(rng.uniform(10_000, 5_000_000), 2)
+        yield {"ctin": make_gstin(rng), "fp": f"{builder.month:02d}{builder.year}", "supp_val": supplies,
+               "sup_ret": round(supplies * 0.05, 2), "iamt": round(supplies * 0.01, 2), "camt": 0, "samt": 0}
+
+
+# --- Section Mapping ---
+# Maps section keys to (record generator, wrapper key). List sections have no
+# wrapper; hsn and doc_issue are objects holding their record list.
+GSTR1_SECTIONS = {
+    "b2b": (_gstr1_b2b, None),
+    "b2cs": (_gstr1_b2cs, None),
+    "b2cl": (_gstr1_b2cl, None),
+    "cdnr": (_gstr1_cdnr, None),
+    "cdnur": (_gstr1_cdnur, None),
+    "exp": (_gstr1_exp, None),
+    "hsn": (_gstr1_hsn, "data"),
+    "nil": (_gstr1_nil, None),
+    "doc_issue": (_gstr1_doc_issue, "doc_det"),
+}
+GSTR2_SECTIONS = {
+    "b2b": (_gstr2_b2b, None),
+    "cdnr": (_gstr2_cdnr, None),
+    "b2ba": (_gstr2_b2ba, None),
+    "cdnra": (_gstr2_cdnra, None),
+    "isd": (_gstr2_isd, None),
+    "tds": (_gstr2_tds, None),
+    "tcs": (_gstr2_tcs, None),
+}
+RETURN_LAYOUTS = {
+    "gstr1": (GSTR1_SECTIONS, GSTR1_MIX),
+    "gstr2": (GSTR2_SECTIONS, GSTR2_MIX),
+}
+
+
+def _section_records(return_type, items, seed, gstin, period):
+    """Yields (key, wrapper key, record iterator) for every section of a return."""
+    sections, mix = RETURN_LAYOUTS[return_type]
+    for key, (generate, wrapper) in sections.items():
+        section_items = round(items * mix.get(key, 0))
+        builder = _SectionBuilder(key, section_items, seed, gstin, period)
+        if key == "doc_issue":
+            records = generate(builder, max(items // 2, 1))
+        elif key == "nil":
+            records = generate(builder)
+        elif section_items == 0:
+            continue
+        else:
+            records = generate(builder)
+        yield key, wrapper, records
+
+
+def _basic_info(return_type, items, seed, gstin, period):
+    info = {"gstin": gstin, "fp": period}
+    if return_type == "gstr1":
+        rng = random.Random(f"{seed}:basic_info")
+        info["gt"] = round(items * rng.uniform(50_000, 150_000), 2)
+        info["cur_gt"] = round(info["gt"] / 4, 2)
+    return info
+
+
+def generate_return(return_type, items, seed=0, gstin=DEFAULT_GSTIN, period=DEFAULT_PERIOD):
+    """
+    Builds a synthetic return in memory.
+
+    Args:
+        return_type (str): "gstr1" or "gstr2".
+        items (int): Approximate number of line items across all sections.
+        seed (int, optional): Seed of the random streams. Defaults to 0.
+        gstin (str, optional): GSTIN of the filer.
+        period (str, optional): Return period as MMYYYY.
+
+    Returns:
+        dict: The return, shaped like a portal download.
+    """
+    data = _basic_info(return_type, items, seed, gstin, period)
+    for key, wrapper, records in _section_records(return_type, items, seed, gstin, period):
+        records = list(records)
+        data[key] = {wrapper: records} if wrapper else records
+    return data
+
+
+def write_return(json_path, return_type, items, seed=0, gstin=DEFAULT_GSTIN, period=DEFAULT_PERIOD):
+    """
+    Writes a synthetic return to `json_path` one record at a time, so even
+    returns with millions of line items are generated in flat memory. The
+    file is identical to `json.dump(generate_return(...))` with the same arguments.
+
+    Returns:
+        int: The size of the written file in bytes.
+    """
+    with open(json_path, 'w', encoding='utf-8') as f:
+        f.write("{")
+        first_member = True
+        for key, value in _basic_info(return_type, items, seed, gstin, period).items():
+            f.write(("" if first_member else ", ") + f"{json.dumps(key)}: {json.dumps(value)}")
+            first_member = False
+
+        for key, wrapper, records in _section_records(return_type, items, seed, gstin, period):
+            f.write(("" if first_member else ", ") + f"{json.dumps(key)}: ")
+            first_member = False
+            if wrapper:
+                f.write(f"{{{json.dumps(wrapper)}: ")
+            f.write("[")
+            for index, record in enumerate(records):
+                f.write((", " if index else "") + json.dumps(record))
+            f.write("]")
+            if wrapper:
+                f.write("}")
+        f.write("}")
+    return os.path.getsize(json_path)
+
+
+def count_line_items(data):
+    """Counts the rows a return expands to, for reporting benchmark sizes."""
+    total = 0
+    for key, section in data.items():
+        if isinstance(section, dict):
+            section = next(iter(section.values()), [])
+        if not isinstance(section, list):
+            continue
+        for record in section:
+            nested = record.get("inv") or record.get("nt") or record.get("docdet")
+            if isinstance(nested, list):
+                total += sum(len(entry.get("itms") or [None]) for entry in nested)
+            else:
+                total += 1
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a deterministic synthetic GST return.")
+    parser.add_argument("return_type", choices=sorted(RETURN_LAYOUTS))
+    parser.add_argument("items", type=int, help="Approximate number of line items")
+    parser.add_argument("-o", "--output", required=True, help="Path of the JSON file to write")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--gstin", default=DEFAULT_GSTIN)
+    parser.add_argument("--period", default=DEFAULT_PERIOD, help="Return period as MMYYYY")
+    args = parser.parse_args(argv)
+
+    size = write_return(args.output, args.return_type, args.items, args.seed, args.gstin, args.period)
+    print(f"Wrote {args.output} ({size / (1024 * 1024):.1f} MB)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
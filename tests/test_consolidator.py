@@ -0,0 +1,25 @@
+import pandas as pd
+
+from app.core.consolidator import TAG_COLUMNS, consolidate_returns
+from benchmarks.synthetic import write_return
+
+
+def test_consolidates_gstr2_returns_with_tcs(tmp_path):
+    # tcs rows carry an fp of their own, next to the Return Period tag
+    files = []
+    for seed, period in enumerate(("042024", "052024")):
+        json_path = tmp_path / f"gstr2_{period}.json"
+        write_return(json_path, "gstr2", 400, seed=seed, period=period)
+        files.append(str(json_path))
+
+    output_dir = tmp_path / "consolidated"
+    results = consolidate_returns(files, str(output_dir), return_type="gstr2", output_format="csv",
+                                  max_workers=1)
+
+    assert [result.success for result in results] == [True, True], [result.message for result in results]
+    tcs = pd.read_csv(output_dir / "tcs.csv", dtype=str)
+    assert list(tcs.columns[:2]) == list(TAG_COLUMNS)
+    assert "fp" in tcs.columns
+    assert list(tcs["Return Period"].unique()) == ["042024", "052024"]
+    assert sum(result.rows for result in results) == sum(
+        len(pd.read_csv(path)) for path in output_dir.glob("*.csv") if path.stem != "returns")
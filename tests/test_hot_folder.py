@@ -0,0 +1,35 @@
+import gzip
+import multiprocessing
+import time
+
+from app.core.hot_folder import HotFolderWatcher, is_watched_name, looks_complete
+from benchmarks.synthetic import write_return
+
+
+def test_watch_converts_gzipped_returns(tmp_path):
+    json_path = tmp_path / "gstr1_032024.json"
+    write_return(json_path, "gstr1", 200)
+    folder = tmp_path / "watched"
+    folder.mkdir()
+    gz_path = folder / "gstr1_032024.json.gz"
+    gz_path.write_bytes(gzip.compress(json_path.read_bytes()))
+    # Cut off, as while it is still being copied
+    (folder / "gstr1_042024.json.gz").write_bytes(gz_path.read_bytes()[:-100])
+
+    assert is_watched_name(gz_path.name)
+    assert not is_watched_name(".gstr1_032024.json.gz") and not is_watched_name("returns.tar.gz")
+    assert looks_complete(str(gz_path))
+    assert not looks_complete(str(folder / "gstr1_042024.json.gz"))
+
+    output_dir = tmp_path / "out"
+    results = []
+    watcher = HotFolderWatcher(str(folder), str(output_dir), output_format="csv", max_workers=1,
+                               settle_seconds=0.1, poll_seconds=0.1, use_inotify=False,
+                               progress_callback=results.append, mp_context=multiprocessing.get_context("spawn"))
+    deadline = time.monotonic() + 60
+    watcher.run(should_stop=lambda: bool(results) or time.monotonic() > deadline)
+
+    assert [result.success for result in results] == [True], [result.message for result in results]
+    assert results[0].output_path == str(output_dir / "gstr1_032024")
+    assert (output_dir / "gstr1_032024" / "b2b.csv").exists()
+    assert str(gz_path) in watcher.state.files
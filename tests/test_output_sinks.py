@@ -0,0 +1,18 @@
+import pandas as pd
+
+from app.core.output_sinks import CsvSink
+
+
+def test_csv_appends_stay_in_order(tmp_path):
+    # Chunks of very different sizes, so later writes would finish first if they ran concurrently
+    chunks = [pd.DataFrame({"chunk": chunk, "row": range(5000 if chunk % 3 == 0 else 1)}) for chunk in range(12)]
+    for run in range(5):
+        output_dir = tmp_path / f"run_{run}"
+        with CsvSink(str(output_dir)) as sink:
+            for df in chunks:
+                sink.write_section("b2b", "B2B", df)
+
+        written = pd.read_csv(output_dir / "b2b.csv")
+        assert len(written) == sum(len(df) for df in chunks)
+        assert list(written["chunk"].drop_duplicates()) == list(range(12))
+        assert written["chunk"].is_monotonic_increasing
@@ -0,0 +1,21 @@
+import pandas as pd
+
+from app.core.gstr1_converter import convert_gstr1_to_excel
+from app.core.summaries import SUMMARY_SECTIONS
+from benchmarks.synthetic import write_return
+
+
+def test_totals_check_reconciles_summaries_with_sections(tmp_path):
+    json_path = tmp_path / "gstr1_032024.json"
+    write_return(json_path, "gstr1", 300)
+    output_dir = tmp_path / "out"
+
+    success, message = convert_gstr1_to_excel(str(json_path), str(output_dir), output_format="csv", summaries=True)
+
+    assert success, message
+    check = pd.read_csv(output_dir / "totals_check.csv").set_index("Section")
+    summaries = check.loc[[key for key, _, _ in SUMMARY_SECTIONS]]
+    assert list(summaries["Check"]) == ["OK"] * len(SUMMARY_SECTIONS)
+    assert (summaries["Taxable Value"] == check.loc["net", "Taxable Value"]).all()
+    # The annual turnovers are not compared with one period
+    assert not {"gt", "cur_gt"} & set(check.index)